@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import shutil
+import time
 import base64
 import redis
 
@@ -24,6 +25,7 @@ from open_webui.env import (
     REDIS_KEY_PREFIX,
     REDIS_SENTINEL_HOSTS,
     REDIS_SENTINEL_PORT,
+    REDIS_CONFIG_SYNC_INTERVAL,
     FRONTEND_BUILD_DIR,
     OFFLINE_MODE,
     OPEN_WEBUI_DIR,
@@ -222,18 +224,38 @@ class PersistentConfig(Generic[T]):
 
 
 class AppConfig:
+    """
+    Application config shared by all workers.
+
+    Values are read from a local snapshot. When Redis is configured, writes
+    are published on a channel so other workers re-read only the changed key,
+    and every ``sync_interval`` seconds all keys are re-read in one round-trip
+    in case an update notification was missed.
+    """
+
     _redis: Union[redis.Redis, redis.cluster.RedisCluster] = None
     _redis_key_prefix: str
 
     _state: dict[str, PersistentConfig]
 
+    # Keys changed by another worker that must be re-read from Redis
+    _stale_keys: set[str]
+    _sync_interval: float
+    _next_sync_at: float
+
     def __init__(
         self,
         redis_url: Optional[str] = None,
         redis_sentinels: Optional[list] = [],
         redis_cluster: Optional[bool] = False,
         redis_key_prefix: str = "open-webui",
+        sync_interval: float = REDIS_CONFIG_SYNC_INTERVAL,
     ):
+        super().__setattr__("_state", {})
+        super().__setattr__("_stale_keys", set())
+        super().__setattr__("_sync_interval", sync_interval)
+        super().__setattr__("_next_sync_at", 0.0)
+
         if redis_url:
             super().__setattr__("_redis_key_prefix", redis_key_prefix)
             super().__setattr__(
@@ -245,8 +267,7 @@ class AppConfig:
                     decode_responses=True,
                 ),
             )
-
-        super().__setattr__("_state", {})
+            self._subscribe()
 
     def __setattr__(self, key, value):
         if isinstance(value, PersistentConfig):
@@ -258,29 +279,84 @@ class AppConfig:
             if self._redis:
                 redis_key = f"{self._redis_key_prefix}:config:{key}"
                 self._redis.set(redis_key, json.dumps(self._state[key].value))
+                self._redis.publish(self._get_channel(), key)
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
+        # If Redis is available, pick up values updated by other workers
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:config:{key}"
-            redis_value = self._redis.get(redis_key)
+            if self._sync_interval <= 0 or key in self._stale_keys:
+                self._sync([key])
+            elif time.monotonic() >= self._next_sync_at:
+                self._sync()
 
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
+        return self._state[key].value
 
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
+    def _get_channel(self) -> str:
+        return f"{self._redis_key_prefix}:config:updates"
 
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+    def _subscribe(self):
+        def on_message(message):
+            self._stale_keys.add(message["data"])
 
-        return self._state[key].value
+        def on_error(e, pubsub, thread):
+            # Updates may be missed until the connection is back
+            log.warning(f"Config update listener error: {e}")
+            super(AppConfig, self).__setattr__("_next_sync_at", 0.0)
+            time.sleep(1)
+
+        try:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self._get_channel(): on_message})
+            pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=on_error)
+        except Exception as e:
+            log.error(
+                f"Could not subscribe to config updates, polling every {self._sync_interval}s: {e}"
+            )
+
+    def _sync(self, keys: Optional[list[str]] = None):
+        """
+        Read config values from Redis into the local snapshot
+
+        Args:
+            keys: Keys to read, all keys when None
+        """
+        if keys is None:
+            keys = list(self._state)
+            super().__setattr__("_next_sync_at", time.monotonic() + self._sync_interval)
+
+        # Forget before reading so updates published meanwhile are not lost
+        self._stale_keys.difference_update(keys)
+        try:
+            if len(keys) == 1:
+                redis_values = [
+                    self._redis.get(f"{self._redis_key_prefix}:config:{keys[0]}")
+                ]
+            else:
+                pipe = self._redis.pipeline()
+                for key in keys:
+                    pipe.get(f"{self._redis_key_prefix}:config:{key}")
+                redis_values = pipe.execute()
+        except Exception:
+            self._stale_keys.update(keys)
+            raise
+
+        for key, redis_value in zip(keys, redis_values):
+            if redis_value is None:
+                continue
+
+            try:
+                decoded_value = json.loads(redis_value)
+
+                # Update the in-memory value if different
+                if self._state[key].value != decoded_value:
+                    self._state[key].value = decoded_value
+                    log.info(f"Updated {key} from Redis: {decoded_value}")
+
+            except json.JSONDecodeError:
+                log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
 
 
 ####################################
@@ -882,6 +958,18 @@ if CUSTOM_NAME:
 
 STORAGE_PROVIDER = os.environ.get("STORAGE_PROVIDER", "local")  # defaults to local, s3
 
+# Uploads are streamed and sent to cloud storage in parts of this size (bytes)
+STORAGE_UPLOAD_CHUNK_SIZE = os.environ.get("STORAGE_UPLOAD_CHUNK_SIZE", "")
+
+try:
+    # Multipart uploads need at least 5 MiB parts (S3), in 256 KiB steps (GCS)
+    STORAGE_UPLOAD_CHUNK_SIZE = max(
+        5 * 1024 * 1024,
+        int(STORAGE_UPLOAD_CHUNK_SIZE) // (256 * 1024) * (256 * 1024),
+    )
+except ValueError:
+    STORAGE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
 S3_ACCESS_KEY_ID = os.environ.get("S3_ACCESS_KEY_ID", None)
 S3_SECRET_ACCESS_KEY = os.environ.get("S3_SECRET_ACCESS_KEY", None)
 S3_REGION_NAME = os.environ.get("S3_REGION_NAME", None)
@@ -903,6 +991,17 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Disk space (MB) for local copies of S3/GCS/Azure files, least recently used
+# copies are removed beyond it (0 for no limit)
+STORAGE_LOCAL_CACHE_MAX_SIZE_MB = os.environ.get(
+    "STORAGE_LOCAL_CACHE_MAX_SIZE_MB", "10240"
+)
+
+try:
+    STORAGE_LOCAL_CACHE_MAX_SIZE_MB = int(STORAGE_LOCAL_CACHE_MAX_SIZE_MB)
+except ValueError:
+    STORAGE_LOCAL_CACHE_MAX_SIZE_MB = 10240
+
 ####################################
 # File Upload DIR
 ####################################
@@ -2115,6 +2214,14 @@ else:
     except Exception:
         PGVECTOR_POOL_RECYCLE = 3600
 
+# Rows written per multi-row INSERT statement and commit
+PGVECTOR_INSERT_BATCH_SIZE = os.environ.get("PGVECTOR_INSERT_BATCH_SIZE", 500)
+
+try:
+    PGVECTOR_INSERT_BATCH_SIZE = max(1, int(PGVECTOR_INSERT_BATCH_SIZE))
+except Exception:
+    PGVECTOR_INSERT_BATCH_SIZE = 500
+
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
 PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", None)
@@ -2442,6 +2549,9 @@ ENABLE_RAG_HYBRID_SEARCH = PersistentConfig(
     os.environ.get("ENABLE_RAG_HYBRID_SEARCH", "").lower() == "true",
 )
 
+# Persistent BM25 indexes used by hybrid search, one directory per collection
+BM25_INDEX_DIR = os.environ.get("BM25_INDEX_DIR", f"{CACHE_DIR}/bm25")
+
 RAG_FULL_CONTEXT = PersistentConfig(
     "RAG_FULL_CONTEXT",
     "rag.full_context",
@@ -2544,6 +2654,61 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Embedding requests in flight at once, across all batches and users
+RAG_EMBEDDING_CONCURRENCY = os.environ.get("RAG_EMBEDDING_CONCURRENCY", "4")
+try:
+    RAG_EMBEDDING_CONCURRENCY = int(RAG_EMBEDDING_CONCURRENCY)
+except ValueError:
+    RAG_EMBEDDING_CONCURRENCY = 4
+
+RAG_EMBEDDING_MAX_RETRIES = os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "5")
+try:
+    RAG_EMBEDDING_MAX_RETRIES = int(RAG_EMBEDDING_MAX_RETRIES)
+except ValueError:
+    RAG_EMBEDDING_MAX_RETRIES = 5
+
+# Query embeddings kept in memory (0 disables the cache)
+RAG_EMBEDDING_CACHE_SIZE = os.environ.get("RAG_EMBEDDING_CACHE_SIZE", "1024")
+try:
+    RAG_EMBEDDING_CACHE_SIZE = int(RAG_EMBEDDING_CACHE_SIZE)
+except ValueError:
+    RAG_EMBEDDING_CACHE_SIZE = 1024
+
+RAG_EMBEDDING_CACHE_TTL = os.environ.get("RAG_EMBEDDING_CACHE_TTL", "3600")
+try:
+    RAG_EMBEDDING_CACHE_TTL = int(RAG_EMBEDDING_CACHE_TTL)
+except ValueError:
+    RAG_EMBEDDING_CACHE_TTL = 3600
+
+# Share cached query embeddings between instances through Redis
+RAG_EMBEDDING_CACHE_REDIS = (
+    os.environ.get("RAG_EMBEDDING_CACHE_REDIS", "False").lower() == "true"
+)
+
+# Reuse stored embeddings of identical chunks when saving documents
+ENABLE_RAG_CHUNK_EMBEDDING_REUSE = (
+    os.environ.get("ENABLE_RAG_CHUNK_EMBEDDING_REUSE", "True").lower() == "true"
+)
+
+# Stored chunk embeddings are dropped after this many seconds, and the oldest
+# beyond this many rows; embeddings of other engines or models are always
+# dropped (0 disables a limit)
+RAG_CHUNK_EMBEDDING_MAX_AGE = os.environ.get(
+    "RAG_CHUNK_EMBEDDING_MAX_AGE", str(30 * 24 * 60 * 60)
+)
+try:
+    RAG_CHUNK_EMBEDDING_MAX_AGE = int(RAG_CHUNK_EMBEDDING_MAX_AGE)
+except ValueError:
+    RAG_CHUNK_EMBEDDING_MAX_AGE = 30 * 24 * 60 * 60
+
+RAG_CHUNK_EMBEDDING_MAX_COUNT = os.environ.get(
+    "RAG_CHUNK_EMBEDDING_MAX_COUNT", "100000"
+)
+try:
+    RAG_CHUNK_EMBEDDING_MAX_COUNT = int(RAG_CHUNK_EMBEDDING_MAX_COUNT)
+except ValueError:
+    RAG_CHUNK_EMBEDDING_MAX_COUNT = 100000
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
@@ -362,6 +362,14 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Streamed message updates are buffered and written at most this often (ms)
+REALTIME_CHAT_SAVE_INTERVAL_MS = os.environ.get("REALTIME_CHAT_SAVE_INTERVAL_MS", "500")
+
+try:
+    REALTIME_CHAT_SAVE_INTERVAL_MS = int(REALTIME_CHAT_SAVE_INTERVAL_MS)
+except ValueError:
+    REALTIME_CHAT_SAVE_INTERVAL_MS = 500
+
 ENABLE_QUERIES_CACHE = os.environ.get("ENABLE_QUERIES_CACHE", "False").lower() == "true"
 
 ####################################
@@ -385,6 +393,14 @@ try:
 except ValueError:
     REDIS_SENTINEL_MAX_RETRY_COUNT = 2
 
+# Seconds between full re-reads of the shared app config from Redis. Updates
+# are also pushed over pub/sub, so this only bounds staleness if one is missed
+REDIS_CONFIG_SYNC_INTERVAL = os.environ.get("REDIS_CONFIG_SYNC_INTERVAL", "5")
+try:
+    REDIS_CONFIG_SYNC_INTERVAL = max(0.0, float(REDIS_CONFIG_SYNC_INTERVAL))
+except ValueError:
+    REDIS_CONFIG_SYNC_INTERVAL = 5.0
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -530,6 +546,15 @@ else:
     except Exception:
         MODELS_CACHE_TTL = 1
 
+# Seconds a user's group ids are reused (other instances' membership changes
+# show up after at most this long)
+GROUP_MEMBERSHIP_CACHE_TTL = os.environ.get("GROUP_MEMBERSHIP_CACHE_TTL", "5")
+
+try:
+    GROUP_MEMBERSHIP_CACHE_TTL = float(GROUP_MEMBERSHIP_CACHE_TTL)
+except ValueError:
+    GROUP_MEMBERSHIP_CACHE_TTL = 5.0
+
 
 ####################################
 # CHAT
@@ -638,6 +663,217 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+####################################
+# WEBHOOKS
+####################################
+
+WEBHOOK_CONCURRENCY = os.environ.get("WEBHOOK_CONCURRENCY", "16")
+
+try:
+    WEBHOOK_CONCURRENCY = int(WEBHOOK_CONCURRENCY)
+except ValueError:
+    WEBHOOK_CONCURRENCY = 16
+
+WEBHOOK_MAX_RETRIES = os.environ.get("WEBHOOK_MAX_RETRIES", "3")
+
+try:
+    WEBHOOK_MAX_RETRIES = int(WEBHOOK_MAX_RETRIES)
+except ValueError:
+    WEBHOOK_MAX_RETRIES = 3
+
+WEBHOOK_TIMEOUT = os.environ.get("WEBHOOK_TIMEOUT", "10")
+
+try:
+    WEBHOOK_TIMEOUT = float(WEBHOOK_TIMEOUT)
+except ValueError:
+    WEBHOOK_TIMEOUT = 10.0
+
+# Queue deliveries in Redis so they survive restarts and spread across instances
+ENABLE_WEBHOOK_REDIS_QUEUE = (
+    os.environ.get("ENABLE_WEBHOOK_REDIS_QUEUE", "False").lower() == "true"
+)
+
+####################################
+# OLLAMA ROUTING
+####################################
+
+# Consecutive failures after which an Ollama backend stops receiving requests
+OLLAMA_CIRCUIT_BREAKER_THRESHOLD = os.environ.get(
+    "OLLAMA_CIRCUIT_BREAKER_THRESHOLD", "5"
+)
+
+try:
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD = int(OLLAMA_CIRCUIT_BREAKER_THRESHOLD)
+except ValueError:
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD = 5
+
+# Seconds before a tripped backend is tried again
+OLLAMA_CIRCUIT_BREAKER_COOLDOWN = os.environ.get(
+    "OLLAMA_CIRCUIT_BREAKER_COOLDOWN", "30"
+)
+
+try:
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN = float(OLLAMA_CIRCUIT_BREAKER_COOLDOWN)
+except ValueError:
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN = 30.0
+
+# Outstanding requests a backend with the model loaded may have over one without
+OLLAMA_COLD_LOAD_PENALTY = os.environ.get("OLLAMA_COLD_LOAD_PENALTY", "2")
+
+try:
+    OLLAMA_COLD_LOAD_PENALTY = float(OLLAMA_COLD_LOAD_PENALTY)
+except ValueError:
+    OLLAMA_COLD_LOAD_PENALTY = 2.0
+
+
+####################################
+# MULTI-AGENT (JIUTIAN)
+####################################
+
+JIUTIAN_HTTP_POOL_LIMIT_PER_HOST = os.environ.get(
+    "JIUTIAN_HTTP_POOL_LIMIT_PER_HOST", "32"
+)
+
+try:
+    JIUTIAN_HTTP_POOL_LIMIT_PER_HOST = int(JIUTIAN_HTTP_POOL_LIMIT_PER_HOST)
+except ValueError:
+    JIUTIAN_HTTP_POOL_LIMIT_PER_HOST = 32
+
+JIUTIAN_HTTP_DNS_CACHE_TTL = os.environ.get("JIUTIAN_HTTP_DNS_CACHE_TTL", "300")
+
+try:
+    JIUTIAN_HTTP_DNS_CACHE_TTL = int(JIUTIAN_HTTP_DNS_CACHE_TTL)
+except ValueError:
+    JIUTIAN_HTTP_DNS_CACHE_TTL = 300
+
+JIUTIAN_HTTP_KEEPALIVE_TIMEOUT = os.environ.get("JIUTIAN_HTTP_KEEPALIVE_TIMEOUT", "60")
+
+try:
+    JIUTIAN_HTTP_KEEPALIVE_TIMEOUT = float(JIUTIAN_HTTP_KEEPALIVE_TIMEOUT)
+except ValueError:
+    JIUTIAN_HTTP_KEEPALIVE_TIMEOUT = 60.0
+
+JIUTIAN_JWT_EXPIRY = os.environ.get("JIUTIAN_JWT_EXPIRY", "3600")
+
+try:
+    JIUTIAN_JWT_EXPIRY = int(JIUTIAN_JWT_EXPIRY)
+except ValueError:
+    JIUTIAN_JWT_EXPIRY = 3600
+
+# Refresh cached tokens this many seconds before they expire
+JIUTIAN_JWT_REFRESH_MARGIN = os.environ.get("JIUTIAN_JWT_REFRESH_MARGIN", "300")
+
+try:
+    JIUTIAN_JWT_REFRESH_MARGIN = int(JIUTIAN_JWT_REFRESH_MARGIN)
+except ValueError:
+    JIUTIAN_JWT_REFRESH_MARGIN = 300
+
+# Process-wide limit on in-flight agent calls
+MAX_CONCURRENT_REQUESTS = os.environ.get("MAX_CONCURRENT_REQUESTS", "10")
+
+try:
+    MAX_CONCURRENT_REQUESTS = int(MAX_CONCURRENT_REQUESTS)
+except ValueError:
+    MAX_CONCURRENT_REQUESTS = 10
+
+# Default per-api_host and per-agent limits (0 means only the global limit applies)
+JIUTIAN_HOST_MAX_CONCURRENT_REQUESTS = os.environ.get(
+    "JIUTIAN_HOST_MAX_CONCURRENT_REQUESTS", "0"
+)
+
+try:
+    JIUTIAN_HOST_MAX_CONCURRENT_REQUESTS = int(JIUTIAN_HOST_MAX_CONCURRENT_REQUESTS)
+except ValueError:
+    JIUTIAN_HOST_MAX_CONCURRENT_REQUESTS = 0
+
+JIUTIAN_AGENT_MAX_CONCURRENT_REQUESTS = os.environ.get(
+    "JIUTIAN_AGENT_MAX_CONCURRENT_REQUESTS", "0"
+)
+
+try:
+    JIUTIAN_AGENT_MAX_CONCURRENT_REQUESTS = int(JIUTIAN_AGENT_MAX_CONCURRENT_REQUESTS)
+except ValueError:
+    JIUTIAN_AGENT_MAX_CONCURRENT_REQUESTS = 0
+
+# Exponential backoff (seconds) between retries of failed agent calls
+JIUTIAN_RETRY_BACKOFF_BASE = os.environ.get("JIUTIAN_RETRY_BACKOFF_BASE", "0.5")
+
+try:
+    JIUTIAN_RETRY_BACKOFF_BASE = float(JIUTIAN_RETRY_BACKOFF_BASE)
+except ValueError:
+    JIUTIAN_RETRY_BACKOFF_BASE = 0.5
+
+JIUTIAN_RETRY_BACKOFF_MAX = os.environ.get("JIUTIAN_RETRY_BACKOFF_MAX", "8")
+
+try:
+    JIUTIAN_RETRY_BACKOFF_MAX = float(JIUTIAN_RETRY_BACKOFF_MAX)
+except ValueError:
+    JIUTIAN_RETRY_BACKOFF_MAX = 8.0
+
+# Hedge delay (seconds) used until enough latency samples exist for a p95
+JIUTIAN_HEDGE_DEFAULT_DELAY = os.environ.get("JIUTIAN_HEDGE_DEFAULT_DELAY", "3")
+
+try:
+    JIUTIAN_HEDGE_DEFAULT_DELAY = float(JIUTIAN_HEDGE_DEFAULT_DELAY)
+except ValueError:
+    JIUTIAN_HEDGE_DEFAULT_DELAY = 3.0
+
+# Coalescing of streamed agent deltas sent over the websocket
+MULTI_AGENT_STREAM_FLUSH_INTERVAL = os.environ.get(
+    "MULTI_AGENT_STREAM_FLUSH_INTERVAL", "0.05"
+)
+
+try:
+    MULTI_AGENT_STREAM_FLUSH_INTERVAL = float(MULTI_AGENT_STREAM_FLUSH_INTERVAL)
+except ValueError:
+    MULTI_AGENT_STREAM_FLUSH_INTERVAL = 0.05
+
+MULTI_AGENT_STREAM_MAX_BUFFER_SIZE = os.environ.get(
+    "MULTI_AGENT_STREAM_MAX_BUFFER_SIZE", "512"
+)
+
+try:
+    MULTI_AGENT_STREAM_MAX_BUFFER_SIZE = int(MULTI_AGENT_STREAM_MAX_BUFFER_SIZE)
+except ValueError:
+    MULTI_AGENT_STREAM_MAX_BUFFER_SIZE = 512
+
+# Seconds between frames that carry the full accumulated response
+MULTI_AGENT_STREAM_CHECKPOINT_INTERVAL = os.environ.get(
+    "MULTI_AGENT_STREAM_CHECKPOINT_INTERVAL", "5"
+)
+
+try:
+    MULTI_AGENT_STREAM_CHECKPOINT_INTERVAL = float(
+        MULTI_AGENT_STREAM_CHECKPOINT_INTERVAL
+    )
+except ValueError:
+    MULTI_AGENT_STREAM_CHECKPOINT_INTERVAL = 5.0
+
+# Seconds of inactivity after which a multi-agent conversation expires
+MULTI_AGENT_CONVERSATION_TTL = os.environ.get("MULTI_AGENT_CONVERSATION_TTL", "3600")
+
+try:
+    MULTI_AGENT_CONVERSATION_TTL = int(MULTI_AGENT_CONVERSATION_TTL)
+except ValueError:
+    MULTI_AGENT_CONVERSATION_TTL = 3600
+
+# Server-side history window sent to each agent (turns and estimated tokens)
+MULTI_AGENT_HISTORY_MAX_TURNS = os.environ.get("MULTI_AGENT_HISTORY_MAX_TURNS", "10")
+
+try:
+    MULTI_AGENT_HISTORY_MAX_TURNS = int(MULTI_AGENT_HISTORY_MAX_TURNS)
+except ValueError:
+    MULTI_AGENT_HISTORY_MAX_TURNS = 10
+
+MULTI_AGENT_HISTORY_MAX_TOKENS = os.environ.get(
+    "MULTI_AGENT_HISTORY_MAX_TOKENS", "4096"
+)
+
+try:
+    MULTI_AGENT_HISTORY_MAX_TOKENS = int(MULTI_AGENT_HISTORY_MAX_TOKENS)
+except ValueError:
+    MULTI_AGENT_HISTORY_MAX_TOKENS = 4096
+
 
 ####################################
 # SENTENCE TRANSFORMERS
@@ -59,6 +59,9 @@ from starsessions.stores.redis import RedisStore
 from open_webui.utils import logger
 from open_webui.utils.audit import AuditLevel, AuditLoggingMiddleware
 from open_webui.utils.logger import start_logger
+from open_webui.utils.jiutian_client import jiutian_sessions
+from open_webui.utils.chat_message_buffer import chat_message_buffer
+from open_webui.utils.webhook import webhook_dispatcher
 from open_webui.socket.main import (
     app as socket_app,
     periodic_usage_pool_cleanup,
@@ -100,10 +103,12 @@ from open_webui.routers.retrieval import (
     get_ef,
     get_rf,
 )
+from open_webui.retrieval.embedding_cache import EmbeddingCache
 
 from open_webui.internal.db import Session, engine
 
 from open_webui.models.functions import Functions
+from open_webui.models.groups import Groups
 from open_webui.models.models import Models
 from open_webui.models.users import UserModel, Users
 from open_webui.models.chats import Chats
@@ -212,6 +217,9 @@ from open_webui.config import (
     RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
     RAG_EMBEDDING_ENGINE,
     RAG_EMBEDDING_BATCH_SIZE,
+    RAG_EMBEDDING_CACHE_SIZE,
+    RAG_EMBEDDING_CACHE_TTL,
+    RAG_EMBEDDING_CACHE_REDIS,
     RAG_TOP_K,
     RAG_TOP_K_RERANKER,
     RAG_RELEVANCE_THRESHOLD,
@@ -441,6 +449,7 @@ from open_webui.env import (
     SCIM_TOKEN,
     ENABLE_COMPRESSION_MIDDLEWARE,
     ENABLE_WEBSOCKET_SUPPORT,
+    ENABLE_WEBHOOK_REDIS_QUEUE,
     BYPASS_MODEL_ACCESS_CONTROL,
     RESET_CONFIG_ON_START,
     ENABLE_VERSION_UPDATE_CHECK,
@@ -567,6 +576,12 @@ async def lifespan(app: FastAPI):
             redis_task_command_listener(app)
         )
 
+    if ENABLE_WEBHOOK_REDIS_QUEUE and app.state.redis is None:
+        log.warning("ENABLE_WEBHOOK_REDIS_QUEUE requires REDIS_URL, queueing in memory")
+    await webhook_dispatcher.start(
+        redis=app.state.redis if ENABLE_WEBHOOK_REDIS_QUEUE else None
+    )
+
     if THREAD_POOL_SIZE and THREAD_POOL_SIZE > 0:
         limiter = anyio.to_thread.current_default_thread_limiter()
         limiter.total_tokens = THREAD_POOL_SIZE
@@ -599,6 +614,14 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    await app.state.jiutian_sessions.close()
+
+    # Deliver webhooks still queued in memory
+    await webhook_dispatcher.stop()
+
+    # Write message updates still buffered from interrupted responses
+    await chat_message_buffer.flush_all()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -624,6 +647,7 @@ app.state.config = AppConfig(
     redis_key_prefix=REDIS_KEY_PREFIX,
 )
 app.state.redis = None
+app.state.jiutian_sessions = jiutian_sessions
 
 app.state.WEBUI_NAME = WEBUI_NAME
 app.state.LICENSE_METADATA = None
@@ -942,6 +966,26 @@ app.state.config.FIRECRAWL_API_KEY = FIRECRAWL_API_KEY
 app.state.config.TAVILY_EXTRACT_DEPTH = TAVILY_EXTRACT_DEPTH
 
 app.state.EMBEDDING_FUNCTION = None
+app.state.EMBEDDING_CACHE = (
+    EmbeddingCache(
+        max_size=RAG_EMBEDDING_CACHE_SIZE,
+        ttl=RAG_EMBEDDING_CACHE_TTL,
+        redis=(
+            get_redis_connection(
+                redis_url=REDIS_URL,
+                redis_sentinels=get_sentinels_from_env(
+                    REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                ),
+                redis_cluster=REDIS_CLUSTER,
+            )
+            if RAG_EMBEDDING_CACHE_REDIS and REDIS_URL
+            else None
+        ),
+        redis_key_prefix=REDIS_KEY_PREFIX,
+    )
+    if RAG_EMBEDDING_CACHE_SIZE > 0
+    else None
+)
 app.state.RERANKING_FUNCTION = None
 app.state.ef = None
 app.state.rf = None
@@ -1001,6 +1045,7 @@ app.state.EMBEDDING_FUNCTION = get_embedding_function(
         if app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
         else None
     ),
+    cache=app.state.EMBEDDING_CACHE,
 )
 
 app.state.RERANKING_FUNCTION = get_reranking_function(
@@ -1199,6 +1244,13 @@ async def commit_session_after_request(request: Request, call_next):
     return response
 
 
+@app.middleware("http")
+async def group_request_cache(request: Request, call_next):
+    # Resolve each user's groups and permissions once per request
+    with Groups.request_cache():
+        return await call_next(request)
+
+
 @app.middleware("http")
 async def check_url(request: Request, call_next):
     start_time = int(time.time())
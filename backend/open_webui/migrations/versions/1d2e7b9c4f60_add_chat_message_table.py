@@ -0,0 +1,35 @@
+"""Add chat_message table
+
+Revision ID: 1d2e7b9c4f60
+Revises: a3c1ba6fd0d4
+Create Date: 2025-10-03 09:41:07.518862
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1d2e7b9c4f60"
+down_revision: Union[str, None] = "a3c1ba6fd0d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create chat_message table for per-message updates pending a chat save
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.String(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("message", sa.JSON(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("chat_message")
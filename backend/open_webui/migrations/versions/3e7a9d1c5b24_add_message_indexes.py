@@ -0,0 +1,42 @@
+"""Add message indexes
+
+Revision ID: 3e7a9d1c5b24
+Revises: 8c4f1a2b9d37
+Create Date: 2025-10-10 09:41:17.502836
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3e7a9d1c5b24"
+down_revision: Union[str, None] = "8c4f1a2b9d37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Channel and thread pages, ordered by created_at
+    op.create_index(
+        "idx_message_channel_parent_created",
+        "message",
+        ["channel_id", "parent_id", "created_at"],
+    )
+    # Reply counts and latest reply times
+    op.create_index(
+        "idx_message_parent_created", "message", ["parent_id", "created_at"]
+    )
+    # Reactions of a page of messages
+    op.create_index(
+        "idx_message_reaction_message_id", "message_reaction", ["message_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_message_reaction_message_id", table_name="message_reaction")
+    op.drop_index("idx_message_parent_created", table_name="message")
+    op.drop_index("idx_message_channel_parent_created", table_name="message")
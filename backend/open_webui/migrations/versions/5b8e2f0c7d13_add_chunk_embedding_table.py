@@ -0,0 +1,36 @@
+"""Add chunk_embedding table
+
+Revision ID: 5b8e2f0c7d13
+Revises: 1d2e7b9c4f60
+Create Date: 2025-10-06 14:22:51.306729
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8e2f0c7d13"
+down_revision: Union[str, None] = "1d2e7b9c4f60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create chunk_embedding table so identical chunks are embedded once
+    op.create_table(
+        "chunk_embedding",
+        sa.Column("engine", sa.Text(), nullable=False),
+        sa.Column("model", sa.Text(), nullable=False),
+        sa.Column("hash", sa.Text(), nullable=False),
+        sa.Column("vector", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("engine", "model", "hash"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("chunk_embedding")
@@ -0,0 +1,28 @@
+"""Add chunk_embedding created_at index
+
+Revision ID: 6f1c3d8a2e95
+Revises: 3e7a9d1c5b24
+Create Date: 2025-10-13 11:05:42.918364
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6f1c3d8a2e95"
+down_revision: Union[str, None] = "3e7a9d1c5b24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Pruning drops the oldest stored embeddings first
+    op.create_index("idx_chunk_embedding_created_at", "chunk_embedding", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_chunk_embedding_created_at", table_name="chunk_embedding")
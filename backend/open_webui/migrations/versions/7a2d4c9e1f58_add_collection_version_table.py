@@ -0,0 +1,33 @@
+"""Add collection_version table
+
+Revision ID: 7a2d4c9e1f58
+Revises: 6f1c3d8a2e95
+Create Date: 2025-10-17 10:12:34.561204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7a2d4c9e1f58"
+down_revision: Union[str, None] = "6f1c3d8a2e95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create collection_version table so BM25 indexes can tell they are stale
+    op.create_table(
+        "collection_version",
+        sa.Column("collection_name", sa.Text(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("collection_name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("collection_version")
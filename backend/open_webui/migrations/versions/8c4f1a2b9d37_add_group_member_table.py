@@ -0,0 +1,63 @@
+"""Add group_member table
+
+Revision ID: 8c4f1a2b9d37
+Revises: 5b8e2f0c7d13
+Create Date: 2025-10-08 11:05:38.914260
+
+"""
+
+import json
+import time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4f1a2b9d37"
+down_revision: Union[str, None] = "5b8e2f0c7d13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create group_member table so memberships are looked up by user id
+    group_member = op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("group_id", "user_id"),
+    )
+    op.create_index("idx_group_member_user_id", "group_member", ["user_id"])
+
+    # Copy the memberships stored in group.user_ids
+    group = table(
+        "group",
+        column("id", sa.Text()),
+        column("user_ids", sa.JSON()),
+    )
+
+    conn = op.get_bind()
+    now = int(time.time())
+    rows = []
+    for group_id, user_ids in conn.execute(sa.select(group.c.id, group.c.user_ids)):
+        if isinstance(user_ids, str):
+            user_ids = json.loads(user_ids)
+        if not isinstance(user_ids, list):
+            continue
+
+        rows.extend(
+            {"group_id": group_id, "user_id": user_id, "created_at": now}
+            for user_id in dict.fromkeys(user_ids)
+        )
+
+    if rows:
+        op.bulk_insert(group_member, rows)
+
+
+def downgrade() -> None:
+    op.drop_index("idx_group_member_user_id", table_name="group_member")
+    op.drop_table("group_member")
@@ -0,0 +1,48 @@
+"""Add url to the chunk_embedding key
+
+Revision ID: 9e3b5a7c1d24
+Revises: 7a2d4c9e1f58
+Create Date: 2025-10-18 09:41:07.218334
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9e3b5a7c1d24"
+down_revision: Union[str, None] = "7a2d4c9e1f58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_chunk_embedding_table(*key_columns: sa.Column) -> None:
+    op.create_table(
+        "chunk_embedding",
+        sa.Column("engine", sa.Text(), nullable=False),
+        sa.Column("model", sa.Text(), nullable=False),
+        *key_columns,
+        sa.Column("hash", sa.Text(), nullable=False),
+        sa.Column("vector", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "engine", "model", *(column.name for column in key_columns), "hash"
+        ),
+    )
+    op.create_index("idx_chunk_embedding_created_at", "chunk_embedding", ["created_at"])
+
+
+def upgrade() -> None:
+    # Stored embeddings cannot be attributed to an endpoint, so they are
+    # dropped; chunks are embedded again the next time they are saved
+    op.drop_index("idx_chunk_embedding_created_at", table_name="chunk_embedding")
+    op.drop_table("chunk_embedding")
+    create_chunk_embedding_table(sa.Column("url", sa.Text(), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_index("idx_chunk_embedding_created_at", table_name="chunk_embedding")
+    op.drop_table("chunk_embedding")
+    create_chunk_embedding_table()
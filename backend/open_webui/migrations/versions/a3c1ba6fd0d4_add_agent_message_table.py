@@ -0,0 +1,47 @@
+"""Add agent_message table
+
+Revision ID: a3c1ba6fd0d4
+Revises: a5c220713937
+Create Date: 2025-10-02 10:12:41.203114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c1ba6fd0d4"
+down_revision: Union[str, None] = "a5c220713937"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create agent_message table for multi-agent conversation history
+    op.create_table(
+        "agent_message",
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("conv_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("agent_uid", sa.Text(), nullable=False),
+        sa.Column("prompt", sa.Text(), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("usage", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # History is always read per conversation and agent, newest first
+    op.create_index(
+        "idx_agent_message_conv_agent",
+        "agent_message",
+        ["conv_id", "agent_uid", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_agent_message_conv_agent", table_name="agent_message")
+    op.drop_table("agent_message")
@@ -0,0 +1,177 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Text, JSON, Index, func
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# AgentMessage DB Schema
+####################
+
+
+class AgentMessage(Base):
+    """One completed agent answer in a multi-agent conversation (append-only)"""
+
+    __tablename__ = "agent_message"
+
+    id = Column(Text, primary_key=True)
+    conv_id = Column(Text, nullable=False)
+    user_id = Column(Text, nullable=False)
+    agent_uid = Column(Text, nullable=False)
+
+    prompt = Column(Text, nullable=False)
+    response = Column(Text, nullable=False)
+    usage = Column(JSON, nullable=True)
+
+    created_at = Column(BigInteger, nullable=False)  # time_ns
+
+    __table_args__ = (
+        Index("idx_agent_message_conv_agent", "conv_id", "agent_uid", "created_at"),
+    )
+
+
+class AgentMessageModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    conv_id: str
+    user_id: str
+    agent_uid: str
+
+    prompt: str
+    response: str
+    usage: Optional[dict] = None
+
+    created_at: int  # timestamp in epoch (ns)
+
+
+####################
+# Table Operations
+####################
+
+
+class AgentMessageTable:
+    def insert_new_message(
+        self,
+        conv_id: str,
+        user_id: str,
+        agent_uid: str,
+        prompt: str,
+        response: str,
+        usage: Optional[dict] = None,
+    ) -> Optional[AgentMessageModel]:
+        """Append a completed agent answer to a conversation"""
+        try:
+            with get_db() as db:
+                message = AgentMessageModel(
+                    id=str(uuid.uuid4()),
+                    conv_id=conv_id,
+                    user_id=user_id,
+                    agent_uid=agent_uid,
+                    prompt=prompt,
+                    response=response,
+                    usage=usage,
+                    created_at=time.time_ns(),
+                )
+
+                result = AgentMessage(**message.model_dump())
+                db.add(result)
+                db.commit()
+                return message
+        except Exception as e:
+            log.error(f"Error inserting agent message: {e}")
+            return None
+
+    def get_recent_messages_by_agent_uids(
+        self, conv_id: str, user_id: str, agent_uids: list[str], limit: int
+    ) -> dict[str, list[AgentMessageModel]]:
+        """
+        Get the most recent messages of each agent in a conversation
+
+        Args:
+            conv_id: Conversation ID
+            user_id: Owner of the conversation
+            agent_uids: Agents to load history for
+            limit: Maximum number of messages per agent
+
+        Returns:
+            Mapping of agent UID to its messages, oldest first
+        """
+        history: dict[str, list[AgentMessageModel]] = {
+            agent_uid: [] for agent_uid in agent_uids
+        }
+        if not agent_uids or limit <= 0:
+            return history
+
+        try:
+            with get_db() as db:
+                # Rank each agent's messages newest-first in a single query
+                rank = (
+                    func.row_number()
+                    .over(
+                        partition_by=AgentMessage.agent_uid,
+                        order_by=AgentMessage.created_at.desc(),
+                    )
+                    .label("rank")
+                )
+                ranked = (
+                    db.query(AgentMessage.id.label("id"), rank)
+                    .filter(
+                        AgentMessage.conv_id == conv_id,
+                        AgentMessage.user_id == user_id,
+                        AgentMessage.agent_uid.in_(agent_uids),
+                    )
+                    .subquery()
+                )
+
+                messages = (
+                    db.query(AgentMessage)
+                    .join(ranked, AgentMessage.id == ranked.c.id)
+                    .filter(ranked.c.rank <= limit)
+                    .order_by(AgentMessage.created_at.asc())
+                    .all()
+                )
+
+                for message in messages:
+                    history[message.agent_uid].append(
+                        AgentMessageModel.model_validate(message)
+                    )
+        except Exception as e:
+            log.error(f"Error loading agent messages for {conv_id}: {e}")
+
+        return history
+
+    def get_messages_by_conv_id(
+        self, conv_id: str, user_id: str
+    ) -> list[AgentMessageModel]:
+        with get_db() as db:
+            return [
+                AgentMessageModel.model_validate(message)
+                for message in db.query(AgentMessage)
+                .filter_by(conv_id=conv_id, user_id=user_id)
+                .order_by(AgentMessage.created_at.asc())
+                .all()
+            ]
+
+    def delete_messages_by_conv_id(self, conv_id: str, user_id: str) -> bool:
+        try:
+            with get_db() as db:
+                db.query(AgentMessage).filter_by(
+                    conv_id=conv_id, user_id=user_id
+                ).delete()
+                db.commit()
+                return True
+        except Exception:
+            return False
+
+
+# Global instance
+AgentMessages = AgentMessageTable()
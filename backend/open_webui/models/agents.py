@@ -48,7 +48,11 @@ class AgentConfig(BaseModel):
     }
     klAssistId: Optional[str] = None
     timeout: Optional[int] = 30  # seconds
-    max_retries: Optional[int] = 1
+    max_retries: Optional[int] = 1  # retries before the first token arrives
+    hedge_requests: Optional[bool] = False  # send a second request when the first is slow
+    hedge_delay: Optional[float] = None  # seconds, defaults to the observed p95 latency
+    max_concurrency: Optional[int] = None  # in-flight calls to this agent
+    host_max_concurrency: Optional[int] = None  # in-flight calls to this api_host
     
     model_config = ConfigDict(extra="allow")
 
@@ -267,8 +271,10 @@ class AgentsTable:
                     update_data["name"] = form_data.name
                 if form_data.api_host is not None:
                     update_data["api_host"] = form_data.api_host
-                if form_data.api_key_env is not None:
-                    update_data["api_key_env"] = form_data.api_key_env
+                if form_data.api_key is not None:
+                    if not validate_api_key_format(form_data.api_key):
+                        raise ValueError("Invalid API key format. Expected: id.secret")
+                    update_data["api_key"] = encrypt_api_key(form_data.api_key)
                 if form_data.config is not None:
                     update_data["config"] = form_data.config.model_dump()
                 if form_data.enabled is not None:
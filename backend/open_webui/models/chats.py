@@ -12,6 +12,8 @@ from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, Index
 from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.sql import exists
 from sqlalchemy.sql.expression import bindparam
 
@@ -56,6 +58,25 @@ class Chat(Base):
     )
 
 
+class ChatMessage(Base):
+    """
+    Latest state of a chat message written since the chat JSON was last saved.
+
+    Streaming updates are written here instead of rewriting the whole
+    ``chat.chat`` document, and merged back into ``history.messages`` on read.
+    Rows are dropped whenever the full chat is saved, and compacted into the
+    document once a response is done.
+    """
+
+    __tablename__ = "chat_message"
+
+    chat_id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)
+    message = Column(JSON)
+
+    updated_at = Column(BigInteger)  # time_ns of the last upsert, 0 if none
+
+
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -192,6 +213,9 @@ class ChatTable:
                 chat_item.chat = chat
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
+
+                # The saved document supersedes any pending message updates
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.commit()
                 db.refresh(chat_item)
 
@@ -199,6 +223,60 @@ class ChatTable:
         except Exception:
             return None
 
+    def _get_stored_message(self, db, id: str, message_id: str) -> Optional[dict]:
+        # Extract a single message from the chat JSON without loading the document
+        result = (
+            db.query(Chat.chat[("history", "messages", message_id)])
+            .filter(Chat.id == id)
+            .first()
+        )
+        if result is None:
+            return None
+        return result[0] or {}
+
+    def _merge_pending_messages(
+        self, chat: Chat, pending: list[ChatMessage]
+    ) -> ChatModel:
+        chat_model = ChatModel.model_validate(chat)
+        if not pending:
+            return chat_model
+
+        chat_dict = {**chat_model.chat}
+        history = {**chat_dict.get("history", {})}
+        messages = dict(history.get("messages") or {})
+
+        current_id = None
+        for row in sorted(pending, key=lambda row: row.updated_at or 0):
+            messages[row.id] = row.message
+            if row.updated_at:
+                current_id = row.id
+
+        history["messages"] = messages
+        if current_id:
+            history["currentId"] = current_id
+        chat_dict["history"] = history
+
+        return chat_model.model_copy(update={"chat": chat_dict})
+
+    def _to_chat_model(self, db, chat: Chat) -> ChatModel:
+        pending = db.query(ChatMessage).filter_by(chat_id=chat.id).all()
+        return self._merge_pending_messages(chat, pending)
+
+    def _to_chat_models(self, db, chats: list[Chat]) -> list[ChatModel]:
+        if not chats:
+            return []
+
+        pending = {}
+        for row in db.query(ChatMessage).filter(
+            ChatMessage.chat_id.in_([chat.id for chat in chats])
+        ):
+            pending.setdefault(row.chat_id, []).append(row)
+
+        return [
+            self._merge_pending_messages(chat, pending.get(chat.id, []))
+            for chat in chats
+        ]
+
     def update_chat_title_by_id(self, id: str, title: str) -> Optional[ChatModel]:
         chat = self.get_chat_by_id(id)
         if chat is None:
@@ -230,11 +308,12 @@ class ChatTable:
         return self.get_chat_by_id(id)
 
     def get_chat_title_by_id(self, id: str) -> Optional[str]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat = db.query(Chat.title).filter_by(id=id).first()
+            if chat is None:
+                return None
 
-        return chat.chat.get("title", "New Chat")
+            return chat.title or "New Chat"
 
     def get_messages_map_by_chat_id(self, id: str) -> Optional[dict]:
         chat = self.get_chat_by_id(id)
@@ -246,57 +325,124 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            pending = db.get(ChatMessage, (id, message_id))
+            if pending is not None:
+                return pending.message
 
-        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+            return self._get_stored_message(db, id, message_id)
 
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+    ) -> Optional[dict]:
+        """
+        Merge fields into a single message and make it the current message.
 
+        Only the message row is written, so the cost does not grow with the
+        size of the chat.
+
+        Returns:
+            The updated message, or None if the chat does not exist
+        """
         # Sanitize message content for null characters before upserting
         if isinstance(message.get("content"), str):
             message["content"] = message["content"].replace("\x00", "")
 
-        chat = chat.chat
-        history = chat.get("history", {})
+        try:
+            with get_db() as db:
+                # Bump the chat without loading its JSON; also checks it exists
+                if (
+                    not db.query(Chat)
+                    .filter_by(id=id)
+                    .update({"updated_at": int(time.time())}, synchronize_session=False)
+                ):
+                    return None
 
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+                for _ in range(2):
+                    pending = db.get(ChatMessage, (id, message_id))
+                    if pending is None:
+                        stored = self._get_stored_message(db, id, message_id) or {}
+                        pending = ChatMessage(
+                            chat_id=id, id=message_id, message={**stored, **message}
+                        )
+                        db.add(pending)
+                    else:
+                        pending.message = {**pending.message, **message}
+                    pending.updated_at = time.time_ns()
+
+                    try:
+                        db.commit()
+                        return pending.message
+                    except (IntegrityError, StaleDataError):
+                        # Created or compacted concurrently, merge again
+                        db.rollback()
+                        db.query(Chat).filter_by(id=id).update(
+                            {"updated_at": int(time.time())},
+                            synchronize_session=False,
+                        )
+                return None
+        except Exception as e:
+            log.exception(f"Error upserting message {message_id} to chat {id}: {e}")
+            return None
 
-        history["currentId"] = message_id
+    def compact_messages_by_chat_id(self, id: str) -> bool:
+        """
+        Write the pending message updates of a chat into its document.
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        Queries on the chat JSON, like search, only see a message once it is
+        compacted, so this runs when a response is done. A message updated
+        again (upserted) in the meantime stays pending.
+        """
+        try:
+            with get_db() as db:
+                chat = db.get(Chat, id)
+                pending = db.query(ChatMessage).filter_by(chat_id=id).all()
+                if chat is None or not pending:
+                    return chat is not None
+
+                chat.chat = self._merge_pending_messages(chat, pending).chat
+                for row in pending:
+                    db.query(ChatMessage).filter_by(
+                        chat_id=id, id=row.id, updated_at=row.updated_at
+                    ).delete(synchronize_session=False)
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"Error compacting messages of chat {id}: {e}")
+            return False
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+    ) -> Optional[dict]:
+        try:
+            with get_db() as db:
+                pending = db.get(ChatMessage, (id, message_id))
+                if pending is None:
+                    stored = self._get_stored_message(db, id, message_id)
+                    if not stored:
+                        return None
+
+                    pending = ChatMessage(
+                        chat_id=id, id=message_id, message=stored, updated_at=0
+                    )
+                    db.add(pending)
+
+                pending.message = {
+                    **pending.message,
+                    "statusHistory": [
+                        *pending.message.get("statusHistory", []),
+                        status,
+                    ],
+                }
+                db.query(Chat).filter_by(id=id).update(
+                    {"updated_at": int(time.time())}, synchronize_session=False
+                )
+                db.commit()
+                return pending.message
+        except Exception as e:
+            log.exception(f"Error adding status to message {message_id}: {e}")
             return None
 
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
-
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
-
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
             # Get the existing chat to share
@@ -310,7 +456,7 @@ class ChatTable:
                     "id": str(uuid.uuid4()),
                     "user_id": f"shared-{chat_id}",
                     "title": chat.title,
-                    "chat": chat.chat,
+                    "chat": self._to_chat_model(db, chat).chat,
                     "meta": chat.meta,
                     "pinned": chat.pinned,
                     "folder_id": chat.folder_id,
@@ -344,7 +490,7 @@ class ChatTable:
                     return self.insert_shared_chat_by_chat_id(chat_id)
 
                 shared_chat.title = chat.title
-                shared_chat.chat = chat.chat
+                shared_chat.chat = self._to_chat_model(db, chat).chat
                 shared_chat.meta = chat.meta
                 shared_chat.pinned = chat.pinned
                 shared_chat.folder_id = chat.folder_id
@@ -384,7 +530,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -396,7 +542,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -408,7 +554,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -456,7 +602,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_list_by_user_id(
         self,
@@ -495,7 +641,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -551,13 +697,13 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -579,7 +725,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -590,7 +736,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats.all())
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -599,7 +745,7 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats.all())
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -608,7 +754,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats.all())
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -617,7 +763,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats.all())
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -816,7 +962,7 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str, skip: int = 0, limit: int = 60
@@ -834,7 +980,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -849,7 +995,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -862,7 +1008,7 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -901,7 +1047,7 @@ class ChatTable:
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -922,7 +1068,7 @@ class ChatTable:
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -1008,6 +1154,7 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
@@ -1018,7 +1165,8 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if db.query(Chat).filter_by(id=id, user_id=user_id).delete():
+                    db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -1030,6 +1178,11 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id == user_id)
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -1042,6 +1195,13 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
@@ -0,0 +1,240 @@
+import hashlib
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from sqlalchemy import BigInteger, Column, Index, LargeBinary, Text, or_
+from sqlalchemy.exc import IntegrityError
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+# Rows looked up per IN (...) query
+LOOKUP_BATCH_SIZE = 500
+
+# Seconds between prunes of the table by one process
+PRUNE_INTERVAL = 60 * 60
+
+####################
+# ChunkEmbedding DB Schema
+####################
+
+
+class ChunkEmbedding(Base):
+    """Embedding of a chunk of text, addressed by the hash of its content"""
+
+    __tablename__ = "chunk_embedding"
+
+    engine = Column(Text, primary_key=True)
+    model = Column(Text, primary_key=True)
+    # Endpoint serving the model, the same model name may be another model elsewhere
+    url = Column(Text, primary_key=True)
+    hash = Column(Text, primary_key=True)  # sha256 of the embedded text
+
+    vector = Column(LargeBinary, nullable=False)  # float32 array
+    created_at = Column(BigInteger, nullable=False)
+
+    __table_args__ = (Index("idx_chunk_embedding_created_at", "created_at"),)
+
+
+####################
+# Table Operations
+####################
+
+
+class ChunkEmbeddingTable:
+    def __init__(self):
+        # time.monotonic() of this process's last prune
+        self._pruned_at: Optional[float] = None
+
+    @staticmethod
+    def hash_text(text: str, prefix: Optional[str] = None) -> str:
+        """Content address of a chunk as it is sent to the embedding backend"""
+        return hashlib.sha256(f"{prefix or ''}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_embeddings(
+        self, engine: str, model: str, url: str, hashes: list[str]
+    ) -> dict[str, list[float]]:
+        """
+        Get the stored embeddings of chunks
+
+        Args:
+            engine: Embedding engine
+            model: Embedding model
+            url: Embedding endpoint, "" for local models
+            hashes: Chunk hashes (see hash_text)
+
+        Returns:
+            Mapping of the hashes that were found to their embeddings
+        """
+        embeddings = {}
+        hashes = list(dict.fromkeys(hashes))
+
+        try:
+            with get_db() as db:
+                for i in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+                    rows = (
+                        db.query(ChunkEmbedding.hash, ChunkEmbedding.vector)
+                        .filter(
+                            ChunkEmbedding.engine == engine,
+                            ChunkEmbedding.model == model,
+                            ChunkEmbedding.url == url,
+                            ChunkEmbedding.hash.in_(hashes[i : i + LOOKUP_BATCH_SIZE]),
+                        )
+                        .all()
+                    )
+                    for hash, vector in rows:
+                        embeddings[hash] = np.frombuffer(
+                            vector, dtype=np.float32
+                        ).tolist()
+        except Exception as e:
+            log.exception(f"Error loading chunk embeddings: {e}")
+
+        return embeddings
+
+    def insert_embeddings(
+        self, engine: str, model: str, url: str, embeddings: dict[str, list[float]]
+    ) -> bool:
+        """Store chunk embeddings by hash, keeping the ones already stored"""
+        if not embeddings:
+            return True
+
+        try:
+            with get_db() as db:
+                for _ in range(2):
+                    existing = set()
+                    hashes = list(embeddings)
+                    for i in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+                        existing.update(
+                            hash
+                            for (hash,) in db.query(ChunkEmbedding.hash).filter(
+                                ChunkEmbedding.engine == engine,
+                                ChunkEmbedding.model == model,
+                                ChunkEmbedding.url == url,
+                                ChunkEmbedding.hash.in_(
+                                    hashes[i : i + LOOKUP_BATCH_SIZE]
+                                ),
+                            )
+                        )
+
+                    now = time.time_ns()
+                    db.add_all(
+                        [
+                            ChunkEmbedding(
+                                engine=engine,
+                                model=model,
+                                url=url,
+                                hash=hash,
+                                vector=np.asarray(
+                                    embedding, dtype=np.float32
+                                ).tobytes(),
+                                created_at=now,
+                            )
+                            for hash, embedding in embeddings.items()
+                            if hash not in existing
+                        ]
+                    )
+
+                    try:
+                        db.commit()
+                        return True
+                    except IntegrityError:
+                        # Stored concurrently, skip those rows and retry
+                        db.rollback()
+                return False
+        except Exception as e:
+            log.exception(f"Error storing chunk embeddings: {e}")
+            return False
+
+    def prune(
+        self, engine: str, model: str, url: str, max_age: int, max_count: int
+    ) -> int:
+        """
+        Delete embeddings that are unlikely to be reused
+
+        Args:
+            engine: Embedding engine in use, other engines' embeddings are deleted
+            model: Embedding model in use, other models' embeddings are deleted
+            url: Embedding endpoint in use, other endpoints' embeddings are deleted
+            max_age: Delete embeddings stored more than this many seconds ago
+            max_count: Delete the oldest embeddings beyond this many
+
+        Returns:
+            Number of deleted embeddings
+        """
+        try:
+            with get_db() as db:
+                deleted = (
+                    db.query(ChunkEmbedding)
+                    .filter(
+                        or_(
+                            ChunkEmbedding.engine != engine,
+                            ChunkEmbedding.model != model,
+                            ChunkEmbedding.url != url,
+                        )
+                    )
+                    .delete(synchronize_session=False)
+                )
+
+                if max_age > 0:
+                    deleted += (
+                        db.query(ChunkEmbedding)
+                        .filter(
+                            ChunkEmbedding.created_at
+                            < time.time_ns() - max_age * 1_000_000_000
+                        )
+                        .delete(synchronize_session=False)
+                    )
+
+                if max_count > 0:
+                    # created_at of the newest embedding past the limit
+                    cutoff = (
+                        db.query(ChunkEmbedding.created_at)
+                        .order_by(ChunkEmbedding.created_at.desc())
+                        .offset(max_count)
+                        .limit(1)
+                        .scalar()
+                    )
+                    if cutoff is not None:
+                        deleted += (
+                            db.query(ChunkEmbedding)
+                            .filter(ChunkEmbedding.created_at <= cutoff)
+                            .delete(synchronize_session=False)
+                        )
+
+                db.commit()
+                return deleted
+        except Exception as e:
+            log.exception(f"Error pruning chunk embeddings: {e}")
+            return 0
+
+    def prune_if_due(
+        self, engine: str, model: str, url: str, max_age: int, max_count: int
+    ) -> None:
+        """Prune (see prune) at most once per PRUNE_INTERVAL in this process"""
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+
+        deleted = self.prune(engine, model, url, max_age, max_count)
+        if deleted:
+            log.info(f"Pruned {deleted} stored chunk embeddings")
+
+    def delete_all_embeddings(self) -> bool:
+        try:
+            with get_db() as db:
+                db.query(ChunkEmbedding).delete()
+                db.commit()
+                return True
+        except Exception:
+            return False
+
+
+# Global instance
+ChunkEmbeddings = ChunkEmbeddingTable()
@@ -0,0 +1,106 @@
+import logging
+import time
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from sqlalchemy import BigInteger, Column, Text
+from sqlalchemy.exc import IntegrityError
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# CollectionVersion DB Schema
+####################
+
+
+class CollectionVersion(Base):
+    """Write counter of a vector DB collection, compared by local copies of it"""
+
+    __tablename__ = "collection_version"
+
+    collection_name = Column(Text, primary_key=True)
+
+    version = Column(BigInteger, nullable=False)
+    updated_at = Column(BigInteger, nullable=False)
+
+
+####################
+# Table Operations
+####################
+
+
+class CollectionVersionTable:
+    def get_version(self, collection_name: str) -> int:
+        """Get the version of a collection, 0 if it was never written to"""
+        with get_db() as db:
+            version = (
+                db.query(CollectionVersion.version)
+                .filter(CollectionVersion.collection_name == collection_name)
+                .scalar()
+            )
+            return version or 0
+
+    def increment(self, collection_name: str) -> int:
+        """
+        Record a write to a collection
+
+        Returns:
+            The new version. The version before the write is one less, unless
+            another write was recorded concurrently.
+        """
+        with get_db() as db:
+            for _ in range(2):
+                now = int(time.time())
+                updated = (
+                    db.query(CollectionVersion)
+                    .filter(CollectionVersion.collection_name == collection_name)
+                    .update(
+                        {
+                            CollectionVersion.version: CollectionVersion.version + 1,
+                            CollectionVersion.updated_at: now,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                if not updated:
+                    db.add(
+                        CollectionVersion(
+                            collection_name=collection_name,
+                            version=1,
+                            updated_at=now,
+                        )
+                    )
+
+                try:
+                    # Read before committing, the row is locked by the update
+                    db.flush()
+                    version = (
+                        db.query(CollectionVersion.version)
+                        .filter(CollectionVersion.collection_name == collection_name)
+                        .scalar()
+                    )
+                    db.commit()
+                    return version
+                except IntegrityError:
+                    # Inserted concurrently, update it instead
+                    db.rollback()
+
+            raise RuntimeError(f"Could not update the version of {collection_name}")
+
+    def increment_all(self) -> None:
+        """Record a write to every collection, e.g. after a reset"""
+        with get_db() as db:
+            db.query(CollectionVersion).update(
+                {
+                    CollectionVersion.version: CollectionVersion.version + 1,
+                    CollectionVersion.updated_at: int(time.time()),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+
+
+# Global instance
+CollectionVersions = CollectionVersionTable()
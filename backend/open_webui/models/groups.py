@@ -1,22 +1,30 @@
 import json
 import logging
+import threading
 import time
-from typing import Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
 import uuid
 
 from open_webui.internal.db import Base, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import GROUP_MEMBERSHIP_CACHE_TTL, SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import BigInteger, Column, Index, Text, JSON
 
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
+# Memberships resolved during the current request, see GroupTable.request_cache
+_request_cache: ContextVar[Optional[dict]] = ContextVar(
+    "group_request_cache", default=None
+)
+
 ####################
 # UserGroup DB Schema
 ####################
@@ -41,6 +49,19 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    """Membership of a user in a group, indexed mirror of Group.user_ids"""
+
+    __tablename__ = "group_member"
+
+    group_id = Column(Text, primary_key=True)
+    user_id = Column(Text, primary_key=True)
+
+    created_at = Column(BigInteger)
+
+    __table_args__ = (Index("idx_group_member_user_id", "user_id"),)
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -92,6 +113,111 @@ class GroupUpdateForm(GroupForm, UserIdsForm):
 
 
 class GroupTable:
+    def __init__(self):
+        # Key: user id, Value: (expires_at, group ids, group permissions)
+        self._membership_cache: dict[str, tuple[float, frozenset, tuple]] = {}
+        self._membership_lock = threading.Lock()
+
+    @contextmanager
+    def request_cache(self):
+        """
+        Memoize membership lookups made inside the block, typically one request
+
+        Lookups are shared with the threads the block hands work to. Membership
+        changes made through this instance are visible immediately.
+        """
+        token = _request_cache.set({})
+        try:
+            yield
+        finally:
+            _request_cache.reset(token)
+
+    def get_request_cached(self, user_id: str, key: str, load: Callable[[], Any]):
+        """
+        Get a value derived from a user's memberships, memoized for the request
+
+        Outside of request_cache() the value is loaded on every call.
+        """
+        cache = _request_cache.get()
+        if cache is None:
+            return load()
+
+        user_cache = cache.setdefault(user_id, {})
+        if key not in user_cache:
+            user_cache[key] = load()
+        return user_cache[key]
+
+    def _get_membership(self, user_id: str) -> tuple[frozenset, tuple]:
+        now = time.monotonic()
+        with self._membership_lock:
+            cached = self._membership_cache.get(user_id)
+        if cached is not None and cached[0] > now:
+            return cached[1], cached[2]
+
+        with get_db() as db:
+            rows = (
+                db.query(Group.id, Group.permissions)
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
+                .all()
+            )
+        group_ids = frozenset(group_id for group_id, _ in rows)
+        permissions = tuple(permissions or {} for _, permissions in rows)
+
+        if GROUP_MEMBERSHIP_CACHE_TTL > 0:
+            with self._membership_lock:
+                self._membership_cache[user_id] = (
+                    now + GROUP_MEMBERSHIP_CACHE_TTL,
+                    group_ids,
+                    permissions,
+                )
+        return group_ids, permissions
+
+    def _set_group_members(
+        self, db, group_id: str, user_ids: Optional[list[str]]
+    ) -> set[str]:
+        """Mirror a group's user_ids into group_member, returns the users whose membership changed"""
+        user_ids = set(user_ids or [])
+        existing = {
+            user_id
+            for (user_id,) in db.query(GroupMember.user_id).filter_by(group_id=group_id)
+        }
+
+        removed = existing - user_ids
+        if removed:
+            db.query(GroupMember).filter(
+                GroupMember.group_id == group_id, GroupMember.user_id.in_(removed)
+            ).delete(synchronize_session=False)
+
+        added = user_ids - existing
+        if added:
+            now = int(time.time())
+            db.add_all(
+                [
+                    GroupMember(group_id=group_id, user_id=user_id, created_at=now)
+                    for user_id in added
+                ]
+            )
+
+        return removed | added
+
+    def _invalidate_memberships(self, user_ids: Optional[set[str]] = None) -> None:
+        """Forget cached memberships of some users, or of everyone"""
+        with self._membership_lock:
+            if user_ids is None:
+                self._membership_cache.clear()
+            else:
+                for user_id in user_ids:
+                    self._membership_cache.pop(user_id, None)
+
+        cache = _request_cache.get()
+        if cache is not None:
+            if user_ids is None:
+                cache.clear()
+            else:
+                for user_id in user_ids:
+                    cache.pop(user_id, None)
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -109,7 +235,9 @@ class GroupTable:
             try:
                 result = Group(**group.model_dump())
                 db.add(result)
+                changed = self._set_group_members(db, result.id, result.user_ids)
                 db.commit()
+                self._invalidate_memberships(changed)
                 db.refresh(result)
                 if result:
                     return GroupModel.model_validate(result)
@@ -131,16 +259,35 @@ class GroupTable:
             return [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
                 .order_by(Group.updated_at.desc())
                 .all()
             ]
 
+    def get_group_ids_by_member_id(self, user_id: str) -> set[str]:
+        """
+        Get the ids of the groups a user is a member of
+
+        Cached for GROUP_MEMBERSHIP_CACHE_TTL seconds, membership changes made
+        through this instance are visible immediately.
+        """
+        group_ids = self.get_request_cached(
+            user_id, "membership", lambda: self._get_membership(user_id)
+        )[0]
+        return set(group_ids)
+
+    def get_group_permissions_by_member_id(self, user_id: str) -> list[dict]:
+        """
+        Get the permissions of the groups a user is a member of
+
+        Cached like get_group_ids_by_member_id, the dicts must not be modified.
+        """
+        permissions = self.get_request_cached(
+            user_id, "membership", lambda: self._get_membership(user_id)
+        )[1]
+        return list(permissions)
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -156,6 +303,19 @@ class GroupTable:
         else:
             return None
 
+    def get_user_ids_by_group_ids(self, group_ids: list[str]) -> set[str]:
+        """Get the ids of the members of any of the groups"""
+        if not group_ids:
+            return set()
+
+        with get_db() as db:
+            return {
+                user_id
+                for (user_id,) in db.query(GroupMember.user_id)
+                .filter(GroupMember.group_id.in_(group_ids))
+                .distinct()
+            }
+
     def update_group_by_id(
         self, id: str, form_data: GroupUpdateForm, overwrite: bool = False
     ) -> Optional[GroupModel]:
@@ -167,7 +327,11 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                if form_data.user_ids is not None:
+                    self._set_group_members(db, id, form_data.user_ids)
                 db.commit()
+                # The group's permissions may have changed for all its members
+                self._invalidate_memberships()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -177,7 +341,9 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                changed = self._set_group_members(db, id, [])
                 db.commit()
+                self._invalidate_memberships(changed)
                 return True
         except Exception:
             return False
@@ -186,7 +352,9 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
+                self._invalidate_memberships()
 
                 return True
             except Exception:
@@ -207,6 +375,10 @@ class GroupTable:
                     )
                     db.commit()
 
+                db.query(GroupMember).filter_by(user_id=user_id).delete()
+                db.commit()
+                self._invalidate_memberships({user_id})
+
                 return True
             except Exception:
                 return False
@@ -273,7 +445,30 @@ class GroupTable:
                             }
                         )
 
+                # Mirror the memberships into group_member
+                member_group_ids = {
+                    group_id
+                    for (group_id,) in db.query(GroupMember.group_id).filter_by(
+                        user_id=user_id
+                    )
+                }
+                db.query(GroupMember).filter(
+                    GroupMember.user_id == user_id,
+                    GroupMember.group_id.in_(member_group_ids - set(group_ids)),
+                ).delete(synchronize_session=False)
+                db.add_all(
+                    [
+                        GroupMember(
+                            group_id=group_id,
+                            user_id=user_id,
+                            created_at=int(time.time()),
+                        )
+                        for group_id in set(group_ids) - member_group_ids
+                    ]
+                )
+
                 db.commit()
+                self._invalidate_memberships({user_id})
                 return True
             except Exception as e:
                 log.exception(e)
@@ -300,7 +495,9 @@ class GroupTable:
 
                 group.user_ids = group_user_ids
                 group.updated_at = int(time.time())
+                changed = self._set_group_members(db, id, group_user_ids)
                 db.commit()
+                self._invalidate_memberships(changed)
                 db.refresh(group)
                 return GroupModel.model_validate(group)
         except Exception as e:
@@ -329,8 +526,10 @@ class GroupTable:
 
                 group.user_ids = group_user_ids
                 group.updated_at = int(time.time())
+                changed = self._set_group_members(db, id, group_user_ids)
 
                 db.commit()
+                self._invalidate_memberships(changed)
                 db.refresh(group)
                 return GroupModel.model_validate(group)
         except Exception as e:
@@ -9,7 +9,7 @@ from open_webui.models.users import Users, UserNameResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, Index, String, Text, JSON
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 
@@ -26,6 +26,8 @@ class MessageReaction(Base):
     name = Column(Text)
     created_at = Column(BigInteger)
 
+    __table_args__ = (Index("idx_message_reaction_message_id", "message_id"),)
+
 
 class MessageReactionModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -54,6 +56,18 @@ class Message(Base):
     created_at = Column(BigInteger)  # time_ns
     updated_at = Column(BigInteger)  # time_ns
 
+    __table_args__ = (
+        # WHERE channel_id = ... AND parent_id = ... ORDER BY created_at
+        Index(
+            "idx_message_channel_parent_created",
+            "channel_id",
+            "parent_id",
+            "created_at",
+        ),
+        # Reply counts: WHERE parent_id IN (...)
+        Index("idx_message_parent_created", "parent_id", "created_at"),
+    )
+
 
 class MessageModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -106,6 +120,22 @@ class MessageResponse(MessageReplyToResponse):
     reactions: list[Reactions]
 
 
+def encode_message_cursor(message: MessageModel) -> str:
+    """Cursor of the page that follows a message, see get_messages_by_channel_id"""
+    return f"{message.created_at}_{message.id}"
+
+
+def decode_message_cursor(cursor: str) -> tuple[int, str]:
+    """
+    Raises:
+        ValueError: The cursor is malformed
+    """
+    created_at, _, id = cursor.partition("_")
+    if not id:
+        raise ValueError(f"Invalid message cursor: {cursor}")
+    return int(created_at), id
+
+
 class MessageTable:
     def insert_new_message(
         self, form_data: MessageForm, channel_id: str, user_id: str
@@ -141,30 +171,7 @@ class MessageTable:
             if not message:
                 return None
 
-            reply_to_message = (
-                self.get_message_by_id(message.reply_to_id)
-                if message.reply_to_id
-                else None
-            )
-
-            reactions = self.get_reactions_by_message_id(id)
-            thread_replies = self.get_thread_replies_by_message_id(id)
-
-            user = Users.get_user_by_id(message.user_id)
-            return MessageResponse.model_validate(
-                {
-                    **MessageModel.model_validate(message).model_dump(),
-                    "user": user.model_dump() if user else None,
-                    "reply_to_message": (
-                        reply_to_message.model_dump() if reply_to_message else None
-                    ),
-                    "latest_reply_at": (
-                        thread_replies[0].created_at if thread_replies else None
-                    ),
-                    "reply_count": len(thread_replies),
-                    "reactions": reactions,
-                }
-            )
+            return self._get_message_responses(db, [message])[0]
 
     def get_thread_replies_by_message_id(self, id: str) -> list[MessageReplyToResponse]:
         with get_db() as db:
@@ -174,27 +181,86 @@ class MessageTable:
                 .order_by(Message.created_at.desc())
                 .all()
             )
+            return self._get_message_responses(db, all_messages, replies=False)
+
+    def _get_message_responses(
+        self, db, messages: list[Message], replies: bool = True
+    ) -> list[MessageResponse]:
+        """
+        Attach authors, reply-to messages, reactions and (optionally) reply
+        counts to messages, with one query each whatever the number of messages
+
+        Returns:
+            MessageResponse per message if replies, otherwise MessageReplyToResponse
+        """
+        message_ids = [message.id for message in messages]
+
+        reply_to_ids = {
+            message.reply_to_id for message in messages if message.reply_to_id
+        }
+        reply_to_messages = (
+            {
+                message.id: message
+                for message in db.query(Message).filter(Message.id.in_(reply_to_ids))
+            }
+            if reply_to_ids
+            else {}
+        )
+
+        user_ids = {message.user_id for message in messages} | {
+            message.user_id for message in reply_to_messages.values()
+        }
+        users = {
+            user.id: UserNameResponse(**user.model_dump())
+            for user in Users.get_users_by_user_ids(list(user_ids))
+        }
+
+        reply_to_responses = {
+            id: MessageUserResponse.model_validate(
+                {
+                    **MessageModel.model_validate(message).model_dump(),
+                    "user": users.get(message.user_id),
+                }
+            )
+            for id, message in reply_to_messages.items()
+        }
 
-            messages = []
-            for message in all_messages:
-                reply_to_message = (
-                    self.get_message_by_id(message.reply_to_id)
-                    if message.reply_to_id
-                    else None
-                )
-                messages.append(
-                    MessageReplyToResponse.model_validate(
-                        {
-                            **MessageModel.model_validate(message).model_dump(),
-                            "reply_to_message": (
-                                reply_to_message.model_dump()
-                                if reply_to_message
-                                else None
-                            ),
-                        }
-                    )
+        if not replies:
+            return [
+                MessageReplyToResponse.model_validate(
+                    {
+                        **MessageModel.model_validate(message).model_dump(),
+                        "user": users.get(message.user_id),
+                        "reply_to_message": reply_to_responses.get(message.reply_to_id),
+                    }
                 )
-            return messages
+                for message in messages
+            ]
+
+        # parent_id: (reply count, latest reply at)
+        reply_stats = {
+            parent_id: (count, latest_reply_at)
+            for parent_id, count, latest_reply_at in db.query(
+                Message.parent_id, func.count(Message.id), func.max(Message.created_at)
+            )
+            .filter(Message.parent_id.in_(message_ids))
+            .group_by(Message.parent_id)
+        }
+        reactions = self._get_reactions_by_message_ids(db, message_ids)
+
+        return [
+            MessageResponse.model_validate(
+                {
+                    **MessageModel.model_validate(message).model_dump(),
+                    "user": users.get(message.user_id),
+                    "reply_to_message": reply_to_responses.get(message.reply_to_id),
+                    "reply_count": reply_stats.get(message.id, (0, None))[0],
+                    "latest_reply_at": reply_stats.get(message.id, (0, None))[1],
+                    "reactions": reactions.get(message.id, []),
+                }
+            )
+            for message in messages
+        ]
 
     def get_reply_user_ids_by_message_id(self, id: str) -> list[str]:
         with get_db() as db:
@@ -203,82 +269,89 @@ class MessageTable:
                 for message in db.query(Message).filter_by(parent_id=id).all()
             ]
 
+    def _get_message_page(
+        self,
+        db,
+        channel_id: str,
+        parent_id: Optional[str],
+        skip: int,
+        limit: int,
+        cursor: Optional[str],
+    ) -> list[Message]:
+        query = db.query(Message).filter_by(channel_id=channel_id, parent_id=parent_id)
+
+        if cursor:
+            created_at, id = decode_message_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Message.created_at < created_at,
+                    and_(Message.created_at == created_at, Message.id < id),
+                )
+            )
+
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+        if skip and not cursor:
+            query = query.offset(skip)
+
+        return query.limit(limit).all()
+
     def get_messages_by_channel_id(
-        self, channel_id: str, skip: int = 0, limit: int = 50
-    ) -> list[MessageReplyToResponse]:
+        self,
+        channel_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> list[MessageResponse]:
+        """
+        Get a page of a channel's messages, newest first
+
+        Args:
+            channel_id: Channel ID
+            skip: Offset of the page, ignored when a cursor is given
+            limit: Page size
+            cursor: encode_message_cursor of the last message of the previous page
+
+        Returns:
+            The messages with their authors, reply-to messages, reply counts
+            and reactions
+
+        Raises:
+            ValueError: The cursor is malformed
+        """
         with get_db() as db:
-            all_messages = (
-                db.query(Message)
-                .filter_by(channel_id=channel_id, parent_id=None)
-                .order_by(Message.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
+            all_messages = self._get_message_page(
+                db, channel_id, None, skip, limit, cursor
             )
-
-            messages = []
-            for message in all_messages:
-                reply_to_message = (
-                    self.get_message_by_id(message.reply_to_id)
-                    if message.reply_to_id
-                    else None
-                )
-                messages.append(
-                    MessageReplyToResponse.model_validate(
-                        {
-                            **MessageModel.model_validate(message).model_dump(),
-                            "reply_to_message": (
-                                reply_to_message.model_dump()
-                                if reply_to_message
-                                else None
-                            ),
-                        }
-                    )
-                )
-            return messages
+            return self._get_message_responses(db, all_messages)
 
     def get_messages_by_parent_id(
-        self, channel_id: str, parent_id: str, skip: int = 0, limit: int = 50
-    ) -> list[MessageReplyToResponse]:
+        self,
+        channel_id: str,
+        parent_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> list[MessageResponse]:
+        """
+        Get a page of a thread's replies, newest first, like get_messages_by_channel_id
+
+        The thread's parent message ends the last page.
+        """
         with get_db() as db:
             message = db.get(Message, parent_id)
 
             if not message:
                 return []
 
-            all_messages = (
-                db.query(Message)
-                .filter_by(channel_id=channel_id, parent_id=parent_id)
-                .order_by(Message.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
+            all_messages = self._get_message_page(
+                db, channel_id, parent_id, skip, limit, cursor
             )
 
             # If length of all_messages is less than limit, then add the parent message
             if len(all_messages) < limit:
                 all_messages.append(message)
 
-            messages = []
-            for message in all_messages:
-                reply_to_message = (
-                    self.get_message_by_id(message.reply_to_id)
-                    if message.reply_to_id
-                    else None
-                )
-                messages.append(
-                    MessageReplyToResponse.model_validate(
-                        {
-                            **MessageModel.model_validate(message).model_dump(),
-                            "reply_to_message": (
-                                reply_to_message.model_dump()
-                                if reply_to_message
-                                else None
-                            ),
-                        }
-                    )
-                )
-            return messages
+            return self._get_message_responses(db, all_messages)
 
     def update_message_by_id(
         self, id: str, form_data: MessageForm
@@ -319,20 +392,38 @@ class MessageTable:
 
     def get_reactions_by_message_id(self, id: str) -> list[Reactions]:
         with get_db() as db:
-            all_reactions = db.query(MessageReaction).filter_by(message_id=id).all()
-
-            reactions = {}
-            for reaction in all_reactions:
-                if reaction.name not in reactions:
-                    reactions[reaction.name] = {
-                        "name": reaction.name,
-                        "user_ids": [],
-                        "count": 0,
-                    }
-                reactions[reaction.name]["user_ids"].append(reaction.user_id)
-                reactions[reaction.name]["count"] += 1
+            return self._get_reactions_by_message_ids(db, [id]).get(id, [])
+
+    def _get_reactions_by_message_ids(
+        self, db, ids: list[str]
+    ) -> dict[str, list[Reactions]]:
+        if not ids:
+            return {}
+
+        all_reactions = (
+            db.query(MessageReaction)
+            .filter(MessageReaction.message_id.in_(ids))
+            .order_by(MessageReaction.created_at)
+            .all()
+        )
+
+        # message_id: name: reaction
+        reactions = {}
+        for reaction in all_reactions:
+            message_reactions = reactions.setdefault(reaction.message_id, {})
+            if reaction.name not in message_reactions:
+                message_reactions[reaction.name] = {
+                    "name": reaction.name,
+                    "user_ids": [],
+                    "count": 0,
+                }
+            message_reactions[reaction.name]["user_ids"].append(reaction.user_id)
+            message_reactions[reaction.name]["count"] += 1
 
-            return [Reactions(**reaction) for reaction in reactions.values()]
+        return {
+            message_id: [Reactions(**reaction) for reaction in by_name.values()]
+            for message_id, by_name in reactions.items()
+        }
 
     def remove_reaction_by_id_and_user_id_and_name(
         self, id: str, user_id: str, name: str
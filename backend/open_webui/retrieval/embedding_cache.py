@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class EmbeddingCache:
+    """
+    LRU cache of query embeddings with a time to live.
+
+    Entries are keyed by embedding engine, model, prefix and a hash of the
+    text, so switching the embedding model never serves stale vectors. With
+    a Redis client the entries are also shared between instances.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: int = 3600,
+        redis=None,
+        redis_key_prefix: str = "open-webui",
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = redis
+        self.redis_key_prefix = redis_key_prefix
+
+        # Key: cache key, Value: (expires_at, embedding)
+        self._entries: OrderedDict[str, tuple[float, list]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(engine: str, model: str, prefix: Optional[str], text: str) -> str:
+        digest = hashlib.sha256(f"{prefix or ''}\0{text}".encode("utf-8")).hexdigest()
+        return f"{engine}:{model}:{digest}"
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.redis_key_prefix}:embedding:{key}"
+
+    def get_many(self, keys: list[str]) -> dict[str, list]:
+        """
+        Look up embeddings, locally first and then in Redis
+
+        Args:
+            keys: Cache keys (see make_key)
+
+        Returns:
+            Mapping of the keys that were found to their embeddings
+        """
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[1]
+
+        missing = [key for key in keys if key not in found]
+        if self.redis is not None and missing:
+            try:
+                pipe = self.redis.pipeline()
+                for key in missing:
+                    pipe.get(self._redis_key(key))
+                shared = {
+                    key: json.loads(value)
+                    for key, value in zip(missing, pipe.execute())
+                    if value is not None
+                }
+            except Exception as e:
+                log.warning(f"Error reading embeddings from Redis: {e}")
+                shared = {}
+
+            if shared:
+                self._set_local(shared)
+                found.update(shared)
+
+        return found
+
+    def set_many(self, embeddings: dict[str, list]) -> None:
+        """Store embeddings by cache key"""
+        self._set_local(embeddings)
+
+        if self.redis is not None and embeddings:
+            try:
+                pipe = self.redis.pipeline()
+                for key, embedding in embeddings.items():
+                    pipe.set(self._redis_key(key), json.dumps(embedding), ex=self.ttl)
+                pipe.execute()
+            except Exception as e:
+                log.warning(f"Error writing embeddings to Redis: {e}")
+
+    def _set_local(self, embeddings: dict[str, list]) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, embedding in embeddings.items():
+                self._entries[key] = (expires_at, embedding)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def wrap(self, func, engine: str, model: str):
+        """
+        Wrap an embedding function (see get_embedding_function) with the cache
+
+        Only texts that are not cached are embedded, in a single call.
+        """
+
+        def embed(query, prefix=None, user=None):
+            texts = [query] if isinstance(query, str) else list(query)
+            keys = [self.make_key(engine, model, prefix, text) for text in texts]
+            found = self.get_many(keys)
+
+            missing = list(dict.fromkeys(k for k in keys if k not in found))
+            if missing:
+                text_by_key = dict(zip(keys, texts))
+                embeddings = func(
+                    [text_by_key[key] for key in missing], prefix=prefix, user=user
+                )
+
+                if (
+                    not isinstance(embeddings, list)
+                    or len(embeddings) != len(missing)
+                    or any(embedding is None for embedding in embeddings)
+                ):
+                    # Incomplete result: hand it back untouched, uncached
+                    if found:
+                        return func(query, prefix=prefix, user=user)
+                    if isinstance(query, str) and isinstance(embeddings, list):
+                        return embeddings[0] if embeddings else None
+                    return embeddings
+
+                embeddings = dict(zip(missing, embeddings))
+                self.set_many(embeddings)
+                found.update(embeddings)
+
+            if isinstance(query, str):
+                return found[keys[0]]
+            return [found[key] for key in keys]
+
+        return embed
@@ -0,0 +1,163 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.config import (
+    RAG_EMBEDDING_CONCURRENCY,
+    RAG_EMBEDDING_MAX_RETRIES,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30.0
+
+# Fragments of 400 responses that mean the request carried too many tokens
+BATCH_TOO_LARGE_MESSAGES = (
+    "too large",
+    "too long",
+    "too many",
+    "maximum context",
+    "context length",
+    "max_tokens",
+    "exceeds",
+)
+
+
+class EmbeddingBatchTooLargeError(Exception):
+    """The embedding backend rejected a request for its size"""
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _get_backoff_delay(attempt: int) -> float:
+    # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2**attempt)))
+
+
+class EmbeddingClient:
+    """
+    HTTP client shared by all embedding requests.
+
+    Connections to the embedding backends are pooled, and at most
+    ``concurrency`` requests are in flight across the whole process. Requests
+    rejected with a retryable status are retried after ``Retry-After`` (or a
+    jittered backoff), and oversize batches are split in half until they fit.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = RAG_EMBEDDING_CONCURRENCY,
+        max_retries: int = RAG_EMBEDDING_MAX_RETRIES,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.concurrency, pool_maxsize=self.concurrency
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+
+    def post(self, url: str, headers: dict, json: dict) -> Any:
+        """
+        POST a request and return the decoded JSON response
+
+        Raises:
+            EmbeddingBatchTooLargeError: The request was rejected for its size
+            requests.HTTPError: The request failed, after retrying
+        """
+        for attempt in range(self.max_retries + 1):
+            # Hold a slot only while the request is in flight, not while waiting
+            with self._slots:
+                r = self.session.post(url, headers=headers, json=json)
+
+            if r.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                delay = _parse_retry_after(r.headers.get("Retry-After"))
+                if delay is None:
+                    delay = _get_backoff_delay(attempt)
+                delay = min(delay, RETRY_BACKOFF_MAX)
+                log.warning(
+                    f"Embedding request returned {r.status_code}, retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                continue
+
+            if r.status_code == 413 or (
+                r.status_code == 400
+                and any(
+                    message in r.text.lower() for message in BATCH_TOO_LARGE_MESSAGES
+                )
+            ):
+                raise EmbeddingBatchTooLargeError(r.text)
+
+            r.raise_for_status()
+            return r.json()
+
+    def embed(self, texts: list[str], embed_batch: Callable[[list[str]], list]) -> list:
+        """
+        Embed texts in one request, splitting the batch while it is too large
+
+        Args:
+            texts: Texts to embed
+            embed_batch: Embeds a batch of texts with one request
+
+        Returns:
+            One embedding per text
+        """
+        try:
+            return embed_batch(texts)
+        except EmbeddingBatchTooLargeError:
+            if len(texts) <= 1:
+                raise
+
+            middle = len(texts) // 2
+            log.info(
+                f"Embedding batch of {len(texts)} texts too large, splitting in two"
+            )
+            return self.embed(texts[:middle], embed_batch) + self.embed(
+                texts[middle:], embed_batch
+            )
+
+    def map_batches(
+        self, texts: list[str], embed_batch: Callable[[list[str]], Any], batch_size: int
+    ) -> list:
+        """
+        Embed texts in batches of ``batch_size``, several batches at once
+
+        Returns:
+            The result of each batch, in order
+        """
+        batch_size = max(1, batch_size)
+        batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+        if len(batches) <= 1:
+            return [embed_batch(batch) for batch in batches]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.concurrency, len(batches))
+        ) as executor:
+            return list(executor.map(embed_batch, batches))
+
+
+# Global instance
+embedding_client = EmbeddingClient()
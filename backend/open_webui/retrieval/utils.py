@@ -2,15 +2,12 @@ import logging
 import os
 from typing import Optional, Union
 
-import requests
 import hashlib
 from concurrent.futures import ThreadPoolExecutor
-import time
 
 from urllib.parse import quote
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
@@ -21,9 +18,11 @@ from open_webui.models.files import Files
 from open_webui.models.knowledge import Knowledges
 
 from open_webui.models.chats import Chats
+from open_webui.models.chunk_embeddings import ChunkEmbeddings
 from open_webui.models.notes import Notes
 
-from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.vector.bm25 import BM25Index
+from open_webui.retrieval.embedding_client import embedding_client
 from open_webui.utils.access_control import has_access
 from open_webui.utils.misc import get_message_list
 
@@ -37,6 +36,9 @@ from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    ENABLE_RAG_CHUNK_EMBEDDING_REUSE,
+    RAG_CHUNK_EMBEDDING_MAX_AGE,
+    RAG_CHUNK_EMBEDDING_MAX_COUNT,
 )
 
 log = logging.getLogger(__name__)
@@ -53,6 +55,7 @@ class VectorSearchRetriever(BaseRetriever):
     collection_name: Any
     embedding_function: Any
     top_k: int
+    query_embedding: Optional[Any] = None
 
     def _get_relevant_documents(
         self,
@@ -60,9 +63,13 @@ class VectorSearchRetriever(BaseRetriever):
         *,
         run_manager: CallbackManagerForRetrieverRun,
     ) -> list[Document]:
+        query_embedding = self.query_embedding
+        if query_embedding is None:
+            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
+
         result = VECTOR_DB_CLIENT.search(
             collection_name=self.collection_name,
-            vectors=[self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)],
+            vectors=[query_embedding],
             limit=self.top_k,
         )
 
@@ -74,6 +81,7 @@ class VectorSearchRetriever(BaseRetriever):
         for idx in range(len(ids)):
             results.append(
                 Document(
+                    id=ids[idx],
                     metadata=metadatas[idx],
                     page_content=documents[idx],
                 )
@@ -81,6 +89,19 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class BM25IndexRetriever(BaseRetriever):
+    index: Any
+    k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        return self.index.search(query, self.k)
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -117,7 +138,7 @@ def get_doc(collection_name: str, user: UserModel = None):
 
 def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
+    bm25_index: Optional[BM25Index],
     query: str,
     embedding_function,
     k: int,
@@ -125,30 +146,22 @@ def query_doc_with_hybrid_search(
     k_reranker: int,
     r: float,
     hybrid_bm25_weight: float,
+    query_embedding: Optional[list[float]] = None,
 ) -> dict:
     try:
-        if (
-            not collection_result
-            or not hasattr(collection_result, "documents")
-            or not collection_result.documents
-            or len(collection_result.documents) == 0
-            or not collection_result.documents[0]
-        ):
+        if not bm25_index:
             log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
             return {"documents": [], "metadatas": [], "distances": []}
 
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
 
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
-        )
-        bm25_retriever.k = k
+        bm25_retriever = BM25IndexRetriever(index=bm25_index, k=k)
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
             embedding_function=embedding_function,
             top_k=k,
+            query_embedding=query_embedding,
         )
 
         if hybrid_bm25_weight <= 0:
@@ -170,6 +183,8 @@ def query_doc_with_hybrid_search(
             top_n=k_reranker,
             reranking_function=reranking_function,
             r_score=r,
+            query_embedding=query_embedding,
+            get_stored_embeddings=bm25_index.get_vectors,
         )
 
         compression_retriever = ContextualCompressionRetriever(
@@ -284,29 +299,24 @@ def get_all_items_from_collections(collection_names: list[str]) -> dict:
     return merge_get_results(results)
 
 
-def query_collection(
+def query_collections(
     collection_names: list[str],
     queries: list[str],
     embedding_function,
     k: int,
-) -> dict:
-    results = []
-    error = False
+) -> dict[str, list[dict]]:
+    """
+    Vector search every query in every collection
 
-    def process_query_collection(collection_name, query_embedding):
-        try:
-            if collection_name:
-                result = query_doc(
-                    collection_name=collection_name,
-                    k=k,
-                    query_embedding=query_embedding,
-                )
-                if result is not None:
-                    return result.model_dump(), None
-            return None, None
-        except Exception as e:
-            log.exception(f"Error when querying the collection: {e}")
-            return None, e
+    Returns:
+        Per collection, one result per query. Collections that could not be
+        searched are left out.
+
+    Raises:
+        Exception: The search itself failed, not just for some collections
+    """
+    results = {}
+    collection_names = list(dict.fromkeys(name for name in collection_names if name))
 
     # Generate all query embeddings (in one call)
     query_embeddings = embedding_function(queries, prefix=RAG_EMBEDDING_QUERY_PREFIX)
@@ -314,29 +324,57 @@ def query_collection(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
+    # Search all queries at once, per collection or in a single request
+    # when the vector DB supports it
+    search_results = VECTOR_DB_CLIENT.search_collections(
+        collection_names=collection_names, vectors=query_embeddings, limit=k
+    )
+
+    for collection_name in collection_names:
+        result = search_results.get(collection_name)
+        if result is None:
+            continue
+
+        result = result.model_dump()
+        log.info(f"query_collection:result {result['ids']} {result['metadatas']}")
+        results[collection_name] = [
+            {
+                "ids": [result["ids"][idx]],
+                "distances": [result["distances"][idx]],
+                "documents": [result["documents"][idx]],
+                "metadatas": [result["metadatas"][idx]],
+            }
+            for idx in range(len(result["ids"] or []))
+        ]
+
+    return results
 
-    for result, err in task_results:
-        if err is not None:
-            error = True
-        elif result is not None:
-            results.append(result)
 
-    if error and not results:
+def query_collection(
+    collection_names: list[str],
+    queries: list[str],
+    embedding_function,
+    k: int,
+) -> dict:
+    try:
+        collection_results = query_collections(
+            collection_names, queries, embedding_function, k
+        )
+    except Exception as e:
+        log.exception(f"Error when querying the collections: {e}")
         log.warning("All collection queries failed. No results returned.")
+        collection_results = {}
+
+    results = [
+        result
+        for collection_name in collection_results
+        for result in collection_results[collection_name]
+    ]
 
     return merge_and_sort_query_results(results, k=k)
 
 
-def query_collection_with_hybrid_search(
+def query_collections_with_hybrid_search(
     collection_names: list[str],
     queries: list[str],
     embedding_function,
@@ -345,33 +383,51 @@ def query_collection_with_hybrid_search(
     k_reranker: int,
     r: float,
     hybrid_bm25_weight: float,
-) -> dict:
-    results = []
-    error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
-    collection_results = {}
+) -> dict[str, list[dict]]:
+    """
+    Hybrid search every query in every collection
+
+    Returns:
+        Per collection, one result per query that succeeded. Collections
+        where every query failed are left out.
+    """
+    collection_names = list(dict.fromkeys(collection_names))
+
+    # Load the persistent BM25 index once per collection
+    # (built from the vector DB if the collection has none or it is behind)
+    bm25_indexes = {}
     for collection_name in collection_names:
         try:
             log.debug(
-                f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
+                f"query_collection_with_hybrid_search:get_bm25_index:collection {collection_name}"
             )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
+            bm25_indexes[collection_name] = VECTOR_DB_CLIENT.get_bm25_index(
+                collection_name
             )
         except Exception as e:
-            log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
+            log.exception(f"Failed to load BM25 index of {collection_name}: {e}")
+            bm25_indexes[collection_name] = None
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
     )
 
+    # Embed each query once for all collections, unless only BM25 and a
+    # reranker are used
+    query_embeddings = {}
+    if queries and (hybrid_bm25_weight < 1 or reranking_function is None):
+        try:
+            query_embeddings = dict(
+                zip(queries, embedding_function(queries, RAG_EMBEDDING_QUERY_PREFIX))
+            )
+        except Exception as e:
+            log.exception(f"Error embedding queries, embedding per collection: {e}")
+
     def process_query(collection_name, query):
         try:
             result = query_doc_with_hybrid_search(
                 collection_name=collection_name,
-                collection_result=collection_results[collection_name],
+                bm25_index=bm25_indexes[collection_name],
                 query=query,
                 embedding_function=embedding_function,
                 k=k,
@@ -379,6 +435,7 @@ def query_collection_with_hybrid_search(
                 k_reranker=k_reranker,
                 r=r,
                 hybrid_bm25_weight=hybrid_bm25_weight,
+                query_embedding=query_embeddings.get(query),
             )
             return result, None
         except Exception as e:
@@ -386,11 +443,11 @@ def query_collection_with_hybrid_search(
             return None, e
 
     # Prepare tasks for all collections and queries
-    # Avoid running any tasks for collections that failed to fetch data (have assigned None)
+    # Avoid running any tasks for collections that failed to load (have assigned None)
     tasks = [
         (cn, q)
         for cn in collection_names
-        if collection_results[cn] is not None
+        if bm25_indexes[cn] is not None
         for q in queries
     ]
 
@@ -398,13 +455,48 @@ def query_collection_with_hybrid_search(
         future_results = [executor.submit(process_query, cn, q) for cn, q in tasks]
         task_results = [future.result() for future in future_results]
 
-    for result, err in task_results:
+    results = {cn: [] for cn in collection_names if bm25_indexes[cn] is None}
+    failed = set()
+    for (cn, _), (result, err) in zip(tasks, task_results):
         if err is not None:
-            error = True
+            failed.add(cn)
         elif result is not None:
-            results.append(result)
+            results.setdefault(cn, []).append(result)
+
+    for cn in failed:
+        if not results.get(cn):
+            results.pop(cn, None)
+
+    return results
+
+
+def query_collection_with_hybrid_search(
+    collection_names: list[str],
+    queries: list[str],
+    embedding_function,
+    k: int,
+    reranking_function,
+    k_reranker: int,
+    r: float,
+    hybrid_bm25_weight: float,
+) -> dict:
+    collection_results = query_collections_with_hybrid_search(
+        collection_names=collection_names,
+        queries=queries,
+        embedding_function=embedding_function,
+        k=k,
+        reranking_function=reranking_function,
+        k_reranker=k_reranker,
+        r=r,
+        hybrid_bm25_weight=hybrid_bm25_weight,
+    )
 
-    if error and not results:
+    results = [
+        result
+        for collection_name in collection_results
+        for result in collection_results[collection_name]
+    ]
+    if len(collection_results) < len(set(collection_names)) and not results:
         raise Exception(
             "Hybrid search failed for all collections. Using Non-hybrid search as fallback."
         )
@@ -420,9 +512,10 @@ def get_embedding_function(
     key,
     embedding_batch_size,
     azure_api_version=None,
+    cache=None,
 ):
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
+        embed = lambda query, prefix=None, user=None: embedding_function.encode(
             query, **({"prompt": prefix} if prefix else {})
         ).tolist()
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
@@ -439,26 +532,94 @@ def get_embedding_function(
 
         def generate_multiple(query, prefix, user, func):
             if isinstance(query, list):
+                # Batches are sent concurrently over the shared client
                 embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    batch_embeddings = func(
-                        query[i : i + embedding_batch_size],
-                        prefix=prefix,
-                        user=user,
-                    )
-
+                for batch_embeddings in embedding_client.map_batches(
+                    query,
+                    lambda batch: func(batch, prefix=prefix, user=user),
+                    embedding_batch_size,
+                ):
                     if isinstance(batch_embeddings, list):
                         embeddings.extend(batch_embeddings)
                 return embeddings
             else:
                 return func(query, prefix, user)
 
-        return lambda query, prefix=None, user=None: generate_multiple(
+        embed = lambda query, prefix=None, user=None: generate_multiple(
             query, prefix, user, func
         )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
+    if cache is not None:
+        return cache.wrap(embed, embedding_engine, embedding_model)
+    return embed
+
+
+def get_chunk_embeddings(
+    texts: list[str],
+    embedding_function,
+    embedding_engine: str,
+    embedding_model: str,
+    embedding_url: str = "",
+    prefix: Optional[str] = None,
+    user=None,
+) -> list[list[float]]:
+    """
+    Embed document chunks, reusing stored embeddings of identical chunks
+
+    Only chunks whose content was never embedded with this engine, model and
+    endpoint are sent to the embedding backend, each once.
+
+    Args:
+        texts: Chunk texts
+        embedding_function: Function returned by get_embedding_function
+        embedding_engine: Embedding engine
+        embedding_model: Embedding model
+        embedding_url: Embedding endpoint, "" for local models
+        prefix: Content prefix
+        user: User the embeddings are generated for
+
+    Returns:
+        One embedding per text
+    """
+    if not ENABLE_RAG_CHUNK_EMBEDDING_REUSE:
+        return embedding_function(texts, prefix=prefix, user=user)
+
+    hashes = [ChunkEmbeddings.hash_text(text, prefix) for text in texts]
+    embeddings = ChunkEmbeddings.get_embeddings(
+        embedding_engine, embedding_model, embedding_url, hashes
+    )
+
+    missing = list(dict.fromkeys(h for h in hashes if h not in embeddings))
+    log.info(f"reusing {len(texts) - len(missing)} of {len(texts)} chunk embeddings")
+
+    if missing:
+        text_by_hash = dict(zip(hashes, texts))
+        new_embeddings = embedding_function(
+            [text_by_hash[h] for h in missing], prefix=prefix, user=user
+        )
+        if not isinstance(new_embeddings, list) or len(new_embeddings) != len(missing):
+            raise Exception(
+                f"Expected {len(missing)} embeddings, got {len(new_embeddings or [])}"
+            )
+
+        new_embeddings = dict(zip(missing, new_embeddings))
+        ChunkEmbeddings.insert_embeddings(
+            embedding_engine, embedding_model, embedding_url, new_embeddings
+        )
+        embeddings.update(new_embeddings)
+
+        ChunkEmbeddings.prune_if_due(
+            embedding_engine,
+            embedding_model,
+            embedding_url,
+            RAG_CHUNK_EMBEDDING_MAX_AGE,
+            RAG_CHUNK_EMBEDDING_MAX_COUNT,
+        )
+
+    return [embeddings[h] for h in hashes]
+
 
 def get_reranking_function(reranking_engine, reranking_model, reranking_function):
     if reranking_function is None:
@@ -492,6 +653,8 @@ def get_sources_from_items(
     extracted_collections = []
     query_results = []
 
+    # Items with their query result, or the collections left to search
+    entries = []
     for item in items:
         query_result = None
         collection_names = []
@@ -680,41 +843,79 @@ def get_sources_from_items(
                 log.debug(f"skipping {item} as it has already been extracted")
                 continue
 
-            try:
-                if full_context:
+            extracted_collections.extend(collection_names)
+
+            if full_context:
+                try:
                     query_result = get_all_items_from_collections(collection_names)
-                else:
-                    query_result = None  # Initialize to None
-                    if hybrid_search:
-                        try:
-                            query_result = query_collection_with_hybrid_search(
-                                collection_names=collection_names,
-                                queries=queries,
-                                embedding_function=embedding_function,
-                                k=k,
-                                reranking_function=reranking_function,
-                                k_reranker=k_reranker,
-                                r=r,
-                                hybrid_bm25_weight=hybrid_bm25_weight,
-                            )
-                        except Exception as e:
-                            log.debug(
-                                "Error when using hybrid search, using non hybrid search as fallback."
-                            )
+                except Exception as e:
+                    log.exception(e)
+                collection_names = set()
+
+        entries.append([item, query_result, collection_names])
+
+    # Search the collections of all items together, so every query is
+    # embedded once and each collection is searched once per request
+    pending_collections = [
+        name
+        for _, query_result, names in entries
+        if query_result is None
+        for name in names
+    ]
+    if pending_collections:
+        collection_results = None
+        try:
+            if hybrid_search:
+                try:
+                    collection_results = query_collections_with_hybrid_search(
+                        collection_names=pending_collections,
+                        queries=queries,
+                        embedding_function=embedding_function,
+                        k=k,
+                        reranking_function=reranking_function,
+                        k_reranker=k_reranker,
+                        r=r,
+                        hybrid_bm25_weight=hybrid_bm25_weight,
+                    )
+                except Exception as e:
+                    log.debug(
+                        "Error when using hybrid search, using non hybrid search as fallback."
+                    )
+            else:
+                collection_results = query_collections(
+                    collection_names=pending_collections,
+                    queries=queries,
+                    embedding_function=embedding_function,
+                    k=k,
+                )
+        except Exception as e:
+            log.exception(e)
 
-                    # fallback to non-hybrid search
-                    if not hybrid_search and query_result is None:
-                        query_result = query_collection(
-                            collection_names=collection_names,
-                            queries=queries,
-                            embedding_function=embedding_function,
-                            k=k,
-                        )
-            except Exception as e:
-                log.exception(e)
+        for entry in entries:
+            _, query_result, collection_names = entry
+            if (
+                query_result is not None
+                or not collection_names
+                or collection_results is None
+            ):
+                continue
 
-            extracted_collections.extend(collection_names)
+            results = [
+                result
+                for name in collection_names
+                for result in collection_results.get(name, [])
+            ]
+            if (
+                hybrid_search
+                and not results
+                and any(name not in collection_results for name in collection_names)
+            ):
+                # Hybrid search failed for all of the item's collections
+                continue
 
+            entry[1] = merge_and_sort_query_results(results, k=k)
+
+    for item, query_result, _ in entries:
         if query_result:
             if "data" in item:
                 del item["data"]
@@ -793,34 +994,37 @@ def generate_openai_batch_embeddings(
         log.debug(
             f"generate_openai_batch_embeddings:model {model} batch size: {len(texts)}"
         )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            json=json_data,
-        )
-        r.raise_for_status()
-        data = r.json()
-        if "data" in data:
-            return [elem["embedding"] for elem in data["data"]]
-        else:
-            raise "Something went wrong :/"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}",
+            **(
+                {
+                    "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                    "X-OpenWebUI-User-Id": user.id,
+                    "X-OpenWebUI-User-Email": user.email,
+                    "X-OpenWebUI-User-Role": user.role,
+                }
+                if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                else {}
+            ),
+        }
+
+        def embed_batch(texts: list[str]) -> list[list[float]]:
+            json_data = {"input": texts, "model": model}
+            if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(
+                prefix, str
+            ):
+                json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+            data = embedding_client.post(
+                f"{url}/embeddings", headers=headers, json=json_data
+            )
+            if "data" in data:
+                return [elem["embedding"] for elem in data["data"]]
+            else:
+                raise Exception("Something went wrong :/")
+
+        return embedding_client.embed(texts, embed_batch)
     except Exception as e:
         log.exception(f"Error generating openai batch embeddings: {e}")
         return None
@@ -839,42 +1043,36 @@ def generate_azure_openai_batch_embeddings(
         log.debug(
             f"generate_azure_openai_batch_embeddings:deployment {model} batch size: {len(texts)}"
         )
-        json_data = {"input": texts}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
         url = f"{url}/openai/deployments/{model}/embeddings?api-version={version}"
+        headers = {
+            "Content-Type": "application/json",
+            "api-key": key,
+            **(
+                {
+                    "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                    "X-OpenWebUI-User-Id": user.id,
+                    "X-OpenWebUI-User-Email": user.email,
+                    "X-OpenWebUI-User-Role": user.role,
+                }
+                if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                else {}
+            ),
+        }
 
-        for _ in range(5):
-            r = requests.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": key,
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                json=json_data,
-            )
-            if r.status_code == 429:
-                retry = float(r.headers.get("Retry-After", "1"))
-                time.sleep(retry)
-                continue
-            r.raise_for_status()
-            data = r.json()
+        def embed_batch(texts: list[str]) -> list[list[float]]:
+            json_data = {"input": texts}
+            if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(
+                prefix, str
+            ):
+                json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+            data = embedding_client.post(url, headers=headers, json=json_data)
             if "data" in data:
                 return [elem["embedding"] for elem in data["data"]]
             else:
                 raise Exception("Something went wrong :/")
-        return None
+
+        return embedding_client.embed(texts, embed_batch)
     except Exception as e:
         log.exception(f"Error generating azure openai batch embeddings: {e}")
         return None
@@ -892,35 +1090,37 @@ def generate_ollama_batch_embeddings(
         log.debug(
             f"generate_ollama_batch_embeddings:model {model} batch size: {len(texts)}"
         )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS
-                    else {}
-                ),
-            },
-            json=json_data,
-        )
-        r.raise_for_status()
-        data = r.json()
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}",
+            **(
+                {
+                    "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                    "X-OpenWebUI-User-Id": user.id,
+                    "X-OpenWebUI-User-Email": user.email,
+                    "X-OpenWebUI-User-Role": user.role,
+                }
+                if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                else {}
+            ),
+        }
 
-        if "embeddings" in data:
-            return data["embeddings"]
-        else:
-            raise "Something went wrong :/"
+        def embed_batch(texts: list[str]) -> list[list[float]]:
+            json_data = {"input": texts, "model": model}
+            if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(
+                prefix, str
+            ):
+                json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+            data = embedding_client.post(
+                f"{url}/api/embed", headers=headers, json=json_data
+            )
+            if "embeddings" in data:
+                return data["embeddings"]
+            else:
+                raise Exception("Something went wrong :/")
+
+        return embedding_client.embed(texts, embed_batch)
     except Exception as e:
         log.exception(f"Error generating ollama batch embeddings: {e}")
         return None
@@ -977,6 +1177,8 @@ def generate_embeddings(
 import operator
 from typing import Optional, Sequence
 
+import numpy as np
+
 from langchain_core.callbacks import Callbacks
 from langchain_core.documents import BaseDocumentCompressor, Document
 
@@ -986,6 +1188,8 @@ class RerankCompressor(BaseDocumentCompressor):
     top_n: int
     reranking_function: Any
     r_score: float
+    query_embedding: Optional[Any] = None
+    get_stored_embeddings: Optional[Any] = None
 
     class Config:
         extra = "forbid"
@@ -997,6 +1201,9 @@ class RerankCompressor(BaseDocumentCompressor):
         query: str,
         callbacks: Optional[Callbacks] = None,
     ) -> Sequence[Document]:
+        if not documents:
+            return []
+
         reranking = self.reranking_function is not None
 
         scores = None
@@ -1005,13 +1212,48 @@ class RerankCompressor(BaseDocumentCompressor):
                 [(query, doc.page_content) for doc in documents]
             )
         else:
-            from sentence_transformers import util
+            query_embedding = self.query_embedding
+            if query_embedding is None:
+                query_embedding = self.embedding_function(
+                    query, RAG_EMBEDDING_QUERY_PREFIX
+                )
+            query_embedding = np.asarray(query_embedding, dtype=np.float32)
 
-            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
+            # Reuse the embeddings stored with the chunks, embed only the rest
+            stored = {}
+            if self.get_stored_embeddings is not None:
+                stored = self.get_stored_embeddings(
+                    [doc.id for doc in documents if doc.id is not None]
+                )
+            stored = {
+                chunk_id: vector
+                for chunk_id, vector in stored.items()
+                if vector.shape == query_embedding.shape
+            }
+
+            missing = [doc for doc in documents if doc.id not in stored]
+            if missing:
+                log.debug(f"Embedding {len(missing)} chunks without stored embeddings")
+                embedded = self.embedding_function(
+                    [doc.page_content for doc in missing], RAG_EMBEDDING_CONTENT_PREFIX
+                )
+            else:
+                embedded = []
+            embedded = iter(embedded)
+
+            document_embedding = np.array(
+                [
+                    stored[doc.id] if doc.id in stored else next(embedded)
+                    for doc in documents
+                ],
+                dtype=np.float32,
+            )
+
+            # Cosine similarity of the query with every chunk at once
+            norms = np.linalg.norm(document_embedding, axis=1) * np.linalg.norm(
+                query_embedding
             )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+            scores = (document_embedding @ query_embedding) / np.maximum(norms, 1e-12)
 
         if scores is not None:
             docs_with_scores = list(
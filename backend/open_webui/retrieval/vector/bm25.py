@@ -0,0 +1,894 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from filelock import FileLock
+from langchain_core.documents import Document
+
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.vector.main import (
+    GetResult,
+    SearchResult,
+    VectorDBBase,
+    VectorItem,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Same k1 and b as rank_bm25.BM25Okapi, used by BM25Retriever. The IDF is
+# Lucene's log(1 + (N - df + 0.5) / (df + 0.5)) instead of BM25Okapi's, so
+# terms found in most chunks still count a little rather than negatively
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Segments are merged into one when there are more than this many, or when
+# more than this share of the indexed chunks has been deleted
+MAX_SEGMENTS = 8
+MAX_DELETED_RATIO = 0.25
+
+# Number of collection indexes kept loaded per process
+MAX_CACHED_INDEXES = 32
+
+
+def tokenize(text: str) -> list[str]:
+    # Same as the default preprocessing of BM25Retriever
+    return text.split()
+
+
+####################
+# On-disk segments
+####################
+
+
+class BM25Segment:
+    """
+    Immutable postings of one batch of chunks, memory-mapped from disk.
+
+    Files of a segment ``<name>`` in the index directory:
+        <name>.vocab.json     term -> row in indptr
+        <name>.indptr.npy     postings of row r are postings[:, indptr[r]:indptr[r + 1]]
+        <name>.postings.npy   (2, n) int32: local doc number, term frequency
+        <name>.lengths.npy    number of tokens per doc
+        <name>.offsets.npy    byte range of each doc in records.npy
+        <name>.records.npy    UTF-8 JSON [text, metadata] per doc
+        <name>.ids.json       vector DB id per doc
+        <name>.vectors.npy    stored embedding per doc, NaN if unknown (optional)
+    """
+
+    def __init__(self, path: str, name: str):
+        self.path = path
+        self.name = name
+
+        prefix = os.path.join(path, name)
+        self.indptr = np.load(f"{prefix}.indptr.npy", mmap_mode="r")
+        self.postings = np.load(f"{prefix}.postings.npy", mmap_mode="r")
+        self.lengths = np.load(f"{prefix}.lengths.npy", mmap_mode="r")
+        self.offsets = np.load(f"{prefix}.offsets.npy", mmap_mode="r")
+        self.records = np.load(f"{prefix}.records.npy", mmap_mode="r")
+        self.vectors = (
+            np.load(f"{prefix}.vectors.npy", mmap_mode="r")
+            if os.path.exists(f"{prefix}.vectors.npy")
+            else None
+        )
+
+        self._vocab: Optional[Dict[str, int]] = None
+        self._ids: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def vocab(self) -> Dict[str, int]:
+        # Only needed for searches, so loaded on first use
+        if self._vocab is None:
+            with open(
+                os.path.join(self.path, f"{self.name}.vocab.json"),
+                "r",
+                encoding="utf-8",
+            ) as f:
+                self._vocab = json.load(f)
+        return self._vocab
+
+    @property
+    def ids(self) -> List[str]:
+        if self._ids is None:
+            self._ids = self.read_ids(self.path, self.name)
+        return self._ids
+
+    @staticmethod
+    def read_ids(path: str, name: str) -> List[str]:
+        with open(os.path.join(path, f"{name}.ids.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        row = self.vocab.get(term)
+        if row is None:
+            return None
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return self.postings[0, start:end], self.postings[1, start:end]
+
+    def get_record_bytes(self, doc: int) -> bytes:
+        return self.records[self.offsets[doc] : self.offsets[doc + 1]].tobytes()
+
+    def get_record(self, doc: int) -> Tuple[str, Any]:
+        text, metadata = json.loads(self.get_record_bytes(doc).decode("utf-8"))
+        return text, metadata
+
+    @staticmethod
+    def encode_record(text: str, metadata: Any) -> bytes:
+        return json.dumps([text, metadata], ensure_ascii=False, default=str).encode(
+            "utf-8"
+        )
+
+    @staticmethod
+    def write(
+        path: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Any],
+        vectors: Optional[List[Optional[List[float]]]] = None,
+    ) -> dict:
+        """
+        Write a new segment for the given chunks, and their embeddings if known
+
+        Returns:
+            Manifest entry of the segment
+        """
+        name = uuid.uuid4().hex
+        prefix = os.path.join(path, name)
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for doc, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        vocab = {term: row for row, term in enumerate(postings)}
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(entries) for entries in postings.values()])
+        flat = np.array(
+            [entry for entries in postings.values() for entry in entries],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+
+        records = [
+            BM25Segment.encode_record(text, metadata)
+            for text, metadata in zip(texts, metadatas)
+        ]
+        offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(record) for record in records])
+
+        with open(f"{prefix}.vocab.json", "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+        with open(f"{prefix}.ids.json", "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+        np.save(f"{prefix}.indptr.npy", indptr)
+        np.save(f"{prefix}.postings.npy", np.ascontiguousarray(flat.T))
+        np.save(f"{prefix}.lengths.npy", np.array(lengths, dtype=np.int32))
+        np.save(f"{prefix}.offsets.npy", offsets)
+        np.save(
+            f"{prefix}.records.npy", np.frombuffer(b"".join(records), dtype=np.uint8)
+        )
+
+        # Kept so scoring against a query does not need to embed the chunks again
+        dims = {len(vector) for vector in vectors or [] if vector is not None}
+        if len(dims) == 1:
+            dim = dims.pop()
+            matrix = np.full((len(ids), dim), np.nan, dtype=np.float32)
+            for doc, vector in enumerate(vectors):
+                if vector is not None:
+                    matrix[doc] = vector
+            np.save(f"{prefix}.vectors.npy", matrix)
+
+        return {"name": name, "size": len(ids), "deleted": []}
+
+    @staticmethod
+    def remove(path: str, name: str) -> None:
+        for suffix in (
+            "vocab.json",
+            "ids.json",
+            "indptr.npy",
+            "postings.npy",
+            "lengths.npy",
+            "offsets.npy",
+            "records.npy",
+            "vectors.npy",
+        ):
+            try:
+                os.remove(os.path.join(path, f"{name}.{suffix}"))
+            except OSError:
+                pass
+
+
+class BM25Index:
+    """Read-only view of a collection's segments at one manifest version"""
+
+    def __init__(self, path: str, manifest: dict):
+        self.path = path
+        self.manifest = manifest
+
+        self.segments: List[BM25Segment] = []
+        self.live: List[np.ndarray] = []
+        for entry in manifest["segments"]:
+            segment = BM25Segment(path, entry["name"])
+            live = np.ones(len(segment), dtype=bool)
+            live[entry["deleted"]] = False
+
+            self.segments.append(segment)
+            self.live.append(live)
+
+        self.doc_count = int(sum(live.sum() for live in self.live))
+        total_length = sum(
+            int(segment.lengths[live].sum())
+            for segment, live in zip(self.segments, self.live)
+        )
+        self.avg_doc_length = total_length / self.doc_count if self.doc_count else 0
+
+        # Key: chunk id, Value: (segment number, doc number), built on first use
+        self._locations: Optional[Dict[str, Tuple[int, int]]] = None
+
+    def __len__(self) -> int:
+        return self.doc_count
+
+    def get_scores(self, query: str) -> np.ndarray:
+        """
+        Get the BM25 score of every chunk for a query
+
+        Returns:
+            Scores of the chunks of all segments in order, 0 for deleted chunks
+        """
+        scores = [np.zeros(len(segment), dtype=np.float32) for segment in self.segments]
+        for term in tokenize(query):
+            hits = []
+            df = 0
+            for idx, (segment, live) in enumerate(zip(self.segments, self.live)):
+                postings = segment.get_postings(term)
+                if postings is None:
+                    continue
+                docs, tfs = postings
+                mask = live[docs]
+                if mask.any():
+                    hits.append((idx, docs[mask], tfs[mask].astype(np.float32)))
+                    df += int(mask.sum())
+
+            if not df:
+                continue
+
+            # Lucene IDF, see BM25_K1
+            idf = math.log((self.doc_count - df + 0.5) / (df + 0.5) + 1)
+            for idx, docs, tfs in hits:
+                lengths = self.segments[idx].lengths[docs]
+                scores[idx][docs] += (
+                    idf
+                    * tfs
+                    * (BM25_K1 + 1)
+                    / (
+                        tfs
+                        + BM25_K1
+                        * (1 - BM25_B + BM25_B * lengths / self.avg_doc_length)
+                    )
+                )
+
+        if not scores:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(scores)
+
+    def search(self, query: str, k: int) -> list[Document]:
+        """
+        Get the k chunks with the highest BM25 score for a query
+
+        Args:
+            query: Query text
+            k: Maximum number of chunks
+
+        Returns:
+            Chunks containing query terms, best first
+        """
+        if not self.doc_count or k <= 0:
+            return []
+
+        all_scores = self.get_scores(query)
+        candidates = np.flatnonzero(all_scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-all_scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-all_scores[candidates], kind="stable")]
+
+        starts = np.cumsum([0] + [len(segment) for segment in self.segments])
+        documents = []
+        for candidate in candidates:
+            idx = int(np.searchsorted(starts, candidate, side="right")) - 1
+            doc = int(candidate - starts[idx])
+            text, metadata = self.segments[idx].get_record(doc)
+            documents.append(
+                Document(
+                    id=self.segments[idx].ids[doc],
+                    page_content=text,
+                    metadata=metadata or {},
+                )
+            )
+        return documents
+
+    def get_vectors(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Get the stored embeddings of chunks
+
+        Args:
+            ids: Chunk ids
+
+        Returns:
+            Mapping of chunk id to embedding, for the chunks that have one
+        """
+        if self._locations is None:
+            locations = {}
+            for idx, live in enumerate(self.live):
+                segment = self.segments[idx]
+                if segment.vectors is None:
+                    continue
+                for doc in np.flatnonzero(live):
+                    locations[segment.ids[doc]] = (idx, int(doc))
+            self._locations = locations
+
+        vectors = {}
+        for chunk_id in ids:
+            location = self._locations.get(chunk_id)
+            if location is None:
+                continue
+            vector = self.segments[location[0]].vectors[location[1]]
+            if not np.isnan(vector).any():
+                vectors[chunk_id] = vector
+        return vectors
+
+    def iter_live(self) -> Iterator[Tuple[int, int]]:
+        """Yield (segment number, doc number) of every chunk not deleted"""
+        for idx, live in enumerate(self.live):
+            for doc in np.flatnonzero(live):
+                yield idx, int(doc)
+
+
+####################
+# Index store
+####################
+
+
+def _matches_filter(metadata: Any, filter: Dict) -> bool:
+    if not isinstance(metadata, dict):
+        return False
+    return all(metadata.get(key) == value for key, value in filter.items())
+
+
+class BM25IndexStore:
+    """
+    Persistent BM25 indexes, one directory per collection.
+
+    A collection index is a list of segments plus deleted chunks, recorded in
+    manifest.json. Inserts add a segment, deletes only mark chunks, and the
+    segments are merged once too many accumulate. Writers of a collection are
+    serialized with a file lock, so workers sharing the data directory can
+    update the same index; readers reload when the manifest is replaced.
+
+    The manifest also records the collection version the index is current
+    with (see CollectionVersions). An index that falls behind, e.g. after
+    another instance with its own data directory wrote to the collection, is
+    brought up to date from the vector DB by indexing only the chunks that
+    were added or changed.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+        # Key: index directory, Value: (manifest stat, BM25Index), least recently used first
+        self._cache: OrderedDict[str, Tuple[tuple, BM25Index]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _get_path(self, collection_name: str) -> str:
+        digest = hashlib.sha256(collection_name.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest)
+
+    def _lock(self, path: str) -> FileLock:
+        os.makedirs(self.root, exist_ok=True)
+        return FileLock(f"{path}.lock")
+
+    @staticmethod
+    def _read_manifest(path: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(path, "manifest.json"), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write_manifest(path: str, manifest: dict) -> None:
+        os.makedirs(path, exist_ok=True)
+        tmp_path = os.path.join(path, f"manifest.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(path, "manifest.json"))
+
+    def exists(self, collection_name: str) -> bool:
+        path = self._get_path(collection_name)
+        return os.path.exists(os.path.join(path, "manifest.json"))
+
+    def load(self, collection_name: str) -> Optional[BM25Index]:
+        """Get the current index of a collection, None if it has none"""
+        path = self._get_path(collection_name)
+
+        # Segments may be merged away between reading the manifest and
+        # opening them, in which case the manifest has been replaced
+        for _ in range(3):
+            try:
+                stat = os.stat(os.path.join(path, "manifest.json"))
+            except FileNotFoundError:
+                return None
+            version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+            with self._cache_lock:
+                cached = self._cache.get(path)
+                if cached is not None and cached[0] == version:
+                    self._cache.move_to_end(path)
+                    return cached[1]
+
+            try:
+                manifest = self._read_manifest(path)
+                if manifest is None:
+                    return None
+                index = BM25Index(path, manifest)
+            except FileNotFoundError:
+                continue
+
+            with self._cache_lock:
+                self._cache[path] = (version, index)
+                self._cache.move_to_end(path)
+                while len(self._cache) > MAX_CACHED_INDEXES:
+                    self._cache.popitem(last=False)
+            return index
+
+        raise RuntimeError(f"BM25 index of {collection_name} keeps changing")
+
+    def get_or_build(
+        self,
+        collection_name: str,
+        vector_db: VectorDBBase,
+        version: Optional[int] = None,
+    ) -> Optional[BM25Index]:
+        """
+        Get the index of a collection, building or updating it from the
+        vector DB if missing or behind
+
+        Args:
+            collection_name: Collection name
+            vector_db: Vector DB holding the collection
+            version: Current version of the collection, None to accept any index
+
+        Returns:
+            The index, None if the collection does not exist
+        """
+        index = self.load(collection_name)
+        if index is not None and (
+            version is None or index.manifest.get("version") == version
+        ):
+            return index
+
+        path = self._get_path(collection_name)
+        with self._lock(path):
+            manifest = self._read_manifest(path)
+            if manifest is None or (
+                version is not None and manifest.get("version") != version
+            ):
+                if not self._sync(path, collection_name, manifest, vector_db, version):
+                    return None
+
+        return self.load(collection_name)
+
+    def _sync(
+        self,
+        path: str,
+        collection_name: str,
+        manifest: Optional[dict],
+        vector_db: VectorDBBase,
+        version: Optional[int],
+    ) -> bool:
+        """
+        Index the chunks of the vector DB that the index lacks or has with
+        other content, and delete the ones no longer in the vector DB
+
+        Returns:
+            False if the collection has no chunks, its index is then removed
+        """
+        result = vector_db.get(collection_name=collection_name)
+        if result is None or not result.ids or not result.ids[0]:
+            shutil.rmtree(path, ignore_errors=True)
+            return False
+
+        if manifest is None:
+            log.info(f"Building BM25 index of {collection_name}")
+            manifest = {"collection_name": collection_name, "segments": []}
+        else:
+            log.info(f"Updating BM25 index of {collection_name}")
+
+        # Key: chunk id, Value: indexed record of the chunk
+        indexed = {}
+        index = BM25Index(path, manifest)
+        for idx, doc in index.iter_live():
+            segment = index.segments[idx]
+            indexed[segment.ids[doc]] = segment.get_record_bytes(doc)
+
+        ids, texts, metadatas = [], [], []
+        for chunk_id, text, metadata in zip(
+            result.ids[0], result.documents[0], result.metadatas[0]
+        ):
+            if indexed.pop(chunk_id, None) != BM25Segment.encode_record(text, metadata):
+                ids.append(chunk_id)
+                texts.append(text)
+                metadatas.append(metadata)
+
+        # Stored with the index for scoring without a reranker
+        embeddings = {}
+        if ids:
+            try:
+                embeddings = vector_db.get_embeddings(collection_name, ids)
+            except Exception as e:
+                log.exception(f"Error getting embeddings of {collection_name}: {e}")
+
+        # Left in indexed: chunks deleted from the vector DB
+        os.makedirs(path, exist_ok=True)
+        self._delete_ids(path, manifest, set(ids) | set(indexed))
+        if ids:
+            manifest["segments"].append(
+                BM25Segment.write(
+                    path,
+                    ids,
+                    texts,
+                    metadatas,
+                    [embeddings.get(chunk_id) for chunk_id in ids],
+                )
+            )
+
+        manifest["version"] = version
+        self._commit(path, manifest)
+        return True
+
+    @staticmethod
+    def _set_version(
+        manifest: dict, version_before: Optional[int], version_after: Optional[int]
+    ) -> None:
+        # The index is only current after a change if it was before it
+        if manifest.get("version") == version_before:
+            manifest["version"] = version_after
+
+    def add(
+        self,
+        collection_name: str,
+        items: List[VectorItem],
+        version_before: Optional[int] = None,
+        version_after: Optional[int] = None,
+        create: bool = False,
+    ) -> None:
+        """
+        Index inserted or updated chunks, if the collection has an index
+
+        Args:
+            collection_name: Collection name
+            items: Chunks, replacing indexed chunks with the same id
+            version_before: Version of the collection before the write
+            version_after: Version of the collection after the write
+            create: Create the index if missing, for a collection that only
+                holds these chunks
+        """
+        items = [
+            item if isinstance(item, dict) else item.model_dump() for item in items
+        ]
+        ids = [item["id"] for item in items]
+        texts = [item["text"] for item in items]
+        metadatas = [item.get("metadata") for item in items]
+        vectors = [item.get("vector") for item in items]
+
+        path = self._get_path(collection_name)
+        with self._lock(path):
+            manifest = self._read_manifest(path)
+            if manifest is None:
+                if not create:
+                    return
+                os.makedirs(path, exist_ok=True)
+                manifest = {
+                    "collection_name": collection_name,
+                    "version": version_before,
+                    "segments": [],
+                }
+
+            self._delete_ids(path, manifest, set(ids))
+            if ids:
+                manifest["segments"].append(
+                    BM25Segment.write(path, ids, texts, metadatas, vectors)
+                )
+
+            self._set_version(manifest, version_before, version_after)
+            self._commit(path, manifest)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+        version_before: Optional[int] = None,
+        version_after: Optional[int] = None,
+    ) -> None:
+        """Remove chunks by id or by metadata equality filter, see add()"""
+        path = self._get_path(collection_name)
+        with self._lock(path):
+            manifest = self._read_manifest(path)
+            if manifest is None:
+                return
+
+            if filter and any(isinstance(value, dict) for value in filter.values()):
+                # Operator filters are not evaluated here, the index is
+                # updated from the vector DB on the next search
+                manifest["version"] = None
+                self._write_manifest(path, manifest)
+                return
+
+            deleted = 0
+            if ids:
+                deleted = self._delete_ids(path, manifest, set(ids))
+            elif filter:
+                index = BM25Index(path, manifest)
+                for idx, doc in index.iter_live():
+                    _, metadata = index.segments[idx].get_record(doc)
+                    if _matches_filter(metadata, filter):
+                        manifest["segments"][idx]["deleted"].append(doc)
+                        deleted += 1
+
+            version = manifest.get("version")
+            self._set_version(manifest, version_before, version_after)
+            if deleted or manifest.get("version") != version:
+                self._commit(path, manifest)
+
+    def invalidate(self, collection_name: str) -> None:
+        """Mark the index of a collection as behind, see get_or_build()"""
+        path = self._get_path(collection_name)
+        with self._lock(path):
+            manifest = self._read_manifest(path)
+            if manifest is not None:
+                manifest["version"] = None
+                self._write_manifest(path, manifest)
+
+    @staticmethod
+    def _delete_ids(path: str, manifest: dict, ids: set) -> int:
+        deleted = 0
+        for entry in manifest["segments"]:
+            already_deleted = set(entry["deleted"])
+            for doc, chunk_id in enumerate(BM25Segment.read_ids(path, entry["name"])):
+                if chunk_id in ids and doc not in already_deleted:
+                    entry["deleted"].append(doc)
+                    deleted += 1
+        return deleted
+
+    def _commit(self, path: str, manifest: dict) -> None:
+        # Drop fully deleted segments, and merge when too fragmented
+        removed = [
+            entry["name"]
+            for entry in manifest["segments"]
+            if len(entry["deleted"]) >= entry["size"]
+        ]
+        manifest["segments"] = [
+            entry for entry in manifest["segments"] if entry["name"] not in removed
+        ]
+
+        total = sum(entry["size"] for entry in manifest["segments"])
+        deleted = sum(len(entry["deleted"]) for entry in manifest["segments"])
+        if len(manifest["segments"]) > MAX_SEGMENTS or (
+            total and deleted / total > MAX_DELETED_RATIO
+        ):
+            index = BM25Index(path, manifest)
+            ids, texts, metadatas, vectors = [], [], [], []
+            for segment, live in zip(index.segments, index.live):
+                for doc in np.flatnonzero(live):
+                    text, metadata = segment.get_record(int(doc))
+                    ids.append(segment.ids[doc])
+                    texts.append(text)
+                    metadatas.append(metadata)
+
+                    vector = (
+                        segment.vectors[doc] if segment.vectors is not None else None
+                    )
+                    vectors.append(
+                        None
+                        if vector is None or np.isnan(vector).any()
+                        else vector.tolist()
+                    )
+
+            removed.extend(entry["name"] for entry in manifest["segments"])
+            manifest["segments"] = []
+            if ids:
+                manifest["segments"].append(
+                    BM25Segment.write(path, ids, texts, metadatas, vectors)
+                )
+
+        self._write_manifest(path, manifest)
+        for name in removed:
+            BM25Segment.remove(path, name)
+
+    def delete_collection(self, collection_name: str) -> None:
+        path = self._get_path(collection_name)
+        with self._lock(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+    def reset(self) -> None:
+        for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path):
+                with self._lock(path):
+                    shutil.rmtree(path, ignore_errors=True)
+
+
+####################
+# Vector DB client
+####################
+
+
+class BM25IndexedClient(VectorDBBase):
+    """
+    Vector DB client that keeps the BM25 index of each collection in step
+    with its inserts, upserts and deletes. A new collection is indexed from
+    the chunks of its first insert, a collection written before indexes were
+    kept is indexed from the vector DB on its next insert or hybrid search.
+    While ``build_on_insert`` returns False (hybrid search is off) writes
+    only keep existing indexes up to date; other collections are indexed on
+    their first hybrid search. Every write is counted in the collection's
+    version, which tells other instances that their copy of the index is
+    behind. All other calls go to the wrapped client unchanged.
+    """
+
+    def __init__(
+        self,
+        client: VectorDBBase,
+        store: BM25IndexStore,
+        versions,
+        build_on_insert: Callable[[], bool] = lambda: True,
+    ):
+        self.client = client
+        self.bm25 = store
+        self.versions = versions
+        self.build_on_insert = build_on_insert
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def get_bm25_index(self, collection_name: str) -> Optional[BM25Index]:
+        return self.bm25.get_or_build(
+            collection_name,
+            self.client,
+            self.versions.get_version(collection_name),
+        )
+
+    def _update_index(self, collection_name: str, update) -> None:
+        # The vector DB is the source of truth: an index that could not be
+        # updated is dropped and rebuilt from it on the next search
+        try:
+            update()
+        except Exception as e:
+            log.exception(f"Error updating BM25 index of {collection_name}: {e}")
+            try:
+                self.bm25.delete_collection(collection_name)
+            except Exception:
+                pass
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.has_collection(collection_name)
+
+    def delete_collection(self, collection_name: str) -> None:
+        self.client.delete_collection(collection_name)
+
+        def update():
+            self.versions.increment(collection_name)
+            self.bm25.delete_collection(collection_name)
+
+        self._update_index(collection_name, update)
+
+    def _write(
+        self,
+        collection_name: str,
+        write,
+        update,
+        items: Optional[List[VectorItem]] = None,
+    ) -> None:
+        indexed = self.bm25.exists(collection_name)
+        # Without hybrid search an index has no reader, but doubles the
+        # embeddings stored on disk
+        build = items is not None and not indexed and self.build_on_insert()
+        new = build and not self.client.has_collection(collection_name)
+
+        try:
+            write()
+        except Exception:
+            # Some of the changes may have been written before the failure
+            def invalidate():
+                self.versions.increment(collection_name)
+                self.bm25.invalidate(collection_name)
+
+            self._update_index(collection_name, invalidate)
+            raise
+
+        def update_index():
+            version = self.versions.increment(collection_name)
+            if indexed:
+                update(version - 1, version)
+            elif new:
+                self.bm25.add(collection_name, items, version - 1, version, create=True)
+            elif build:
+                # Chunks written before indexes were kept are in the vector DB only
+                self.bm25.get_or_build(collection_name, self.client, version)
+
+        self._update_index(collection_name, update_index)
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        self._write(
+            collection_name,
+            lambda: self.client.insert(collection_name, items),
+            lambda *versions: self.bm25.add(collection_name, items, *versions),
+            items,
+        )
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        self._write(
+            collection_name,
+            lambda: self.client.upsert(collection_name, items),
+            lambda *versions: self.bm25.add(collection_name, items, *versions),
+            items,
+        )
+
+    def search(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        return self.client.search(collection_name, vectors, limit)
+
+    def search_collections(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+    ) -> Dict[str, Optional[SearchResult]]:
+        return self.client.search_collections(collection_names, vectors, limit)
+
+    def query(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return self.client.query(collection_name, filter, limit)
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        return self.client.get(collection_name)
+
+    def get_embeddings(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, List[float]]:
+        return self.client.get_embeddings(collection_name, ids)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        self._write(
+            collection_name,
+            lambda: self.client.delete(collection_name, ids=ids, filter=filter),
+            lambda *versions: self.bm25.delete(collection_name, ids, filter, *versions),
+        )
+
+    def reset(self) -> None:
+        self.client.reset()
+        try:
+            self.bm25.reset()
+            self.versions.increment_all()
+        except Exception as e:
+            log.exception(f"Error resetting BM25 indexes: {e}")
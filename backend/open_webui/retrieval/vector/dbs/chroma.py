@@ -137,6 +137,21 @@ class ChromaClient(VectorDBBase):
             )
         return None
 
+    def get_embeddings(
+        self, collection_name: str, ids: list[str]
+    ) -> dict[str, list[float]]:
+        try:
+            collection = self.client.get_collection(name=collection_name)
+            result = collection.get(ids=ids, include=["embeddings"])
+        except Exception as e:
+            log.exception(f"Error getting embeddings: {e}")
+            return {}
+        return {
+            chunk_id: list(embedding)
+            for chunk_id, embedding in zip(result["ids"], result["embeddings"])
+            if embedding is not None
+        }
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection = self.client.get_or_create_collection(
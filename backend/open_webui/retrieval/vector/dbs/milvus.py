@@ -32,6 +32,9 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
 class MilvusClient(VectorDBBase):
+    # search() sends all query vectors in one request
+    multi_vector_search = True
+
     def __init__(self):
         self.collection_prefix = "open_webui"
         if MILVUS_TOKEN is None:
@@ -35,6 +35,9 @@ RESOURCE_ID_FIELD = "resource_id"
 
 
 class MilvusClient(VectorDBBase):
+    # search() sends all query vectors in one request
+    multi_vector_search = True
+
     def __init__(self):
         # Milvus collection names can only contain numbers, letters, and underscores.
         self.collection_prefix = MILVUS_COLLECTION_PREFIX.replace("-", "_")
@@ -21,7 +21,7 @@ from sqlalchemy.sql import true
 from sqlalchemy.pool import NullPool, QueuePool
 
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.dialects.postgresql import JSONB, array, insert
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
@@ -44,6 +44,7 @@ from open_webui.config import (
     PGVECTOR_POOL_MAX_OVERFLOW,
     PGVECTOR_POOL_TIMEOUT,
     PGVECTOR_POOL_RECYCLE,
+    PGVECTOR_INSERT_BATCH_SIZE,
 )
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -223,56 +224,56 @@ class PgvectorClient(VectorDBBase):
             vector = vector[:VECTOR_LENGTH]
         return vector
 
-    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
-        try:
-            if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    # Use raw SQL for BYTEA/pgcrypto
-                    # Ensure metadata is converted to its JSON text representation
-                    json_metadata = json.dumps(item["metadata"])
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata_text, :key)
-                            )
-                            ON CONFLICT (id) DO NOTHING
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata_text": json_metadata,
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
-                self.session.commit()
-                log.info(f"Encrypted & inserted {len(items)} into '{collection_name}'")
+    def _get_row(self, collection_name: str, item: VectorItem) -> Dict[str, Any]:
+        row = {
+            "id": item["id"],
+            "vector": self.adjust_vector_length(item["vector"]),
+            "collection_name": collection_name,
+        }
+        if PGVECTOR_PGCRYPTO:
+            # Ensure metadata is converted to its JSON text representation
+            row["text"] = pgcrypto_encrypt(item["text"], PGVECTOR_PGCRYPTO_KEY)
+            row["vmetadata"] = pgcrypto_encrypt(
+                json.dumps(item["metadata"]), PGVECTOR_PGCRYPTO_KEY
+            )
+        else:
+            row["text"] = item["text"]
+            row["vmetadata"] = process_metadata(item["metadata"])
+        return row
 
-            else:
-                new_items = []
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=process_metadata(item["metadata"]),
-                    )
-                    new_items.append(new_chunk)
-                self.session.bulk_save_objects(new_items)
-                self.session.commit()
-                log.info(
-                    f"Inserted {len(new_items)} items into collection '{collection_name}'."
+    def _write(
+        self, collection_name: str, items: List[VectorItem], update: bool
+    ) -> None:
+        # One multi-row INSERT ... ON CONFLICT and commit per batch of rows
+        for i in range(0, len(items), PGVECTOR_INSERT_BATCH_SIZE):
+            stmt = insert(DocumentChunk).values(
+                [
+                    self._get_row(collection_name, item)
+                    for item in items[i : i + PGVECTOR_INSERT_BATCH_SIZE]
+                ]
+            )
+            if update:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[DocumentChunk.id],
+                    set_={
+                        "vector": stmt.excluded.vector,
+                        "collection_name": stmt.excluded.collection_name,
+                        "text": stmt.excluded.text,
+                        "vmetadata": stmt.excluded.vmetadata,
+                    },
                 )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=[DocumentChunk.id])
+
+            self.session.execute(stmt)
+            self.session.commit()
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        try:
+            self._write(collection_name, items, update=False)
+            log.info(
+                f"Inserted {len(items)} items into collection '{collection_name}'."
+            )
         except Exception as e:
             self.session.rollback()
             log.exception(f"Error during insert: {e}")
@@ -280,66 +281,13 @@ class PgvectorClient(VectorDBBase):
 
     def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
-            if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    json_metadata = json.dumps(item["metadata"])
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata_text, :key)
-                            )
-                            ON CONFLICT (id) DO UPDATE SET
-                              vector = EXCLUDED.vector,
-                              collection_name = EXCLUDED.collection_name,
-                              text = EXCLUDED.text,
-                              vmetadata = EXCLUDED.vmetadata
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata_text": json_metadata,
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
-                self.session.commit()
-                log.info(f"Encrypted & upserted {len(items)} into '{collection_name}'")
-            else:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    existing = (
-                        self.session.query(DocumentChunk)
-                        .filter(DocumentChunk.id == item["id"])
-                        .first()
-                    )
-                    if existing:
-                        existing.vector = vector
-                        existing.text = item["text"]
-                        existing.vmetadata = process_metadata(item["metadata"])
-                        existing.collection_name = (
-                            collection_name  # Update collection_name if necessary
-                        )
-                    else:
-                        new_chunk = DocumentChunk(
-                            id=item["id"],
-                            vector=vector,
-                            collection_name=collection_name,
-                            text=item["text"],
-                            vmetadata=process_metadata(item["metadata"]),
-                        )
-                        self.session.add(new_chunk)
-                self.session.commit()
-                log.info(
-                    f"Upserted {len(items)} items into collection '{collection_name}'."
-                )
+            # A statement may not update the same row twice, keep the last item
+            items = list({item["id"]: item for item in items}.values())
+
+            self._write(collection_name, items, update=True)
+            log.info(
+                f"Upserted {len(items)} items into collection '{collection_name}'."
+            )
         except Exception as e:
             self.session.rollback()
             log.exception(f"Error during upsert: {e}")
@@ -355,106 +303,154 @@ class PgvectorClient(VectorDBBase):
             if not vectors:
                 return None
 
-            # Adjust query vectors to VECTOR_LENGTH
-            vectors = [self.adjust_vector_length(vector) for vector in vectors]
-            num_queries = len(vectors)
+            return self._search(
+                [(collection_name, vector) for vector in vectors], limit
+            )
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during search: {e}")
+            return None
 
-            def vector_expr(vector):
-                return cast(array(vector), Vector(VECTOR_LENGTH))
+    def search_collections(
+        self,
+        collection_names: List[str],
+        vectors: List[List[float]],
+        limit: int,
+    ) -> Dict[str, Optional[SearchResult]]:
+        # Every (collection, vector) pair in a single LATERAL query
+        try:
+            if not collection_names or not vectors:
+                return {collection_name: None for collection_name in collection_names}
+
+            result = self._search(
+                [
+                    (collection_name, vector)
+                    for collection_name in collection_names
+                    for vector in vectors
+                ],
+                limit,
+            )
 
-            # Create the values for query vectors
-            qid_col = column("qid", Integer)
-            q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
-            query_vectors = (
-                values(qid_col, q_vector_col)
-                .data(
-                    [(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)]
+            num_vectors = len(vectors)
+            results = {}
+            for idx, collection_name in enumerate(collection_names):
+                rows = slice(idx * num_vectors, (idx + 1) * num_vectors)
+                results[collection_name] = SearchResult(
+                    ids=result.ids[rows],
+                    distances=result.distances[rows],
+                    documents=result.documents[rows],
+                    metadatas=result.metadatas[rows],
                 )
-                .alias("query_vectors")
+            return results
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during search: {e}")
+            return {collection_name: None for collection_name in collection_names}
+
+    def _search(
+        self, queries: List[tuple[str, List[float]]], limit: Optional[int]
+    ) -> SearchResult:
+        # Adjust query vectors to VECTOR_LENGTH
+        queries = [
+            (collection_name, self.adjust_vector_length(vector))
+            for collection_name, vector in queries
+        ]
+        num_queries = len(queries)
+
+        def vector_expr(vector):
+            return cast(array(vector), Vector(VECTOR_LENGTH))
+
+        # Create the values for query vectors
+        qid_col = column("qid", Integer)
+        q_collection_col = column("q_collection", Text)
+        q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
+        query_vectors = (
+            values(qid_col, q_collection_col, q_vector_col)
+            .data(
+                [
+                    (idx, collection_name, vector_expr(vector))
+                    for idx, (collection_name, vector) in enumerate(queries)
+                ]
             )
+            .alias("query_vectors")
+        )
 
-            result_fields = [
-                DocumentChunk.id,
-            ]
-            if PGVECTOR_PGCRYPTO:
-                result_fields.append(
-                    pgcrypto_decrypt(
-                        DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text
-                    ).label("text")
-                )
-                result_fields.append(
-                    pgcrypto_decrypt(
-                        DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                    ).label("vmetadata")
-                )
-            else:
-                result_fields.append(DocumentChunk.text)
-                result_fields.append(DocumentChunk.vmetadata)
+        result_fields = [
+            DocumentChunk.id,
+        ]
+        if PGVECTOR_PGCRYPTO:
             result_fields.append(
-                (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
-                    "distance"
+                pgcrypto_decrypt(DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text).label(
+                    "text"
                 )
             )
-
-            # Build the lateral subquery for each query vector
-            subq = (
-                select(*result_fields)
-                .where(DocumentChunk.collection_name == collection_name)
-                .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
-                )
+            result_fields.append(
+                pgcrypto_decrypt(
+                    DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
+                ).label("vmetadata")
             )
-            if limit is not None:
-                subq = subq.limit(limit)
-            subq = subq.lateral("result")
-
-            # Build the main query by joining query_vectors and the lateral subquery
-            stmt = (
-                select(
-                    query_vectors.c.qid,
-                    subq.c.id,
-                    subq.c.text,
-                    subq.c.vmetadata,
-                    subq.c.distance,
-                )
-                .select_from(query_vectors)
-                .join(subq, true())
-                .order_by(query_vectors.c.qid, subq.c.distance)
+        else:
+            result_fields.append(DocumentChunk.text)
+            result_fields.append(DocumentChunk.vmetadata)
+        result_fields.append(
+            (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
+                "distance"
             )
+        )
+
+        # Build the lateral subquery for each query vector
+        subq = (
+            select(*result_fields)
+            .where(DocumentChunk.collection_name == query_vectors.c.q_collection)
+            .order_by((DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)))
+        )
+        if limit is not None:
+            subq = subq.limit(limit)
+        subq = subq.lateral("result")
+
+        # Build the main query by joining query_vectors and the lateral subquery
+        stmt = (
+            select(
+                query_vectors.c.qid,
+                subq.c.id,
+                subq.c.text,
+                subq.c.vmetadata,
+                subq.c.distance,
+            )
+            .select_from(query_vectors)
+            .join(subq, true())
+            .order_by(query_vectors.c.qid, subq.c.distance)
+        )
 
-            result_proxy = self.session.execute(stmt)
-            results = result_proxy.all()
-
-            ids = [[] for _ in range(num_queries)]
-            distances = [[] for _ in range(num_queries)]
-            documents = [[] for _ in range(num_queries)]
-            metadatas = [[] for _ in range(num_queries)]
-
-            if not results:
-                return SearchResult(
-                    ids=ids,
-                    distances=distances,
-                    documents=documents,
-                    metadatas=metadatas,
-                )
+        result_proxy = self.session.execute(stmt)
+        results = result_proxy.all()
 
-            for row in results:
-                qid = int(row.qid)
-                ids[qid].append(row.id)
-                # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
-                # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
-                distances[qid].append((2.0 - row.distance) / 2.0)
-                documents[qid].append(row.text)
-                metadatas[qid].append(row.vmetadata)
+        ids = [[] for _ in range(num_queries)]
+        distances = [[] for _ in range(num_queries)]
+        documents = [[] for _ in range(num_queries)]
+        metadatas = [[] for _ in range(num_queries)]
 
-            self.session.rollback()  # read-only transaction
+        if not results:
             return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
+                ids=ids,
+                distances=distances,
+                documents=documents,
+                metadatas=metadatas,
             )
-        except Exception as e:
-            self.session.rollback()
-            log.exception(f"Error during search: {e}")
-            return None
+
+        for row in results:
+            qid = int(row.qid)
+            ids[qid].append(row.id)
+            # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
+            # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
+            distances[qid].append((2.0 - row.distance) / 2.0)
+            documents[qid].append(row.text)
+            metadatas[qid].append(row.vmetadata)
+
+        self.session.rollback()  # read-only transaction
+        return SearchResult(
+            ids=ids, distances=distances, documents=documents, metadatas=metadatas
+        )
 
     def query(
         self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
@@ -560,6 +556,28 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during get: {e}")
             return None
 
+    def get_embeddings(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, List[float]]:
+        try:
+            embeddings = {}
+            for i in range(0, len(ids), PGVECTOR_INSERT_BATCH_SIZE):
+                rows = self.session.execute(
+                    select(DocumentChunk.id, DocumentChunk.vector).where(
+                        DocumentChunk.collection_name == collection_name,
+                        DocumentChunk.id.in_(ids[i : i + PGVECTOR_INSERT_BATCH_SIZE]),
+                    )
+                ).all()
+                for row in rows:
+                    if row.vector is not None:
+                        embeddings[row.id] = row.vector.tolist()
+            self.session.rollback()  # read-only transaction
+            return embeddings
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error getting embeddings: {e}")
+            return {}
+
     def delete(
         self,
         collection_name: str,
@@ -1,6 +1,10 @@
 from open_webui.retrieval.vector.main import VectorDBBase
 from open_webui.retrieval.vector.type import VectorType
+from open_webui.retrieval.vector.bm25 import BM25IndexedClient, BM25IndexStore
+from open_webui.models.collection_versions import CollectionVersions
 from open_webui.config import (
+    BM25_INDEX_DIR,
+    ENABLE_RAG_HYBRID_SEARCH,
     VECTOR_DB,
     ENABLE_QDRANT_MULTITENANCY_MODE,
     ENABLE_MILVUS_MULTITENANCY_MODE,
@@ -71,4 +75,10 @@ class Vector:
                 raise ValueError(f"Unsupported vector type: {vector_type}")
 
 
-VECTOR_DB_CLIENT = Vector.get_vector(VECTOR_DB)
+VECTOR_DB_CLIENT = BM25IndexedClient(
+    Vector.get_vector(VECTOR_DB),
+    BM25IndexStore(BM25_INDEX_DIR),
+    CollectionVersions,
+    # The same PersistentConfig as app.state.config.ENABLE_RAG_HYBRID_SEARCH
+    build_on_insert=lambda: ENABLE_RAG_HYBRID_SEARCH.value,
+)
@@ -1,7 +1,14 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Union
 
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
 
 class VectorItem(BaseModel):
     id: str
@@ -31,6 +38,9 @@ class VectorDBBase(ABC):
     implement all abstract methods.
     """
 
+    # Set by backends whose search() answers several query vectors in one request
+    multi_vector_search: bool = False
+
     @abstractmethod
     def has_collection(self, collection_name: str) -> bool:
         """Check if the collection exists in the vector DB."""
@@ -58,6 +68,64 @@ class VectorDBBase(ABC):
         """Search for similar vectors in a collection."""
         pass
 
+    def search_collections(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+    ) -> Dict[str, Optional[SearchResult]]:
+        """
+        Search several collections with the same query vectors.
+
+        Each result holds one row per query vector, like search(). A collection
+        that could not be searched maps to None. By default the collections are
+        searched concurrently, with one search() per vector unless the backend
+        sets multi_vector_search. Backends that can search several collections
+        in one request should override this.
+        """
+        if self.multi_vector_search:
+            tasks = [(collection_name, vectors) for collection_name in collection_names]
+        else:
+            tasks = [
+                (collection_name, [vector])
+                for collection_name in collection_names
+                for vector in vectors
+            ]
+
+        def search_task(collection_name, task_vectors):
+            try:
+                return self.search(collection_name, task_vectors, limit)
+            except Exception as e:
+                log.exception(f"Error searching collection {collection_name}: {e}")
+                return None
+
+        with ThreadPoolExecutor() as executor:
+            futures = [executor.submit(search_task, *task) for task in tasks]
+            task_results = [future.result() for future in futures]
+
+        if self.multi_vector_search:
+            return dict(zip(collection_names, task_results))
+
+        results: Dict[str, Optional[SearchResult]] = {}
+        searched = set()
+        for (collection_name, _), result in zip(tasks, task_results):
+            merged = results.setdefault(
+                collection_name,
+                SearchResult(ids=[], documents=[], metadatas=[], distances=[]),
+            )
+            if result is not None:
+                searched.add(collection_name)
+
+            # A failed vector leaves an empty row
+            for field in ("ids", "documents", "metadatas", "distances"):
+                rows = getattr(result, field, None) if result is not None else None
+                getattr(merged, field).append(rows[0] if rows else [])
+
+        return {
+            collection_name: result if collection_name in searched else None
+            for collection_name, result in results.items()
+        }
+
     @abstractmethod
     def query(
         self, collection_name: str, filter: Dict, limit: Optional[int] = None
@@ -70,6 +138,17 @@ class VectorDBBase(ABC):
         """Retrieve all vectors from a collection."""
         pass
 
+    def get_embeddings(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, List[float]]:
+        """
+        Get the stored embeddings of chunks of a collection by id.
+
+        Chunks without one are left out. Backends that cannot return
+        embeddings return none, which is the default.
+        """
+        return {}
+
     @abstractmethod
     def delete(
         self,
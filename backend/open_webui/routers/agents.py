@@ -14,6 +14,7 @@ from open_webui.models.agents import (
 from open_webui.models.users import Users
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.jiutian_jwt import jiutian_credentials
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -155,6 +156,8 @@ async def update_agent_by_id(
     try:
         agent = Agents.update_agent_by_id(agent_id, form_data, user.id)
         if agent:
+            jiutian_credentials.invalidate(agent.agent_uid)
+
             # Get the full response with owner info
             owner = Users.get_user_by_id(agent.owner_user_id)
             return AgentResponse(
@@ -193,6 +196,8 @@ async def toggle_agent_by_id(
     try:
         agent = Agents.toggle_agent_by_id(agent_id, user.id)
         if agent:
+            jiutian_credentials.invalidate(agent.agent_uid)
+
             # Get the full response with owner info
             owner = Users.get_user_by_id(agent.owner_user_id)
             return AgentResponse(
@@ -229,8 +234,11 @@ async def delete_agent_by_id(
     Users can only delete agents they own or if they're superadmin.
     """
     try:
+        agent = Agents.get_agent_by_id(agent_id)
         result = Agents.delete_agent_by_id(agent_id, user.id)
         if result:
+            if agent:
+                jiutian_credentials.invalidate(agent.agent_uid)
             return True
         else:
             raise HTTPException(
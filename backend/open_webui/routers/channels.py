@@ -3,12 +3,20 @@ import logging
 from typing import Optional
 
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+    BackgroundTasks,
+)
 from pydantic import BaseModel
 
 
 from open_webui.socket.main import sio, get_user_ids_from_room
-from open_webui.models.users import Users, UserNameResponse
+from open_webui.models.users import UserNameResponse
 
 from open_webui.models.groups import Groups
 from open_webui.models.channels import (
@@ -22,6 +30,7 @@ from open_webui.models.messages import (
     MessageModel,
     MessageResponse,
     MessageForm,
+    encode_message_cursor,
 )
 
 
@@ -39,7 +48,7 @@ from open_webui.utils.chat import generate_chat_completion
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access, get_users_with_access
-from open_webui.utils.webhook import post_webhook
+from open_webui.utils.webhook import webhook_dispatcher
 from open_webui.utils.channels import extract_mentions, replace_mentions
 
 log = logging.getLogger(__name__)
@@ -172,7 +181,12 @@ class MessageUserResponse(MessageResponse):
 
 @router.get("/{id}/messages", response_model=list[MessageUserResponse])
 async def get_channel_messages(
-    id: str, skip: int = 0, limit: int = 50, user=Depends(get_verified_user)
+    id: str,
+    response: Response,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    user=Depends(get_verified_user),
 ):
     channel = Channels.get_channel_by_id(id)
     if not channel:
@@ -187,33 +201,17 @@ async def get_channel_messages(
             status_code=status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.DEFAULT()
         )
 
-    message_list = Messages.get_messages_by_channel_id(id, skip, limit)
-    users = {}
-
-    messages = []
-    for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
-        thread_replies = Messages.get_thread_replies_by_message_id(message.id)
-        latest_thread_reply_at = (
-            thread_replies[0].created_at if thread_replies else None
+    try:
+        message_list = Messages.get_messages_by_channel_id(id, skip, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_MESSAGES.DEFAULT(e)
         )
 
-        messages.append(
-            MessageUserResponse(
-                **{
-                    **message.model_dump(),
-                    "reply_count": len(thread_replies),
-                    "latest_reply_at": latest_thread_reply_at,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
-                    "user": UserNameResponse(**users[message.user_id].model_dump()),
-                }
-            )
-        )
+    if len(message_list) == limit:
+        response.headers["X-Next-Cursor"] = encode_message_cursor(message_list[-1])
 
-    return messages
+    return [MessageUserResponse(**message.model_dump()) for message in message_list]
 
 
 ############################
@@ -223,25 +221,26 @@ async def get_channel_messages(
 
 async def send_notification(name, webui_url, channel, message, active_user_ids):
     users = get_users_with_access("read", channel.access_control)
-
-    for user in users:
-        if user.id not in active_user_ids:
-            if user.settings:
-                webhook_url = user.settings.ui.get("notifications", {}).get(
-                    "webhook_url", None
-                )
-                if webhook_url:
-                    await post_webhook(
-                        name,
-                        webhook_url,
-                        f"#{channel.name} - {webui_url}/channels/{channel.id}\n\n{message.content}",
-                        {
-                            "action": "channel",
-                            "message": message.content,
-                            "title": channel.name,
-                            "url": f"{webui_url}/channels/{channel.id}",
-                        },
-                    )
+    active_user_ids = set(active_user_ids)
+
+    webhook_urls = [
+        user.settings.ui.get("notifications", {}).get("webhook_url", None)
+        for user in users
+        if user.id not in active_user_ids and user.settings
+    ]
+
+    # Delivered in the background by the dispatcher's workers
+    await webhook_dispatcher.enqueue(
+        name,
+        webhook_urls,
+        f"#{channel.name} - {webui_url}/channels/{channel.id}\n\n{message.content}",
+        {
+            "action": "channel",
+            "message": message.content,
+            "title": channel.name,
+            "url": f"{webui_url}/channels/{channel.id}",
+        },
+    )
 
     return True
 
@@ -307,15 +306,9 @@ async def model_response_handler(request, channel, message, user):
 
                 thread_history = []
                 images = []
-                message_users = {}
 
                 for thread_message in thread_messages:
-                    message_user = None
-                    if thread_message.user_id not in message_users:
-                        message_user = Users.get_user_by_id(thread_message.user_id)
-                        message_users[thread_message.user_id] = message_user
-                    else:
-                        message_user = message_users[thread_message.user_id]
+                    message_user = thread_message.user
 
                     if thread_message.meta and thread_message.meta.get(
                         "model_id", None
@@ -539,14 +532,7 @@ async def get_channel_message(
             status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_MESSAGES.DEFAULT()
         )
 
-    return MessageUserResponse(
-        **{
-            **message.model_dump(),
-            "user": UserNameResponse(
-                **Users.get_user_by_id(message.user_id).model_dump()
-            ),
-        }
-    )
+    return MessageUserResponse(**message.model_dump())
 
 
 ############################
@@ -560,8 +546,10 @@ async def get_channel_message(
 async def get_channel_thread_messages(
     id: str,
     message_id: str,
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     user=Depends(get_verified_user),
 ):
     channel = Channels.get_channel_by_id(id)
@@ -577,28 +565,29 @@ async def get_channel_thread_messages(
             status_code=status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.DEFAULT()
         )
 
-    message_list = Messages.get_messages_by_parent_id(id, message_id, skip, limit)
-    users = {}
+    try:
+        message_list = Messages.get_messages_by_parent_id(
+            id, message_id, skip, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_MESSAGES.DEFAULT(e)
+        )
 
-    messages = []
-    for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
+    # The parent ends the last page; a page it completes is not full of replies
+    if len(message_list) == limit and message_list[-1].id != message_id:
+        response.headers["X-Next-Cursor"] = encode_message_cursor(message_list[-1])
 
-        messages.append(
-            MessageUserResponse(
-                **{
-                    **message.model_dump(),
-                    "reply_count": 0,
-                    "latest_reply_at": None,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
-                    "user": UserNameResponse(**users[message.user_id].model_dump()),
-                }
-            )
+    return [
+        MessageUserResponse(
+            **{
+                **message.model_dump(),
+                "reply_count": 0,
+                "latest_reply_at": None,
+            }
         )
-
-    return messages
+        for message in message_list
+    ]
 
 
 ############################
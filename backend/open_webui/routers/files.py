@@ -222,7 +222,7 @@ def upload_file_handler(
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": contents.size,
                         "data": file_metadata,
                     },
                 }
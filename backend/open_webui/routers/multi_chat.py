@@ -13,21 +13,30 @@ from pydantic import BaseModel
 from contextlib import asynccontextmanager
 
 from open_webui.models.agents import Agents, AgentModel
+from open_webui.models.agent_messages import AgentMessages
 from open_webui.models.users import Users
 from open_webui.utils.auth import get_verified_user
-from open_webui.utils.jiutian_jwt import generate_jwt_from_apikey, validate_apikey_format
+from open_webui.utils.jiutian_jwt import jiutian_credentials, validate_apikey_format
+from open_webui.utils.jiutian_client import (
+    JiutianRequestError,
+    jiutian_latency,
+    jiutian_sessions,
+    open_jiutian_stream,
+)
+from open_webui.utils.jiutian_scheduler import agent_call_scheduler
 from open_webui.socket.multi_agent import multi_agent_manager
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    MULTI_AGENT_HISTORY_MAX_TOKENS,
+    MULTI_AGENT_HISTORY_MAX_TURNS,
+    SRC_LOG_LEVELS,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
-# Semaphore to limit concurrent requests
-MAX_CONCURRENT_REQUESTS = 10
-request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
 
 class MultiChatRequest(BaseModel):
@@ -77,11 +86,48 @@ class JiutianStreamParser:
         )
 
 
+_CJK_PATTERN = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate: one token per CJK character, four characters otherwise"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def trim_history(history: List[List[str]], max_tokens: int) -> List[List[str]]:
+    """
+    Keep the most recent history pairs that fit into a token budget
+    
+    Args:
+        history: [question, answer] pairs, oldest first
+        max_tokens: Token budget, 0 disables trimming
+    
+    Returns:
+        Trailing slice of history within the budget
+    """
+    if max_tokens <= 0:
+        return history
+    
+    total = 0
+    start = len(history)
+    for i in range(len(history) - 1, -1, -1):
+        total += sum(estimate_tokens(text) for text in history[i])
+        if total > max_tokens:
+            break
+        start = i
+    
+    return history[start:]
+
+
 async def call_jiutian_api(
     agent: AgentModel,
     message: str,
     history: List[List[str]],
-    conv_id: str
+    conv_id: str,
+    user_id: str
 ) -> None:
     """
     Call Jiutian API for a single agent and stream responses via WebSocket
@@ -91,13 +137,24 @@ async def call_jiutian_api(
         message: User message
         history: Conversation history
         conv_id: Conversation ID for WebSocket routing
+        user_id: User the call is made for (used for fair scheduling)
     """
-    async with request_semaphore:
-        agent_id = agent.agent_uid
-        
+    agent_id = agent.agent_uid
+    config = agent.config.model_dump() if agent.config else {}
+    
+    # Wait for a slot under the global, per-host and per-agent limits
+    async with agent_call_scheduler.slot(
+        user_id,
+        agent_id,
+        agent.api_host,
+        agent_limit=config.get("max_concurrency"),
+        host_limit=config.get("host_max_concurrency"),
+    ):
         try:
-            # Get decrypted API key for the agent
-            api_key = Agents.get_decrypted_api_key(agent.agent_uid)
+            # Get decrypted API key for the agent (cached per agent)
+            api_key = jiutian_credentials.get_api_key(
+                agent.agent_uid, Agents.get_decrypted_api_key
+            )
             if not api_key:
                 error_msg = f"API key not found or invalid for agent {agent.name}"
                 log.error(error_msg)
@@ -123,11 +180,10 @@ async def call_jiutian_api(
                 )
                 return
             
-            # Generate JWT token
-            jwt_token = generate_jwt_from_apikey(api_key, 3600)  # 1 hour expiry
+            # Reuse the cached JWT token until shortly before it expires
+            jwt_token = jiutian_credentials.get_token(agent.agent_uid, api_key)
             
             # Prepare request payload
-            config = agent.config or {}
             payload = {
                 "modelId": config.get("modelId", "jiutian-lan"),
                 "prompt": message,
@@ -163,25 +219,38 @@ async def call_jiutian_api(
             
             timeout = aiohttp.ClientTimeout(total=config.get("timeout", 30))
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(api_url, json=payload, headers=headers) as response:
-                    if response.status != 200:
-                        error_msg = f"API request failed with status {response.status}"
-                        log.error(f"Agent {agent_id}: {error_msg}")
-                        await multi_agent_manager.send_agent_message(
-                            conv_id, agent_id, {
-                                "type": "error",
-                                "content": error_msg,
-                                "finished": True
-                            }
-                        )
-                        return
-                    
-                    # Process streaming response
-                    accumulated_response = ""
-                    parser = JiutianStreamParser()
-                    
-                    async for line in response.content:
+            # Reuse the pooled keep-alive session for this API host
+            session = jiutian_sessions.get_session(agent.api_host)
+            
+            # Optionally hedge slow requests after the agent's p95 latency
+            hedge_delay = None
+            if config.get("hedge_requests"):
+                hedge_delay = jiutian_latency.get_hedge_delay(
+                    agent_id, config.get("hedge_delay")
+                )
+            
+            # Retries and hedging only apply until the first data line arrives
+            async with open_jiutian_stream(
+                session,
+                api_url,
+                payload,
+                headers,
+                timeout,
+                max_retries=config.get("max_retries") or 0,
+                hedge_delay=hedge_delay,
+                latency_key=agent_id,
+            ) as stream:
+                # Process streaming response
+                accumulated_response = ""
+                parser = JiutianStreamParser()
+                
+                # Coalesce deltas into fewer websocket frames
+                emitter = multi_agent_manager.create_delta_emitter(
+                    conv_id, agent_id, agent.name
+                )
+                
+                try:
+                    async for line in stream.iter_lines():
                         line_str = line.decode('utf-8').strip()
                         if not line_str:
                             continue
@@ -196,21 +265,17 @@ async def call_jiutian_api(
                             current_response = data["response"]
                             delta = data.get("delta", "")
                             
-                            # Send delta if available
+                            # Buffer delta if available
                             if delta and delta != "[EOS]":
-                                await multi_agent_manager.send_agent_message(
-                                    conv_id, agent_id, {
-                                        "type": "delta",
-                                        "content": delta,
-                                        "agent_name": agent.name,
-                                        "accumulated": current_response
-                                    }
-                                )
+                                await emitter.add(delta, current_response)
                             
                             accumulated_response = current_response
                         
                         # Check if stream is complete
                         if parser.is_stream_complete(data):
+                            # Flush buffered deltas before the final frame
+                            await emitter.close()
+                            
                             # Send final response
                             final_data = {
                                 "type": "complete",
@@ -230,7 +295,32 @@ async def call_jiutian_api(
                             await multi_agent_manager.send_agent_message(
                                 conv_id, agent_id, final_data
                             )
+                            
+                            # Store the completed turn once, never per delta
+                            usage = data.get("Usage")
+                            AgentMessages.insert_new_message(
+                                conv_id,
+                                user_id,
+                                agent_id,
+                                message,
+                                accumulated_response,
+                                usage if isinstance(usage, dict) else None,
+                            )
                             break
+                finally:
+                    # Flush whatever is still buffered, also on errors
+                    await emitter.close()
+    
+        except JiutianRequestError as e:
+            error_msg = str(e)
+            log.error(f"Agent {agent_id}: {error_msg}")
+            await multi_agent_manager.send_agent_message(
+                conv_id, agent_id, {
+                    "type": "error",
+                    "content": error_msg,
+                    "finished": True
+                }
+            )
         
         except asyncio.TimeoutError:
             error_msg = f"Request timeout for agent {agent.name}"
@@ -270,7 +360,7 @@ async def process_multi_chat_request(
         user_id: User ID
         message: User message
         agent_uids: List of agent UIDs to call
-        history: Conversation history
+        history: Client-supplied history, used only when nothing is stored yet
     """
     try:
         # Get enabled agents
@@ -293,11 +383,26 @@ async def process_multi_chat_request(
             }
         )
         
+        # Rebuild each agent's history window from stored turns
+        stored = AgentMessages.get_recent_messages_by_agent_uids(
+            conv_id,
+            user_id,
+            [agent.agent_uid for agent in agents],
+            MULTI_AGENT_HISTORY_MAX_TURNS,
+        )
+        fallback = history[-MULTI_AGENT_HISTORY_MAX_TURNS:] if MULTI_AGENT_HISTORY_MAX_TURNS > 0 else []
+        
         # Create tasks for concurrent API calls
         tasks = []
         for agent in agents:
+            agent_history = [
+                [turn.prompt, turn.response]
+                for turn in stored.get(agent.agent_uid, [])
+            ] or fallback
+            agent_history = trim_history(agent_history, MULTI_AGENT_HISTORY_MAX_TOKENS)
+            
             task = asyncio.create_task(
-                call_jiutian_api(agent, message, history, conv_id)
+                call_jiutian_api(agent, message, agent_history, conv_id, user_id)
             )
             tasks.append(task)
         
@@ -362,7 +467,7 @@ async def multi_chat(
         background_tasks.add_task(
             process_multi_chat_request,
             conv_id,
-            request.user_id,
+            user.id,
             request.message,
             request.agent_uids,
             request.history or []
@@ -434,6 +539,30 @@ async def get_conversation_status(
         )
 
 
+@router.get("/conversations/{conv_id}/messages")
+async def get_conversation_messages(
+    conv_id: str,
+    user=Depends(get_verified_user)
+):
+    """
+    Get the stored agent answers of a conversation
+    
+    Args:
+        conv_id: Conversation ID
+        user: Authenticated user
+    
+    Returns:
+        Completed agent turns of the user's conversation, oldest first
+    """
+    messages = AgentMessages.get_messages_by_conv_id(conv_id, user.id)
+    
+    return {
+        "conv_id": conv_id,
+        "messages": [message.model_dump() for message in messages],
+        "total": len(messages)
+    }
+
+
 @router.get("/conversations/active")
 async def get_active_conversations(
     user=Depends(get_verified_user)
@@ -476,4 +605,26 @@ async def get_active_conversations(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=ERROR_MESSAGES.DEFAULT()
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/scheduler/metrics")
+async def get_scheduler_metrics(
+    user=Depends(get_verified_user)
+):
+    """
+    Get agent call scheduler metrics (admin only)
+    
+    Args:
+        user: Authenticated user (must be admin)
+    
+    Returns:
+        Queue depth, in-flight counts and wait-time statistics
+    """
+    if user.role not in ["admin", "superadmin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED
+        )
+    
+    return agent_call_scheduler.get_metrics()
@@ -1,12 +1,7 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
 from datetime import datetime
@@ -51,6 +46,7 @@ from open_webui.utils.payload import (
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.ollama_router import OllamaRequest, ollama_router
 
 
 from open_webui.config import (
@@ -110,7 +106,11 @@ async def send_get_request(url, key=None, user: UserModel = None):
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
     session: Optional[aiohttp.ClientSession],
+    route: Optional[OllamaRequest] = None,
 ):
+    if route:
+        # Also covers a stream cancelled before it was first iterated
+        route.release()
     if response:
         response.close()
     if session:
@@ -125,9 +125,18 @@ async def send_post_request(
     content_type: Optional[str] = None,
     user: UserModel = None,
     metadata: Optional[dict] = None,
+    route: Optional[OllamaRequest] = None,
 ):
+    """
+    POST to an Ollama backend, streaming the response back if stream
+
+    Args:
+        route: Routed request (see ollama_router.start), recorded and released
+            once the response is done
+    """
 
     r = None
+    streaming = False
     try:
         session = aiohttp.ClientSession(
             trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
@@ -157,6 +166,8 @@ async def send_post_request(
             },
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
+        if route:
+            route.record(r.status < 500, loaded=r.ok)
 
         if r.ok is False:
             try:
@@ -180,12 +191,17 @@ async def send_post_request(
             if content_type:
                 response_headers["Content-Type"] = content_type
 
+            content = r.content
+            if route:
+                content = route.iter_content(r.content)
+                streaming = True
+
             return StreamingResponse(
-                r.content,
+                content,
                 status_code=r.status,
                 headers=response_headers,
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_response, response=r, session=session, route=route
                 ),
             )
         else:
@@ -195,6 +211,8 @@ async def send_post_request(
     except HTTPException as e:
         raise e  # Re-raise HTTPException to be handled by FastAPI
     except Exception as e:
+        if route:
+            route.record(False)
         detail = f"Ollama: {e}"
 
         raise HTTPException(
@@ -204,6 +222,8 @@ async def send_post_request(
     finally:
         if not stream:
             await cleanup_response(r, session)
+        if route and not streaming:
+            route.release()
 
 
 def get_api_key(idx, url, configs):
@@ -293,6 +313,16 @@ async def get_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/router/status")
+async def get_router_status(request: Request, user=Depends(get_admin_user)):
+    """
+    Load and health of each Ollama backend as seen by the request router
+    """
+    return {
+        "backends": ollama_router.get_status(request.app.state.config.OLLAMA_BASE_URLS)
+    }
+
+
 class OllamaConfigForm(BaseModel):
     ENABLE_OLLAMA_API: Optional[bool] = None
     OLLAMA_BASE_URLS: list[str]
@@ -429,6 +459,10 @@ async def get_all_models(request: Request, user: UserModel = None):
                     # Parse ISO8601 datetime with offset, get unix timestamp as int
                     dt = datetime.fromisoformat(expires_map[m["model"]])
                     m["expires_at"] = int(dt.timestamp())
+
+            ollama_router.update_loaded_models(
+                request.app.state.config.OLLAMA_BASE_URLS, loaded_models["models"]
+            )
         except Exception as e:
             log.debug(f"Failed to get loaded models: {e}")
 
@@ -967,7 +1001,9 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
         )
 
-    url_idx = random.choice(models[model]["urls"])
+    url_idx = ollama_router.select(
+        request.app.state.config.OLLAMA_BASE_URLS, models[model]["urls"], model
+    )
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
@@ -1041,7 +1077,9 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = ollama_router.select(
+                request.app.state.config.OLLAMA_BASE_URLS, models[model]["urls"], model
+            )
         else:
             raise HTTPException(
                 status_code=400,
@@ -1055,30 +1093,33 @@ async def embed(
     )
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
 
+    backend_model = form_data.model
     prefix_id = api_config.get("prefix_id", None)
     if prefix_id:
         form_data.model = form_data.model.replace(f"{prefix_id}.", "")
 
     try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=form_data.model_dump_json(exclude_none=True).encode(),
-        )
+        with ollama_router.track(url, backend_model) as route:
+            r = requests.request(
+                method="POST",
+                url=f"{url}/api/embed",
+                headers={
+                    "Content-Type": "application/json",
+                    **({"Authorization": f"Bearer {key}"} if key else {}),
+                    **(
+                        {
+                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                            "X-OpenWebUI-User-Id": user.id,
+                            "X-OpenWebUI-User-Email": user.email,
+                            "X-OpenWebUI-User-Role": user.role,
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                        else {}
+                    ),
+                },
+                data=form_data.model_dump_json(exclude_none=True).encode(),
+            )
+            route.record(r.status_code < 500, loaded=r.ok)
         r.raise_for_status()
 
         data = r.json()
@@ -1128,7 +1169,9 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = ollama_router.select(
+                request.app.state.config.OLLAMA_BASE_URLS, models[model]["urls"], model
+            )
         else:
             raise HTTPException(
                 status_code=400,
@@ -1142,30 +1185,33 @@ async def embeddings(
     )
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
 
+    backend_model = form_data.model
     prefix_id = api_config.get("prefix_id", None)
     if prefix_id:
         form_data.model = form_data.model.replace(f"{prefix_id}.", "")
 
     try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=form_data.model_dump_json(exclude_none=True).encode(),
-        )
+        with ollama_router.track(url, backend_model) as route:
+            r = requests.request(
+                method="POST",
+                url=f"{url}/api/embeddings",
+                headers={
+                    "Content-Type": "application/json",
+                    **({"Authorization": f"Bearer {key}"} if key else {}),
+                    **(
+                        {
+                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                            "X-OpenWebUI-User-Id": user.id,
+                            "X-OpenWebUI-User-Email": user.email,
+                            "X-OpenWebUI-User-Role": user.role,
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                        else {}
+                    ),
+                },
+                data=form_data.model_dump_json(exclude_none=True).encode(),
+            )
+            route.record(r.status_code < 500, loaded=r.ok)
         r.raise_for_status()
 
         data = r.json()
@@ -1221,7 +1267,9 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = ollama_router.select(
+                request.app.state.config.OLLAMA_BASE_URLS, models[model]["urls"], model
+            )
         else:
             raise HTTPException(
                 status_code=400,
@@ -1234,6 +1282,7 @@ async def generate_completion(
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
     )
 
+    backend_model = form_data.model
     prefix_id = api_config.get("prefix_id", None)
     if prefix_id:
         form_data.model = form_data.model.replace(f"{prefix_id}.", "")
@@ -1243,6 +1292,7 @@ async def generate_completion(
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        route=ollama_router.start(url, backend_model),
     )
 
 
@@ -1288,7 +1338,11 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = ollama_router.select(
+            request.app.state.config.OLLAMA_BASE_URLS,
+            models[model].get("urls", []),
+            model,
+        )
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1359,6 +1413,7 @@ async def generate_chat_completion(
         payload["model"] = f"{payload['model']}:latest"
 
     url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    backend_model = payload["model"]
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1376,6 +1431,7 @@ async def generate_chat_completion(
         content_type="application/x-ndjson",
         user=user,
         metadata=metadata,
+        route=ollama_router.start(url, backend_model),
     )
 
 
@@ -1465,6 +1521,7 @@ async def generate_openai_completion(
         payload["model"] = f"{payload['model']}:latest"
 
     url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    backend_model = payload["model"]
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1482,6 +1539,7 @@ async def generate_openai_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        route=ollama_router.start(url, backend_model),
     )
 
 
@@ -1548,6 +1606,7 @@ async def generate_openai_chat_completion(
         payload["model"] = f"{payload['model']}:latest"
 
     url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    backend_model = payload["model"]
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1564,6 +1623,7 @@ async def generate_openai_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        route=ollama_router.start(url, backend_model),
     )
 
 
@@ -33,6 +33,7 @@ from langchain_core.documents import Document
 
 from open_webui.models.files import FileModel, Files
 from open_webui.models.knowledge import Knowledges
+from open_webui.models.chunk_embeddings import ChunkEmbeddings
 from open_webui.storage.provider import Storage
 
 
@@ -70,6 +71,7 @@ from open_webui.retrieval.web.firecrawl import search_firecrawl
 from open_webui.retrieval.web.external import search_external
 
 from open_webui.retrieval.utils import (
+    get_chunk_embeddings,
     get_embedding_function,
     get_reranking_function,
     get_model_path,
@@ -368,8 +370,13 @@ async def update_embedding_config(
                 if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
                 else None
             ),
+            cache=request.app.state.EMBEDDING_CACHE,
         )
 
+        # The same model name may now be served from a different endpoint
+        if request.app.state.EMBEDDING_CACHE is not None:
+            request.app.state.EMBEDDING_CACHE.clear()
+
         return {
             "status": True,
             "embedding_engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
@@ -1344,19 +1351,20 @@ def save_docs_to_vector_db(
                 return True
 
         log.info(f"generating embeddings for {collection_name}")
+        embedding_url = (
+            request.app.state.config.RAG_OPENAI_API_BASE_URL
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_BASE_URL
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
+            )
+        )
         embedding_function = get_embedding_function(
             request.app.state.config.RAG_EMBEDDING_ENGINE,
             request.app.state.config.RAG_EMBEDDING_MODEL,
             request.app.state.ef,
-            (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_BASE_URL
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
-                )
-            ),
+            embedding_url,
             (
                 request.app.state.config.RAG_OPENAI_API_KEY
                 if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
@@ -1374,8 +1382,13 @@ def save_docs_to_vector_db(
             ),
         )
 
-        embeddings = embedding_function(
+        embeddings = get_chunk_embeddings(
             list(map(lambda x: x.replace("\n", " "), texts)),
+            embedding_function,
+            request.app.state.config.RAG_EMBEDDING_ENGINE,
+            request.app.state.config.RAG_EMBEDDING_MODEL,
+            # Local models are not served from an endpoint
+            embedding_url if request.app.state.config.RAG_EMBEDDING_ENGINE else "",
             prefix=RAG_EMBEDDING_CONTENT_PREFIX,
             user=user,
         )
@@ -1425,6 +1438,7 @@ def process_file(
         try:
 
             collection_name = form_data.collection_name
+            split = True
 
             if collection_name is None:
                 collection_name = f"file-{file.id}"
@@ -1465,6 +1479,8 @@ def process_file(
                 )
 
                 if result is not None and len(result.ids[0]) > 0:
+                    # Already split, the chunk embeddings are reused as well
+                    split = False
                     docs = [
                         Document(
                             page_content=result.documents[0][idx],
@@ -1587,6 +1603,7 @@ def process_file(
                             "name": file.filename,
                             "hash": hash,
                         },
+                        split=split,
                         add=(True if form_data.collection_name else False),
                         user=user,
                     )
@@ -2185,13 +2202,9 @@ def query_doc_handler(
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH and (
             form_data.hybrid is None or form_data.hybrid
         ):
-            collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
-            )
             return query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
-                collection_result=collection_results[form_data.collection_name],
+                bm25_index=VECTOR_DB_CLIENT.get_bm25_index(form_data.collection_name),
                 query=form_data.query,
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
                     query, prefix=prefix, user=user
@@ -2338,6 +2351,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    ChunkEmbeddings.delete_all_embeddings()
     Knowledges.delete_all_knowledge()
 
 
@@ -11,7 +11,6 @@ import pycrdt as Y
 
 from open_webui.models.users import Users, UserNameResponse
 from open_webui.models.channels import Channels
-from open_webui.models.chats import Chats
 from open_webui.models.notes import Notes, NoteUpdateForm
 from open_webui.utils.redis import (
     get_sentinels_from_env,
@@ -31,6 +30,7 @@ from open_webui.env import (
 from open_webui.utils.auth import decode_token
 from open_webui.socket.utils import RedisDict, RedisLock, YdocManager
 from open_webui.tasks import create_task, stop_item_tasks
+from open_webui.utils.chat_message_buffer import chat_message_buffer
 from open_webui.utils.redis import get_redis_connection
 from open_webui.utils.access_control import has_access, get_users_with_access
 
@@ -668,16 +668,17 @@ def get_event_emitter(request_info, update_db=True):
 
         await asyncio.gather(*emit_tasks)
 
+        # Buffered and written in batches, see ChatMessageBuffer
         if update_db:
             if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
+                chat_message_buffer.add_status(
                     request_info["chat_id"],
                     request_info["message_id"],
                     event_data.get("data", {}),
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                message = await chat_message_buffer.get_message(
                     request_info["chat_id"],
                     request_info["message_id"],
                 )
@@ -686,7 +687,7 @@ def get_event_emitter(request_info, update_db=True):
                     content = message.get("content", "")
                     content += event_data.get("data", {}).get("content", "")
 
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    chat_message_buffer.update(
                         request_info["chat_id"],
                         request_info["message_id"],
                         {
@@ -697,7 +698,7 @@ def get_event_emitter(request_info, update_db=True):
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                chat_message_buffer.update(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
@@ -706,7 +707,7 @@ def get_event_emitter(request_info, update_db=True):
                 )
 
             if "type" in event_data and event_data["type"] == "embeds":
-                message = Chats.get_message_by_id_and_message_id(
+                message = await chat_message_buffer.get_message(
                     request_info["chat_id"],
                     request_info["message_id"],
                 )
@@ -714,7 +715,7 @@ def get_event_emitter(request_info, update_db=True):
                 embeds = event_data.get("data", {}).get("embeds", [])
                 embeds.extend(message.get("embeds", []))
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                chat_message_buffer.update(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
@@ -723,7 +724,7 @@ def get_event_emitter(request_info, update_db=True):
                 )
 
             if "type" in event_data and event_data["type"] == "files":
-                message = Chats.get_message_by_id_and_message_id(
+                message = await chat_message_buffer.get_message(
                     request_info["chat_id"],
                     request_info["message_id"],
                 )
@@ -731,7 +732,7 @@ def get_event_emitter(request_info, update_db=True):
                 files = event_data.get("data", {}).get("files", [])
                 files.extend(message.get("files", []))
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                chat_message_buffer.update(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
@@ -742,7 +743,7 @@ def get_event_emitter(request_info, update_db=True):
             if event_data.get("type") in ["source", "citation"]:
                 data = event_data.get("data", {})
                 if data.get("type") == None:
-                    message = Chats.get_message_by_id_and_message_id(
+                    message = await chat_message_buffer.get_message(
                         request_info["chat_id"],
                         request_info["message_id"],
                     )
@@ -750,7 +751,7 @@ def get_event_emitter(request_info, update_db=True):
                     sources = message.get("sources", [])
                     sources.append(data)
 
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    chat_message_buffer.update(
                         request_info["chat_id"],
                         request_info["message_id"],
                         {
@@ -6,10 +6,17 @@ import uuid
 from typing import Dict, List, Optional, Set
 from dataclasses import dataclass
 
-from open_webui.socket.main import sio, SESSION_POOL, USER_POOL
+from open_webui.socket.main import sio, REDIS, SESSION_POOL, USER_POOL
 from open_webui.models.users import Users
 from open_webui.utils.auth import decode_token
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    MULTI_AGENT_CONVERSATION_TTL,
+    MULTI_AGENT_STREAM_CHECKPOINT_INTERVAL,
+    MULTI_AGENT_STREAM_FLUSH_INTERVAL,
+    MULTI_AGENT_STREAM_MAX_BUFFER_SIZE,
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -26,11 +33,148 @@ class ConversationSession:
     last_activity: float
 
 
+class AgentDeltaEmitter:
+    """
+    Coalesces streamed deltas of one agent in one conversation.
+
+    Deltas are buffered and sent as a single frame once the buffer reaches
+    ``max_buffer_size`` characters or ``flush_interval`` seconds have passed.
+    The full accumulated response is only attached every
+    ``checkpoint_interval`` seconds, so clients can resync without every frame
+    growing with the answer.
+    """
+
+    def __init__(
+        self,
+        manager: "MultiAgentWebSocketManager",
+        conv_id: str,
+        agent_id: str,
+        agent_name: str,
+        flush_interval: float = MULTI_AGENT_STREAM_FLUSH_INTERVAL,
+        max_buffer_size: int = MULTI_AGENT_STREAM_MAX_BUFFER_SIZE,
+        checkpoint_interval: float = MULTI_AGENT_STREAM_CHECKPOINT_INTERVAL,
+    ):
+        self.manager = manager
+        self.conv_id = conv_id
+        self.agent_id = agent_id
+        self.agent_name = agent_name
+        self.flush_interval = flush_interval
+        self.max_buffer_size = max_buffer_size
+        self.checkpoint_interval = checkpoint_interval
+
+        self._buffer: List[str] = []
+        self._buffer_size = 0
+        self._accumulated = ""
+        self._last_checkpoint = time.monotonic()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+
+    async def add(self, delta: str, accumulated: Optional[str] = None) -> None:
+        """
+        Buffer a delta, flushing when the size window is reached
+
+        Args:
+            delta: New text from the agent
+            accumulated: Full response so far, if the upstream provides it
+        """
+        self._buffer.append(delta)
+        self._buffer_size += len(delta)
+        if accumulated is not None:
+            self._accumulated = accumulated
+        else:
+            self._accumulated += delta
+
+        if self._buffer_size >= self.max_buffer_size or self.flush_interval <= 0:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def flush(self, checkpoint: bool = False) -> None:
+        """
+        Send buffered deltas as one frame
+
+        Args:
+            checkpoint: Force the accumulated response onto the frame
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+
+            content = "".join(self._buffer)
+            self._buffer = []
+            self._buffer_size = 0
+
+            message_data = {
+                "type": "delta",
+                "content": content,
+                "agent_name": self.agent_name,
+            }
+
+            now = time.monotonic()
+            if checkpoint or now - self._last_checkpoint >= self.checkpoint_interval:
+                message_data["accumulated"] = self._accumulated
+                self._last_checkpoint = now
+
+            await self.manager.send_agent_message(
+                self.conv_id, self.agent_id, message_data
+            )
+
+    async def close(self) -> None:
+        """
+        Flush anything still buffered; safe to call more than once
+        """
+        if self._closed:
+            return
+        self._closed = True
+        await self.flush()
+
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_interval)
+        except asyncio.CancelledError:
+            return
+
+        # Detach before flushing so a concurrent flush does not cancel the send
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            log.error(f"Error flushing agent deltas: {e}")
+
+
 class MultiAgentWebSocketManager:
-    """Manages WebSocket connections for multi-agent conversations"""
+    """
+    Manages WebSocket connections for multi-agent conversations
+    
+    With a Redis connection, conversations live in Redis with a TTL that is
+    refreshed on activity, so any worker can route agent messages to a
+    conversation joined on another worker. Without Redis they are kept in
+    process-local dicts and expired by ``cleanup_inactive_conversations``.
+    The session -> conversation mapping is always local, since socket events
+    for a session are handled by the worker that owns the socket.
+    """
     
-    def __init__(self):
-        # Dictionary to store active conversation sessions
+    def __init__(
+        self,
+        redis=None,
+        redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:multi_agent",
+        conversation_ttl: int = MULTI_AGENT_CONVERSATION_TTL,
+        touch_interval: float = 30,
+    ):
+        self._redis = redis
+        self._redis_key_prefix = redis_key_prefix
+        self.conversation_ttl = conversation_ttl
+        
+        # Activity is written to Redis at most once per touch_interval per conversation
+        self.touch_interval = touch_interval
+        self._last_touched: Dict[str, float] = {}
+        
+        # Dictionary to store active conversation sessions (local mode only)
         # Key: conv_id, Value: ConversationSession
         self.active_conversations: Dict[str, ConversationSession] = {}
         
@@ -40,6 +184,22 @@ class MultiAgentWebSocketManager:
         
         # Lock for thread-safe operations
         self._lock = asyncio.Lock()
+        
+        self._cleanup_task: Optional[asyncio.Task] = None
+    
+    def _conv_key(self, conv_id: str) -> str:
+        return f"{self._redis_key_prefix}:conv:{conv_id}"
+    
+    def _sessions_key(self, conv_id: str) -> str:
+        return f"{self._redis_key_prefix}:conv:{conv_id}:sessions"
+    
+    def _active_key(self) -> str:
+        return f"{self._redis_key_prefix}:active"
+    
+    def start_cleanup_task(self) -> None:
+        """Start the periodic cleanup task if it is not running yet"""
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(periodic_conversation_cleanup())
     
     async def join_conversation(self, conv_id: str, user_id: str, session_id: str, agent_uids: List[str]) -> bool:
         """
@@ -54,11 +214,32 @@ class MultiAgentWebSocketManager:
         Returns:
             True if successfully joined, False otherwise
         """
+        self.start_cleanup_task()
+        
         async with self._lock:
             try:
                 current_time = time.time()
                 
-                if conv_id in self.active_conversations:
+                if self._redis:
+                    conv_key = self._conv_key(conv_id)
+                    sessions_key = self._sessions_key(conv_id)
+                    
+                    pipe = self._redis.pipeline()
+                    pipe.hsetnx(conv_key, "user_id", user_id)
+                    pipe.hsetnx(conv_key, "created_at", current_time)
+                    pipe.hset(conv_key, "last_activity", current_time)
+                    if agent_uids:
+                        pipe.hset(conv_key, "agent_uids", json.dumps(agent_uids))
+                    else:
+                        pipe.hsetnx(conv_key, "agent_uids", "[]")
+                    pipe.sadd(sessions_key, session_id)
+                    pipe.expire(conv_key, self.conversation_ttl)
+                    pipe.expire(sessions_key, self.conversation_ttl)
+                    pipe.zadd(self._active_key(), {conv_id: current_time})
+                    await pipe.execute()
+                    
+                    self._last_touched[conv_id] = current_time
+                elif conv_id in self.active_conversations:
                     # Add to existing conversation
                     conversation = self.active_conversations[conv_id]
                     conversation.session_ids.add(session_id)
@@ -109,7 +290,24 @@ class MultiAgentWebSocketManager:
                 
                 conv_id = self.session_to_conv[session_id]
                 
-                if conv_id in self.active_conversations:
+                if self._redis:
+                    conv_key = self._conv_key(conv_id)
+                    sessions_key = self._sessions_key(conv_id)
+                    
+                    pipe = self._redis.pipeline()
+                    pipe.srem(sessions_key, session_id)
+                    pipe.scard(sessions_key)
+                    _, remaining = await pipe.execute()
+                    
+                    # If no more sessions, remove the conversation
+                    if not remaining:
+                        pipe = self._redis.pipeline()
+                        pipe.delete(conv_key, sessions_key)
+                        pipe.zrem(self._active_key(), conv_id)
+                        await pipe.execute()
+                        self._last_touched.pop(conv_id, None)
+                        log.info(f"Conversation {conv_id} ended - no more active sessions")
+                elif conv_id in self.active_conversations:
                     conversation = self.active_conversations[conv_id]
                     conversation.session_ids.discard(session_id)
                     conversation.last_activity = time.time()
@@ -132,6 +330,43 @@ class MultiAgentWebSocketManager:
                 log.error(f"Error leaving conversation for session {session_id}: {e}")
                 return False
     
+    async def _touch_conversation(self, conv_id: str) -> bool:
+        """
+        Record activity on a conversation and extend its TTL
+        
+        Args:
+            conv_id: Conversation ID
+        
+        Returns:
+            True if the conversation exists, False otherwise
+        """
+        current_time = time.time()
+        
+        if not self._redis:
+            conversation = self.active_conversations.get(conv_id)
+            if conversation is None:
+                return False
+            conversation.last_activity = current_time
+            return True
+        
+        last_touched = self._last_touched.get(conv_id)
+        if last_touched and current_time - last_touched < self.touch_interval:
+            return True
+        
+        conv_key = self._conv_key(conv_id)
+        if not await self._redis.expire(conv_key, self.conversation_ttl):
+            self._last_touched.pop(conv_id, None)
+            return False
+        
+        pipe = self._redis.pipeline()
+        pipe.hset(conv_key, "last_activity", current_time)
+        pipe.expire(self._sessions_key(conv_id), self.conversation_ttl)
+        pipe.zadd(self._active_key(), {conv_id: current_time})
+        await pipe.execute()
+        
+        self._last_touched[conv_id] = current_time
+        return True
+    
     async def send_agent_message(self, conv_id: str, agent_id: str, message_data: dict) -> bool:
         """
         Send a message from an agent to all participants in a conversation
@@ -145,13 +380,10 @@ class MultiAgentWebSocketManager:
             True if message was sent, False otherwise
         """
         try:
-            if conv_id not in self.active_conversations:
+            if not await self._touch_conversation(conv_id):
                 log.warning(f"Conversation {conv_id} not found")
                 return False
             
-            conversation = self.active_conversations[conv_id]
-            conversation.last_activity = time.time()
-            
             # Prepare the message payload
             payload = {
                 "conv_id": conv_id,
@@ -174,6 +406,22 @@ class MultiAgentWebSocketManager:
             log.error(f"Error sending agent message: {e}")
             return False
     
+    def create_delta_emitter(
+        self, conv_id: str, agent_id: str, agent_name: str
+    ) -> AgentDeltaEmitter:
+        """
+        Create a coalescing emitter for an agent's streamed deltas
+        
+        Args:
+            conv_id: Conversation ID
+            agent_id: Agent ID that streams the response
+            agent_name: Agent display name
+            
+        Returns:
+            AgentDeltaEmitter bound to this manager
+        """
+        return AgentDeltaEmitter(self, conv_id, agent_id, agent_name)
+    
     async def send_system_message(self, conv_id: str, message_type: str, data: dict) -> bool:
         """
         Send a system message to all participants in a conversation
@@ -187,13 +435,10 @@ class MultiAgentWebSocketManager:
             True if message was sent, False otherwise
         """
         try:
-            if conv_id not in self.active_conversations:
+            if not await self._touch_conversation(conv_id):
                 log.warning(f"Conversation {conv_id} not found")
                 return False
             
-            conversation = self.active_conversations[conv_id]
-            conversation.last_activity = time.time()
-            
             # Prepare the system message payload
             payload = {
                 "conv_id": conv_id,
@@ -227,7 +472,11 @@ class MultiAgentWebSocketManager:
         Returns:
             ConversationSession if found, None otherwise
         """
-        return self.active_conversations.get(conv_id)
+        if not self._redis:
+            return self.active_conversations.get(conv_id)
+        
+        conversations = await self._load_conversations([conv_id])
+        return conversations[0] if conversations else None
     
     async def get_active_conversations(self) -> List[ConversationSession]:
         """
@@ -236,20 +485,73 @@ class MultiAgentWebSocketManager:
         Returns:
             List of active ConversationSession objects
         """
-        return list(self.active_conversations.values())
+        if not self._redis:
+            return list(self.active_conversations.values())
     
-    async def cleanup_inactive_conversations(self, timeout_seconds: int = 3600) -> int:
+        await self._prune_active_index()
+        conv_ids = await self._redis.zrange(self._active_key(), 0, -1)
+        return await self._load_conversations(conv_ids)
+    
+    async def _load_conversations(self, conv_ids: List[str]) -> List[ConversationSession]:
+        if not conv_ids:
+            return []
+        
+        pipe = self._redis.pipeline()
+        for conv_id in conv_ids:
+            pipe.hgetall(self._conv_key(conv_id))
+            pipe.smembers(self._sessions_key(conv_id))
+        results = await pipe.execute()
+        
+        conversations = []
+        for i, conv_id in enumerate(conv_ids):
+            data, session_ids = results[2 * i], results[2 * i + 1]
+            if not data:
+                continue
+            
+            conversations.append(
+                ConversationSession(
+                    conv_id=conv_id,
+                    user_id=data.get("user_id", ""),
+                    session_ids=set(session_ids or []),
+                    agent_uids=json.loads(data.get("agent_uids") or "[]"),
+                    created_at=float(data.get("created_at") or 0),
+                    last_activity=float(data.get("last_activity") or 0)
+                )
+            )
+        return conversations
+    
+    async def _prune_active_index(self) -> int:
+        # Conversation keys expire on their own; drop their index entries too
+        cutoff = time.time() - self.conversation_ttl
+        return await self._redis.zremrangebyscore(self._active_key(), "-inf", cutoff)
+    
+    async def cleanup_inactive_conversations(self, timeout_seconds: Optional[int] = None) -> int:
         """
         Clean up conversations that have been inactive for too long
         
+        With Redis, conversations expire through their TTL and this only
+        prunes the index of active conversations.
+        
         Args:
-            timeout_seconds: Timeout in seconds (default: 1 hour)
+            timeout_seconds: Timeout in seconds (default: the conversation TTL)
             
         Returns:
             Number of conversations cleaned up
         """
+        if timeout_seconds is None:
+            timeout_seconds = self.conversation_ttl
+        
         async with self._lock:
             current_time = time.time()
+            
+            # Forget local activity timestamps of expired conversations
+            for conv_id, last_touched in list(self._last_touched.items()):
+                if current_time - last_touched > timeout_seconds:
+                    del self._last_touched[conv_id]
+            
+            if self._redis:
+                return await self._prune_active_index()
+            
             inactive_convs = []
             
             for conv_id, conversation in self.active_conversations.items():
@@ -274,7 +576,10 @@ class MultiAgentWebSocketManager:
 
 
 # Global instance
-multi_agent_manager = MultiAgentWebSocketManager()
+multi_agent_manager = MultiAgentWebSocketManager(
+    redis=REDIS,
+    redis_key_prefix=f"{REDIS_KEY_PREFIX}:multi_agent",
+)
 
 
 # WebSocket event handlers for multi-agent functionality
@@ -346,7 +651,3 @@ async def periodic_conversation_cleanup():
                 log.info(f"Cleaned up {cleaned_count} inactive conversations")
         except Exception as e:
             log.error(f"Error in conversation cleanup: {e}")
-
-
-# Start the cleanup task
-asyncio.create_task(periodic_conversation_cleanup())
\ No newline at end of file
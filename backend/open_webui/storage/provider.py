@@ -1,12 +1,19 @@
 import os
 import shutil
+import hashlib
 import json
 import logging
 import re
+import threading
+import uuid
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple, Dict
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Tuple, Dict, Optional
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from open_webui.config import (
@@ -25,6 +32,8 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_UPLOAD_CHUNK_SIZE,
+    STORAGE_LOCAL_CACHE_MAX_SIZE_MB,
     UPLOAD_DIR,
 )
 from google.cloud import storage
@@ -40,6 +49,185 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
+@dataclass
+class StoredFile:
+    """Local copy of an uploaded file, with its size and hash taken while streaming"""
+
+    path: str
+    size: int
+    sha256: str
+
+    def read(self) -> bytes:
+        """Read the whole file (only when the contents are really needed)"""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class LocalFileCache:
+    """
+    Read-through cache of cloud objects in their local copies under UPLOAD_DIR.
+
+    A local copy is used as long as it matches the object's ETag (or size, for
+    copies whose ETag is not known yet), so unchanged objects are downloaded
+    once. Concurrent requests for one object share a single download, and the
+    least recently used copies are removed once they take more than
+    ``max_size`` bytes (0 for no limit).
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+        # Key: local path, Value: [etag, size], least recently used first
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._loaded_dirs = set()
+
+        # Key: local path, Value: [lock, number of holders/waiters]
+        self._downloads: Dict[str, list] = {}
+
+    def get(
+        self,
+        local_path: str,
+        etag: Optional[str],
+        size: Optional[int],
+        download: Callable[[str], None],
+    ) -> str:
+        """
+        Get the local copy of an object, downloading it if it is missing or stale
+
+        Args:
+            local_path: Path of the local copy
+            etag: Current ETag of the object
+            size: Current size of the object
+            download: Downloads the object to the given path
+
+        Returns:
+            local_path
+        """
+        with self._single_flight(local_path):
+            if self._is_fresh(local_path, etag, size):
+                log.debug(f"Using cached copy {local_path}")
+                return local_path
+
+            # Download next to the copy and swap it in once complete, so
+            # readers never see a partial file
+            part_path = f"{local_path}.{uuid.uuid4().hex}.part"
+            try:
+                download(part_path)
+                os.replace(part_path, local_path)
+            finally:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+
+            self.add(local_path, etag)
+        return local_path
+
+    def add(self, local_path: str, etag: Optional[str] = None) -> None:
+        """Track a local copy that was just written"""
+        size = os.path.getsize(local_path)
+        with self._lock:
+            self._load(os.path.dirname(local_path))
+            self._pop(local_path)
+            self._entries[local_path] = [etag, size]
+            self._size += size
+        self._evict(keep=local_path)
+
+    def remove(self, local_path: str) -> None:
+        with self._lock:
+            self._pop(local_path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _is_fresh(self, local_path: str, etag: Optional[str], size: Optional[int]):
+        with self._lock:
+            self._load(os.path.dirname(local_path))
+            entry = self._entries.get(local_path)
+            if entry is None:
+                return False
+            if not os.path.isfile(local_path):
+                self._pop(local_path)
+                return False
+
+            cached_etag, cached_size = entry
+            if size is not None and cached_size != size:
+                return False
+            if cached_etag and etag:
+                if cached_etag != etag:
+                    return False
+            elif size is None:
+                # Nothing to validate the copy against
+                return False
+
+            entry[0] = etag or cached_etag
+            self._entries.move_to_end(local_path)
+            return True
+
+    def _load(self, directory: str) -> None:
+        # Adopt copies left by earlier runs, oldest access first
+        if directory in self._loaded_dirs:
+            return
+        self._loaded_dirs.add(directory)
+
+        try:
+            files = [entry for entry in os.scandir(directory) if entry.is_file()]
+        except FileNotFoundError:
+            return
+
+        for entry in sorted(files, key=lambda entry: entry.stat().st_atime):
+            if entry.path.endswith(".part") or entry.path in self._entries:
+                continue
+            size = entry.stat().st_size
+            self._entries[entry.path] = [None, size]
+            self._entries.move_to_end(entry.path, last=False)
+            self._size += size
+
+    def _pop(self, local_path: str) -> None:
+        entry = self._entries.pop(local_path, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def _evict(self, keep: str) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            while self._size > self.max_size and len(self._entries) > 1:
+                local_path = next(iter(self._entries))
+                if local_path == keep:
+                    self._entries.move_to_end(local_path)
+                    continue
+
+                self._pop(local_path)
+                try:
+                    os.remove(local_path)
+                    log.debug(f"Evicted cached copy {local_path}")
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    log.warning(f"Failed to evict cached copy {local_path}: {e}")
+
+    @contextmanager
+    def _single_flight(self, local_path: str):
+        with self._lock:
+            holder = self._downloads.setdefault(local_path, [threading.Lock(), 0])
+            holder[1] += 1
+        try:
+            with holder[0]:
+                yield
+        finally:
+            with self._lock:
+                holder[1] -= 1
+                if holder[1] == 0:
+                    del self._downloads[local_path]
+
+
 class StorageProvider(ABC):
     @abstractmethod
     def get_file(self, file_path: str) -> str:
@@ -48,7 +236,7 @@ class StorageProvider(ABC):
     @abstractmethod
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[StoredFile, str]:
         pass
 
     @abstractmethod
@@ -64,14 +252,22 @@ class LocalStorageProvider(StorageProvider):
     @staticmethod
     def upload_file(
         file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    ) -> Tuple[StoredFile, str]:
         file_path = f"{UPLOAD_DIR}/{filename}"
+
+        # Copy in chunks so the upload is never held in memory as a whole
+        size = 0
+        sha256 = hashlib.sha256()
         with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+            while chunk := file.read(STORAGE_UPLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                sha256.update(chunk)
+                size += len(chunk)
+
+        if not size:
+            os.remove(file_path)
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        return StoredFile(file_path, size, sha256.hexdigest()), file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
@@ -139,6 +335,7 @@ class S3StorageProvider(StorageProvider):
 
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
+        self.file_cache = LocalFileCache(STORAGE_LOCAL_CACHE_MAX_SIZE_MB * 1024 * 1024)
 
     @staticmethod
     def sanitize_tag_value(s: str) -> str:
@@ -147,12 +344,21 @@ class S3StorageProvider(StorageProvider):
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[StoredFile, str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         s3_key = os.path.join(self.key_prefix, filename)
         try:
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            # Multipart upload streamed from the local copy
+            self.s3_client.upload_file(
+                file_path,
+                self.bucket_name,
+                s3_key,
+                Config=TransferConfig(
+                    multipart_threshold=STORAGE_UPLOAD_CHUNK_SIZE,
+                    multipart_chunksize=STORAGE_UPLOAD_CHUNK_SIZE,
+                ),
+            )
             if S3_ENABLE_TAGGING and tags:
                 sanitized_tags = {
                     self.sanitize_tag_value(k): self.sanitize_tag_value(v)
@@ -168,10 +374,8 @@ class S3StorageProvider(StorageProvider):
                     Key=s3_key,
                     Tagging=tagging,
                 )
-            return (
-                open(file_path, "rb").read(),
-                f"s3://{self.bucket_name}/{s3_key}",
-            )
+            self.file_cache.add(file_path)
+            return contents, f"s3://{self.bucket_name}/{s3_key}"
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
@@ -180,8 +384,15 @@ class S3StorageProvider(StorageProvider):
         try:
             s3_key = self._extract_s3_key(file_path)
             local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+            head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+            return self.file_cache.get(
+                local_file_path,
+                head.get("ETag"),
+                head.get("ContentLength"),
+                lambda path: self.s3_client.download_file(
+                    self.bucket_name, s3_key, path
+                ),
+            )
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
@@ -190,6 +401,7 @@ class S3StorageProvider(StorageProvider):
         try:
             s3_key = self._extract_s3_key(file_path)
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            self.file_cache.remove(self._get_local_file_path(s3_key))
         except ClientError as e:
             raise RuntimeError(f"Error deleting file from S3: {e}")
 
@@ -214,6 +426,7 @@ class S3StorageProvider(StorageProvider):
 
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
+        self.file_cache.clear()
 
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
     def _extract_s3_key(self, full_file_path: str) -> str:
@@ -237,15 +450,18 @@ class GCSStorageProvider(StorageProvider):
             # if running on a Compute Engine instance, credentials would be from Google Metadata server
             self.gcs_client = storage.Client()
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
+        self.file_cache = LocalFileCache(STORAGE_LOCAL_CACHE_MAX_SIZE_MB * 1024 * 1024)
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[StoredFile, str]:
         """Handles uploading of the file to GCS storage."""
         contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         try:
-            blob = self.bucket.blob(filename)
+            # Resumable upload in chunks streamed from the local copy
+            blob = self.bucket.blob(filename, chunk_size=STORAGE_UPLOAD_CHUNK_SIZE)
             blob.upload_from_filename(file_path)
+            self.file_cache.add(file_path)
             return contents, "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
@@ -256,9 +472,10 @@ class GCSStorageProvider(StorageProvider):
             filename = file_path.removeprefix("gs://").split("/")[1]
             local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
 
-            return local_file_path
+            return self.file_cache.get(
+                local_file_path, blob.etag, blob.size, blob.download_to_filename
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
@@ -268,6 +485,7 @@ class GCSStorageProvider(StorageProvider):
             filename = file_path.removeprefix("gs://").split("/")[1]
             blob = self.bucket.get_blob(filename)
             blob.delete()
+            self.file_cache.remove(f"{UPLOAD_DIR}/{filename}")
         except NotFound as e:
             raise RuntimeError(f"Error deleting file from GCS: {e}")
 
@@ -287,6 +505,7 @@ class GCSStorageProvider(StorageProvider):
 
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
+        self.file_cache.clear()
 
 
 class AzureStorageProvider(StorageProvider):
@@ -298,26 +517,36 @@ class AzureStorageProvider(StorageProvider):
         if storage_key:
             # Configure using the Azure Storage Account Endpoint and Key
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=storage_key
+                account_url=self.endpoint,
+                credential=storage_key,
+                max_block_size=STORAGE_UPLOAD_CHUNK_SIZE,
+                max_single_put_size=STORAGE_UPLOAD_CHUNK_SIZE,
             )
         else:
             # Configure using the Azure Storage Account Endpoint and DefaultAzureCredential
             # If the key is not configured, then the DefaultAzureCredential will be used to support Managed Identity authentication
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=DefaultAzureCredential()
+                account_url=self.endpoint,
+                credential=DefaultAzureCredential(),
+                max_block_size=STORAGE_UPLOAD_CHUNK_SIZE,
+                max_single_put_size=STORAGE_UPLOAD_CHUNK_SIZE,
             )
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
+        self.file_cache = LocalFileCache(STORAGE_LOCAL_CACHE_MAX_SIZE_MB * 1024 * 1024)
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[StoredFile, str]:
         """Handles uploading of the file to Azure Blob Storage."""
         contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         try:
+            # Staged block upload streamed from the local copy
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
+            with open(file_path, "rb") as data:
+                blob_client.upload_blob(data, length=contents.size, overwrite=True)
+            self.file_cache.add(file_path)
             return contents, f"{self.endpoint}/{self.container_name}/{filename}"
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
@@ -328,9 +557,15 @@ class AzureStorageProvider(StorageProvider):
             filename = file_path.split("/")[-1]
             local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+            properties = blob_client.get_blob_properties()
+
+            def download(path: str) -> None:
+                with open(path, "wb") as download_file:
+                    blob_client.download_blob().readinto(download_file)
+
+            return self.file_cache.get(
+                local_file_path, properties.etag, properties.size, download
+            )
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
@@ -340,6 +575,7 @@ class AzureStorageProvider(StorageProvider):
             filename = file_path.split("/")[-1]
             blob_client = self.container_client.get_blob_client(filename)
             blob_client.delete_blob()
+            self.file_cache.remove(f"{UPLOAD_DIR}/{filename}")
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error deleting file from Azure Blob Storage: {e}")
 
@@ -357,6 +593,7 @@ class AzureStorageProvider(StorageProvider):
 
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
+        self.file_cache.clear()
 
 
 def get_storage_provider(storage_provider: str):
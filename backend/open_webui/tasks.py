@@ -9,6 +9,7 @@ from fastapi import Request
 from typing import Dict, List, Optional
 
 from open_webui.env import SRC_LOG_LEVELS, REDIS_KEY_PREFIX
+from open_webui.utils.chat_message_buffer import chat_message_buffer
 
 
 log = logging.getLogger(__name__)
@@ -82,6 +83,13 @@ async def cleanup_task(redis, task_id: str, id=None):
     """
     Remove a completed or canceled task from the global `tasks` dictionary.
     """
+    # Persist buffered message updates even if the task failed or was killed
+    if id:
+        try:
+            await chat_message_buffer.flush_chat(id)
+        except Exception as e:
+            log.exception(f"Error flushing buffered messages for {id}: {e}")
+
     if redis:
         await redis_cleanup_task(redis, task_id, id)
 
@@ -0,0 +1,133 @@
+import pytest
+
+from open_webui.models import chunk_embeddings as module
+from open_webui.models.chunk_embeddings import ChunkEmbeddings, ChunkEmbeddingTable
+
+URL = "http://embeddings:8080/v1"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def migrated_db():
+    from open_webui.config import run_migrations
+
+    run_migrations()
+
+
+@pytest.fixture(autouse=True)
+def empty_table():
+    ChunkEmbeddings.delete_all_embeddings()
+    yield
+    ChunkEmbeddings.delete_all_embeddings()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000 * 1_000_000_000]
+    monkeypatch.setattr(module.time, "time_ns", lambda: now[0])
+    return now
+
+
+def count_embeddings(engine="openai", model="model", url=URL):
+    hashes = [ChunkEmbeddings.hash_text(f"text {i}") for i in range(10)]
+    return len(ChunkEmbeddings.get_embeddings(engine, model, url, hashes))
+
+
+def test_hash_text():
+    assert ChunkEmbeddings.hash_text("text") == ChunkEmbeddings.hash_text("text", "")
+    assert ChunkEmbeddings.hash_text("text") != ChunkEmbeddings.hash_text(
+        "text", "passage: "
+    )
+
+
+def test_insert_and_get(monkeypatch):
+    monkeypatch.setattr(module, "LOOKUP_BATCH_SIZE", 2)
+    embeddings = {
+        ChunkEmbeddings.hash_text(f"text {i}"): [float(i), 0.5] for i in range(5)
+    }
+
+    assert ChunkEmbeddings.insert_embeddings("openai", "model", URL, embeddings)
+
+    assert ChunkEmbeddings.get_embeddings("openai", "model", URL, list(embeddings)) == (
+        embeddings
+    )
+    assert (
+        ChunkEmbeddings.get_embeddings("openai", "other", URL, list(embeddings)) == {}
+    )
+    assert (
+        ChunkEmbeddings.get_embeddings("ollama", "model", URL, list(embeddings)) == {}
+    )
+    assert (
+        ChunkEmbeddings.get_embeddings(
+            "openai", "model", "http://other/v1", list(embeddings)
+        )
+        == {}
+    )
+
+
+def test_insert_keeps_stored_embeddings():
+    hash = ChunkEmbeddings.hash_text("text 0")
+    other = ChunkEmbeddings.hash_text("text 1")
+    ChunkEmbeddings.insert_embeddings("openai", "model", URL, {hash: [1.0]})
+
+    assert ChunkEmbeddings.insert_embeddings(
+        "openai", "model", URL, {hash: [2.0], other: [3.0]}
+    )
+
+    assert ChunkEmbeddings.get_embeddings("openai", "model", URL, [hash, other]) == {
+        hash: [1.0],
+        other: [3.0],
+    }
+
+
+def test_prune_other_models_and_old_embeddings(clock):
+    ChunkEmbeddings.insert_embeddings(
+        "openai", "model", URL, {ChunkEmbeddings.hash_text("text 0"): [0.0]}
+    )
+    ChunkEmbeddings.insert_embeddings(
+        "openai", "old", URL, {ChunkEmbeddings.hash_text("text 1"): [1.0]}
+    )
+    ChunkEmbeddings.insert_embeddings(
+        "openai", "model", "http://old/v1", {ChunkEmbeddings.hash_text("text 3"): [3.0]}
+    )
+    clock[0] += 100 * 1_000_000_000
+    ChunkEmbeddings.insert_embeddings(
+        "openai", "model", URL, {ChunkEmbeddings.hash_text("text 2"): [2.0]}
+    )
+    clock[0] += 1_000_000_000
+
+    assert ChunkEmbeddings.prune("openai", "model", URL, max_age=50, max_count=0) == 3
+
+    assert count_embeddings() == 1
+    assert count_embeddings(model="old") == 0
+    assert count_embeddings(url="http://old/v1") == 0
+
+
+def test_prune_oldest_beyond_max_count(clock):
+    for i in range(5):
+        clock[0] += 1
+        ChunkEmbeddings.insert_embeddings(
+            "openai", "model", URL, {ChunkEmbeddings.hash_text(f"text {i}"): [float(i)]}
+        )
+
+    assert ChunkEmbeddings.prune("openai", "model", URL, max_age=0, max_count=3) == 2
+
+    hashes = [ChunkEmbeddings.hash_text(f"text {i}") for i in range(5)]
+    assert sorted(
+        ChunkEmbeddings.get_embeddings("openai", "model", URL, hashes)
+    ) == sorted(hashes[2:])
+
+
+def test_prune_if_due(monkeypatch):
+    table = ChunkEmbeddingTable()
+    prunes = []
+    monkeypatch.setattr(table, "prune", lambda *args: prunes.append(args) or 0)
+    now = [100.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+
+    table.prune_if_due("openai", "model", URL, 10, 10)
+    now[0] += module.PRUNE_INTERVAL - 1
+    table.prune_if_due("openai", "model", URL, 10, 10)
+    now[0] += 1
+    table.prune_if_due("openai", "model", URL, 10, 10)
+
+    assert len(prunes) == 2
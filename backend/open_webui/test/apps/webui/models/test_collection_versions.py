@@ -0,0 +1,33 @@
+import uuid
+
+import pytest
+
+from open_webui.models.collection_versions import CollectionVersions
+
+
+@pytest.fixture(scope="module", autouse=True)
+def migrated_db():
+    from open_webui.config import run_migrations
+
+    run_migrations()
+
+
+def test_increment():
+    collection_name = f"test-{uuid.uuid4()}"
+    assert CollectionVersions.get_version(collection_name) == 0
+
+    assert CollectionVersions.increment(collection_name) == 1
+    assert CollectionVersions.increment(collection_name) == 2
+    assert CollectionVersions.get_version(collection_name) == 2
+
+
+def test_increment_all():
+    collection_names = [f"test-{uuid.uuid4()}" for _ in range(2)]
+    for collection_name in collection_names:
+        CollectionVersions.increment(collection_name)
+
+    CollectionVersions.increment_all()
+    assert [
+        CollectionVersions.get_version(collection_name)
+        for collection_name in collection_names
+    ] == [2, 2]
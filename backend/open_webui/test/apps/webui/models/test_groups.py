@@ -0,0 +1,147 @@
+import time
+import uuid
+
+import pytest
+
+from open_webui.internal.db import get_db
+from open_webui.models import groups as module
+from open_webui.models.groups import GroupForm, GroupMember, Groups, GroupUpdateForm
+from open_webui.utils.access_control import filter_by_access, has_access
+
+
+@pytest.fixture(scope="module", autouse=True)
+def migrated_db():
+    from open_webui.config import run_migrations
+
+    run_migrations()
+
+
+@pytest.fixture(autouse=True)
+def empty_tables(monkeypatch):
+    monkeypatch.setattr(module, "GROUP_MEMBERSHIP_CACHE_TTL", 60)
+    Groups.delete_all_groups()
+    yield
+    Groups.delete_all_groups()
+
+
+def new_user_id():
+    return f"user-{uuid.uuid4()}"
+
+
+def new_group(name="group", user_ids=None):
+    group = Groups.insert_new_group("admin", GroupForm(name=name, description=""))
+    if user_ids:
+        group = Groups.add_users_to_group(group.id, user_ids)
+    return group
+
+
+def get_members(group_id):
+    with get_db() as db:
+        return {
+            user_id
+            for (user_id,) in db.query(GroupMember.user_id).filter_by(group_id=group_id)
+        }
+
+
+def test_writes_are_mirrored_into_group_member():
+    alice, bob, carol = new_user_id(), new_user_id(), new_user_id()
+
+    group = new_group(user_ids=[alice, bob])
+    assert get_members(group.id) == {alice, bob}
+
+    Groups.remove_users_from_group(group.id, [bob])
+    assert get_members(group.id) == {alice}
+
+    Groups.update_group_by_id(
+        group.id, GroupUpdateForm(name="group", description="", user_ids=[bob, carol])
+    )
+    assert get_members(group.id) == {bob, carol}
+    assert set(Groups.get_group_by_id(group.id).user_ids) == {bob, carol}
+
+    Groups.remove_user_from_all_groups(carol)
+    assert get_members(group.id) == {bob}
+
+    Groups.delete_group_by_id(group.id)
+    assert get_members(group.id) == set()
+
+
+def test_sync_groups_by_group_names():
+    alice = new_user_id()
+    first, second, third = new_group("first"), new_group("second"), new_group("third")
+    Groups.add_users_to_group(first.id, [alice])
+
+    Groups.sync_groups_by_group_names(alice, ["second", "third"])
+
+    assert Groups.get_group_ids_by_member_id(alice) == {second.id, third.id}
+    assert get_members(first.id) == set()
+    assert alice in Groups.get_group_by_id(third.id).user_ids
+    assert alice not in Groups.get_group_by_id(first.id).user_ids
+
+
+def test_lookups_use_group_member():
+    alice, bob = new_user_id(), new_user_id()
+    first = new_group("first", [alice, bob])
+    second = new_group("second", [alice])
+
+    assert Groups.get_group_ids_by_member_id(alice) == {first.id, second.id}
+    assert {group.id for group in Groups.get_groups_by_member_id(bob)} == {first.id}
+    assert Groups.get_user_ids_by_group_ids([first.id, second.id]) == {alice, bob}
+    assert Groups.get_group_ids_by_member_id(new_user_id()) == set()
+
+
+def test_writes_invalidate_cached_memberships():
+    alice = new_user_id()
+    group = new_group()
+    assert Groups.get_group_ids_by_member_id(alice) == set()
+
+    Groups.add_users_to_group(group.id, [alice])
+    assert Groups.get_group_ids_by_member_id(alice) == {group.id}
+
+    Groups.remove_users_from_group(group.id, [alice])
+    assert Groups.get_group_ids_by_member_id(alice) == set()
+
+    Groups.add_users_to_group(group.id, [alice])
+    Groups.delete_group_by_id(group.id)
+    assert Groups.get_group_ids_by_member_id(alice) == set()
+
+
+def test_memberships_are_cached_until_ttl(monkeypatch):
+    alice = new_user_id()
+    group = new_group()
+    now = [time.monotonic()]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    assert Groups.get_group_ids_by_member_id(alice) == set()
+
+    # Written by another instance, not through Groups
+    with get_db() as db:
+        db.add(GroupMember(group_id=group.id, user_id=alice, created_at=0))
+        db.commit()
+
+    assert Groups.get_group_ids_by_member_id(alice) == set()
+    now[0] += 60
+    assert Groups.get_group_ids_by_member_id(alice) == {group.id}
+
+
+def test_has_access_and_filter_by_access():
+    alice, bob = new_user_id(), new_user_id()
+    group = new_group(user_ids=[alice])
+    access_control = {"read": {"group_ids": [group.id], "user_ids": [bob]}}
+
+    assert has_access(alice, "read", access_control)
+    assert has_access(bob, "read", access_control)
+    assert not has_access(alice, "write", access_control)
+    assert not has_access(new_user_id(), "read", access_control)
+
+    class Item:
+        def __init__(self, user_id, access_control):
+            self.user_id = user_id
+            self.access_control = access_control
+
+    items = [
+        Item(alice, {}),
+        Item("admin", access_control),
+        Item("admin", {}),
+        Item("admin", None),
+    ]
+    assert filter_by_access(alice, "read", items) == items[:2] + items[3:]
+    assert filter_by_access(alice, "write", items) == items[:1]
@@ -0,0 +1,386 @@
+import math
+
+import numpy as np
+import pytest
+from rank_bm25 import BM25Okapi
+
+from open_webui.retrieval.vector import bm25
+from open_webui.retrieval.vector.bm25 import (
+    BM25IndexedClient,
+    BM25IndexStore,
+    tokenize,
+)
+from open_webui.retrieval.vector.main import GetResult, VectorDBBase
+
+
+class LuceneBM25(BM25Okapi):
+    """BM25Okapi with the IDF used by BM25Index"""
+
+    def _calc_idf(self, nd):
+        for word, freq in nd.items():
+            self.idf[word] = math.log(
+                (self.corpus_size - freq + 0.5) / (freq + 0.5) + 1
+            )
+
+
+class InMemoryVectorDB(VectorDBBase):
+    def __init__(self):
+        # Key: collection name, Value: {id: item}
+        self.collections = {}
+        self.get_calls = 0
+        self.fail_writes = False
+
+    def has_collection(self, collection_name):
+        return bool(self.collections.get(collection_name))
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    def insert(self, collection_name, items):
+        self.upsert(collection_name, items)
+
+    def upsert(self, collection_name, items):
+        collection = self.collections.setdefault(collection_name, {})
+        for item in items:
+            collection[item["id"]] = item
+            if self.fail_writes:
+                raise RuntimeError("write failed")
+
+    def search(self, collection_name, vectors, limit):
+        return None
+
+    def query(self, collection_name, filter, limit=None):
+        return None
+
+    def get(self, collection_name):
+        self.get_calls += 1
+        collection = self.collections.get(collection_name)
+        if not collection:
+            return None
+        items = list(collection.values())
+        return GetResult(
+            ids=[[item["id"] for item in items]],
+            documents=[[item["text"] for item in items]],
+            metadatas=[[item["metadata"] for item in items]],
+        )
+
+    def get_embeddings(self, collection_name, ids):
+        collection = self.collections.get(collection_name, {})
+        return {
+            chunk_id: collection[chunk_id]["vector"]
+            for chunk_id in ids
+            if chunk_id in collection
+        }
+
+    def delete(self, collection_name, ids=None, filter=None):
+        collection = self.collections.get(collection_name, {})
+        for chunk_id, item in list(collection.items()):
+            if (ids and chunk_id in ids) or (
+                filter and all(item["metadata"].get(k) == v for k, v in filter.items())
+            ):
+                del collection[chunk_id]
+
+    def reset(self):
+        self.collections = {}
+
+
+class InMemoryVersions:
+    def __init__(self):
+        self.versions = {}
+
+    def get_version(self, collection_name):
+        return self.versions.get(collection_name, 0)
+
+    def increment(self, collection_name):
+        self.versions[collection_name] = self.get_version(collection_name) + 1
+        return self.versions[collection_name]
+
+    def increment_all(self):
+        for collection_name in self.versions:
+            self.versions[collection_name] += 1
+
+
+CORPUS = [
+    "the quick brown fox jumps over the lazy dog",
+    "a lazy afternoon in the sun",
+    "foxes are quick and clever animals",
+    "the dog barks at the mailman every morning",
+    "brown bears and brown foxes live in the forest",
+    "clever dogs learn quick tricks",
+]
+
+
+def make_items(texts, start=0, source="a.txt"):
+    return [
+        {
+            "id": f"chunk-{start + i}",
+            "text": text,
+            "vector": [float(start + i), 1.0, 0.0],
+            "metadata": {"source": source, "n": start + i},
+        }
+        for i, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture
+def vector_db():
+    return InMemoryVectorDB()
+
+
+@pytest.fixture
+def versions():
+    return InMemoryVersions()
+
+
+@pytest.fixture
+def client(tmp_path, vector_db, versions):
+    return BM25IndexedClient(
+        vector_db, BM25IndexStore(str(tmp_path / "bm25")), versions
+    )
+
+
+def live_texts(index):
+    return {
+        index.segments[idx].ids[doc]: index.segments[idx].get_record(doc)[0]
+        for idx, doc in index.iter_live()
+    }
+
+
+def assert_scores_match(index, query):
+    ids = [index.segments[idx].ids[doc] for idx, doc in index.iter_live()]
+    texts = live_texts(index)
+    expected = LuceneBM25([tokenize(texts[chunk_id]) for chunk_id in ids])
+    expected.k1, expected.b = bm25.BM25_K1, bm25.BM25_B
+    expected_scores = expected.get_scores(tokenize(query))
+
+    scores = index.get_scores(query)
+    live = np.concatenate(index.live)
+    assert np.allclose(scores[live], expected_scores, rtol=1e-5)
+    assert not scores[~live].any()
+
+
+class TestBM25Index:
+    def test_insert_builds_index_of_new_collection(self, client, vector_db):
+        client.insert("kb", make_items(CORPUS))
+
+        assert client.bm25.exists("kb")
+        index = client.get_bm25_index("kb")
+        assert len(index) == len(CORPUS)
+        # Built from the inserted chunks, current with the collection version
+        assert vector_db.get_calls == 0
+
+    def test_scores_match_rank_bm25(self, client):
+        client.insert("kb", make_items(CORPUS))
+        index = client.get_bm25_index("kb")
+
+        for query in ["quick fox", "lazy dog", "brown", "clever animals", "cat"]:
+            assert_scores_match(index, query)
+
+        results = index.search("brown fox", k=2)
+        assert [doc.id for doc in results] == ["chunk-0", "chunk-4"]
+        assert results[0].page_content == CORPUS[0]
+        assert results[0].metadata == {"source": "a.txt", "n": 0}
+
+        assert index.search("cat", k=3) == []
+
+    def test_upsert_replaces_chunk(self, client):
+        client.insert("kb", make_items(CORPUS))
+        client.upsert(
+            "kb",
+            [
+                {
+                    "id": "chunk-1",
+                    "text": "a sunny zebra",
+                    "vector": [1.0, 1.0, 0.0],
+                    "metadata": {"source": "a.txt", "n": 1},
+                }
+            ],
+        )
+
+        index = client.get_bm25_index("kb")
+        assert len(index) == len(CORPUS)
+        assert [doc.id for doc in index.search("zebra", k=5)] == ["chunk-1"]
+        assert "chunk-1" not in [doc.id for doc in index.search("afternoon", k=5)]
+        assert_scores_match(index, "lazy sunny zebra")
+
+    def test_delete_by_id_and_filter(self, client):
+        client.insert("kb", make_items(CORPUS[:3]))
+        client.insert("kb", make_items(CORPUS[3:], start=3, source="b.txt"))
+
+        client.delete("kb", ids=["chunk-0"])
+        assert set(live_texts(client.get_bm25_index("kb"))) == {
+            "chunk-1",
+            "chunk-2",
+            "chunk-3",
+            "chunk-4",
+            "chunk-5",
+        }
+
+        client.delete("kb", filter={"source": "b.txt"})
+        index = client.get_bm25_index("kb")
+        assert set(live_texts(index)) == {"chunk-1", "chunk-2"}
+        assert_scores_match(index, "quick lazy")
+
+    def test_segments_are_merged(self, client, monkeypatch):
+        monkeypatch.setattr(bm25, "MAX_SEGMENTS", 3)
+        for i, text in enumerate(CORPUS):
+            client.insert("kb", make_items([text], start=i))
+
+        index = client.get_bm25_index("kb")
+        assert len(index.manifest["segments"]) <= 3
+        assert len(index) == len(CORPUS)
+        assert_scores_match(index, "quick brown dog")
+
+    def test_deleted_chunks_are_merged_away(self, client, monkeypatch):
+        monkeypatch.setattr(bm25, "MAX_DELETED_RATIO", 0.4)
+        client.insert("kb", make_items(CORPUS))
+
+        client.delete("kb", ids=["chunk-0", "chunk-1"])
+        assert client.get_bm25_index("kb").manifest["segments"][0]["deleted"]
+
+        client.delete("kb", ids=["chunk-2"])
+        index = client.get_bm25_index("kb")
+        assert [
+            (entry["size"], entry["deleted"]) for entry in index.manifest["segments"]
+        ] == [(3, [])]
+        assert set(live_texts(index)) == {"chunk-3", "chunk-4", "chunk-5"}
+
+    def test_delete_collection(self, client, versions):
+        client.insert("kb", make_items(CORPUS))
+        client.delete_collection("kb")
+
+        assert not client.bm25.exists("kb")
+        assert client.get_bm25_index("kb") is None
+        assert versions.get_version("kb") == 2
+
+
+class TestBM25IndexStaleness:
+    def test_search_does_not_read_vector_db_when_current(self, client, vector_db):
+        client.insert("kb", make_items(CORPUS[:3]))
+        client.insert("kb", make_items(CORPUS[3:], start=3))
+        client.delete("kb", ids=["chunk-0"])
+
+        for _ in range(3):
+            client.get_bm25_index("kb")
+        assert vector_db.get_calls == 0
+
+    def test_other_instance_catches_up_incrementally(
+        self, tmp_path, vector_db, versions, monkeypatch
+    ):
+        monkeypatch.setattr(bm25, "MAX_DELETED_RATIO", 1)
+
+        # Two instances with their own index directories
+        a = BM25IndexedClient(vector_db, BM25IndexStore(str(tmp_path / "a")), versions)
+        b = BM25IndexedClient(vector_db, BM25IndexStore(str(tmp_path / "b")), versions)
+
+        a.insert("kb", make_items(CORPUS[:4]))
+        assert len(b.get_bm25_index("kb")) == 4
+        assert vector_db.get_calls == 1
+
+        # Unchanged when nothing was written in between
+        b.get_bm25_index("kb")
+        assert vector_db.get_calls == 1
+
+        a.insert("kb", make_items(CORPUS[4:], start=4))
+        a.delete("kb", ids=["chunk-0"])
+        a.upsert(
+            "kb",
+            [
+                {
+                    "id": "chunk-1",
+                    "text": "a sunny zebra",
+                    "vector": [1.0, 1.0, 0.0],
+                    "metadata": {"source": "a.txt", "n": 1},
+                }
+            ],
+        )
+
+        index = b.get_bm25_index("kb")
+        assert live_texts(index) == live_texts(a.get_bm25_index("kb"))
+        assert live_texts(index)["chunk-1"] == "a sunny zebra"
+        # Only the added and changed chunks were indexed again
+        assert [entry["size"] for entry in index.manifest["segments"]] == [4, 3]
+        assert_scores_match(index, "zebra quick dog")
+
+    def test_existing_collection_is_indexed_on_insert(self, client, vector_db):
+        # Written before indexes were kept
+        vector_db.insert("kb", make_items(CORPUS[:3]))
+
+        client.insert("kb", make_items(CORPUS[3:], start=3))
+
+        assert client.bm25.exists("kb")
+        assert len(client.get_bm25_index("kb")) == len(CORPUS)
+        assert vector_db.get_calls == 1
+
+    def test_failed_write_marks_index_behind(self, client, vector_db):
+        client.insert("kb", make_items(CORPUS[:3]))
+
+        vector_db.fail_writes = True
+        with pytest.raises(RuntimeError):
+            client.insert("kb", make_items(CORPUS[3:], start=3))
+        vector_db.fail_writes = False
+
+        # The first chunk of the failed write was stored
+        index = client.get_bm25_index("kb")
+        assert set(live_texts(index)) == {"chunk-0", "chunk-1", "chunk-2", "chunk-3"}
+        assert vector_db.get_calls == 1
+
+    def test_operator_filter_delete_updates_from_vector_db(self, client, vector_db):
+        client.insert("kb", make_items(CORPUS))
+        vector_db.delete("kb", ids=["chunk-5"])
+        client.delete("kb", filter={"n": {"$gte": 5}})
+
+        assert set(live_texts(client.get_bm25_index("kb"))) == {
+            f"chunk-{i}" for i in range(5)
+        }
+
+    def test_insert_without_hybrid_search_builds_no_index(self, client, vector_db):
+        client.build_on_insert = lambda: False
+        client.insert("kb", make_items(CORPUS[:3]))
+        client.insert("kb", make_items(CORPUS[3:], start=3))
+
+        assert not client.bm25.exists("kb")
+        # Built on the first hybrid search once it is enabled
+        index = client.get_bm25_index("kb")
+        assert len(index) == len(CORPUS)
+        assert len(index.get_vectors(["chunk-0", "chunk-5"])) == 2
+        assert vector_db.get_calls == 1
+
+    def test_index_is_updated_without_hybrid_search(self, client, vector_db):
+        client.insert("kb", make_items(CORPUS[:3]))
+        client.build_on_insert = lambda: False
+        client.insert("kb", make_items(CORPUS[3:], start=3))
+
+        assert len(client.get_bm25_index("kb")) == len(CORPUS)
+        assert vector_db.get_calls == 0
+
+
+class TestBM25IndexVectors:
+    def test_inserted_vectors_are_stored(self, client):
+        client.insert("kb", make_items(CORPUS[:2]))
+
+        vectors = client.get_bm25_index("kb").get_vectors(["chunk-1", "unknown"])
+        assert list(vectors) == ["chunk-1"]
+        assert vectors["chunk-1"].tolist() == [1.0, 1.0, 0.0]
+
+    def test_index_built_from_vector_db_has_vectors(self, client, vector_db):
+        vector_db.insert("kb", make_items(CORPUS))
+
+        index = client.get_bm25_index("kb")
+        vectors = index.get_vectors([f"chunk-{i}" for i in range(len(CORPUS))])
+        assert {chunk_id: vector.tolist() for chunk_id, vector in vectors.items()} == {
+            f"chunk-{i}": [float(i), 1.0, 0.0] for i in range(len(CORPUS))
+        }
+
+    def test_sync_keeps_and_adds_vectors(self, tmp_path, vector_db, versions):
+        a = BM25IndexedClient(vector_db, BM25IndexStore(str(tmp_path / "a")), versions)
+        b = BM25IndexedClient(vector_db, BM25IndexStore(str(tmp_path / "b")), versions)
+
+        a.insert("kb", make_items(CORPUS[:3]))
+        b.get_bm25_index("kb")
+        a.insert("kb", make_items(CORPUS[3:], start=3))
+
+        vectors = b.get_bm25_index("kb").get_vectors(
+            [f"chunk-{i}" for i in range(len(CORPUS))]
+        )
+        assert len(vectors) == len(CORPUS)
@@ -0,0 +1,144 @@
+import pytest
+
+from open_webui.retrieval import embedding_cache as module
+from open_webui.retrieval.embedding_cache import EmbeddingCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.fail = False
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def get(self, key):
+        self.commands.append(("get", key))
+
+    def set(self, key, value, ex=None):
+        self.commands.append(("set", key, value))
+
+    def execute(self):
+        if self.redis.fail:
+            raise ConnectionError("down")
+        results = []
+        for command in self.commands:
+            if command[0] == "get":
+                results.append(self.redis.values.get(command[1]))
+            else:
+                self.redis.values[command[1]] = command[2]
+                results.append(True)
+        return results
+
+
+class EmbeddingFunction:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, query, prefix=None, user=None):
+        self.calls.append(query)
+        if isinstance(query, str):
+            return [float(len(query))]
+        return [[float(len(text))] for text in query]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestEmbeddingCache:
+    def test_only_missing_texts_are_embedded(self):
+        func = EmbeddingFunction()
+        embed = EmbeddingCache().wrap(func, "openai", "model")
+
+        assert embed("a") == [1.0]
+        assert embed(["a", "bb", "bb", "ccc"]) == [[1.0], [2.0], [2.0], [3.0]]
+        assert embed("ccc") == [3.0]
+
+        assert func.calls == [["a"], ["bb", "ccc"]]
+
+    def test_key_includes_engine_model_and_prefix(self):
+        keys = {
+            EmbeddingCache.make_key("openai", "model", None, "text"),
+            EmbeddingCache.make_key("ollama", "model", None, "text"),
+            EmbeddingCache.make_key("openai", "other", None, "text"),
+            EmbeddingCache.make_key("openai", "model", "query: ", "text"),
+        }
+        assert len(keys) == 4
+        assert EmbeddingCache.make_key(
+            "openai", "model", None, "text"
+        ) == EmbeddingCache.make_key("openai", "model", "", "text")
+
+    def test_least_recently_used_is_evicted(self):
+        cache = EmbeddingCache(max_size=2)
+        cache.set_many({"a": [1.0], "b": [2.0]})
+        cache.get_many(["a"])
+        cache.set_many({"c": [3.0]})
+
+        assert cache.get_many(["a", "b", "c"]) == {"a": [1.0], "c": [3.0]}
+
+    def test_entries_expire(self, clock):
+        cache = EmbeddingCache(ttl=10)
+        cache.set_many({"a": [1.0]})
+
+        clock[0] += 9
+        assert cache.get_many(["a"]) == {"a": [1.0]}
+        clock[0] += 1
+        assert cache.get_many(["a"]) == {}
+        assert not cache._entries
+
+    def test_clear(self):
+        cache = EmbeddingCache()
+        cache.set_many({"a": [1.0]})
+
+        cache.clear()
+
+        assert cache.get_many(["a"]) == {}
+
+    def test_incomplete_result_is_not_cached(self):
+        def func(query, prefix=None, user=None):
+            return [None for _ in query] if isinstance(query, list) else None
+
+        cache = EmbeddingCache()
+        embed = cache.wrap(func, "openai", "model")
+
+        assert embed("a") is None
+        assert embed(["a", "b"]) == [None, None]
+        assert not cache._entries
+
+    def test_shared_through_redis(self):
+        redis = FakeRedis()
+        func = EmbeddingFunction()
+        first = EmbeddingCache(redis=redis, redis_key_prefix="test")
+        second = EmbeddingCache(redis=redis, redis_key_prefix="test")
+
+        first.wrap(func, "openai", "model")(["a", "bb"])
+        assert all(
+            key.startswith("test:embedding:openai:model:") for key in redis.values
+        )
+
+        assert second.wrap(func, "openai", "model")(["bb", "a"]) == [[2.0], [1.0]]
+        assert func.calls == [["a", "bb"]]
+        # Kept locally once read from Redis
+        redis.values.clear()
+        assert second.wrap(func, "openai", "model")("a") == [1.0]
+        assert len(func.calls) == 1
+
+    def test_redis_errors_fall_back_to_local(self):
+        redis = FakeRedis()
+        redis.fail = True
+        func = EmbeddingFunction()
+        embed = EmbeddingCache(redis=redis).wrap(func, "openai", "model")
+
+        assert embed("a") == [1.0]
+        assert embed("a") == [1.0]
+        assert func.calls == [["a"]]
@@ -0,0 +1,121 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from open_webui.retrieval import embedding_client as module
+from open_webui.retrieval.embedding_client import (
+    EmbeddingBatchTooLargeError,
+    EmbeddingClient,
+)
+
+
+def make_response(status_code, json=None, text="", headers=None):
+    r = MagicMock()
+    r.status_code = status_code
+    r.text = text
+    r.headers = headers or {}
+    r.json.return_value = json
+    if status_code >= 400:
+        r.raise_for_status.side_effect = module.requests.HTTPError(str(status_code))
+    return r
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(module.time, "sleep", sleeps.append)
+    return sleeps
+
+
+@pytest.fixture
+def client():
+    client = EmbeddingClient(concurrency=2, max_retries=2)
+    client.session = MagicMock()
+    return client
+
+
+class TestEmbeddingClientPost:
+    def test_retries_retryable_status(self, client, sleeps):
+        client.session.post.side_effect = [
+            make_response(503),
+            make_response(200, json={"data": []}),
+        ]
+
+        assert client.post("http://embed", {}, {}) == {"data": []}
+        assert client.session.post.call_count == 2
+        assert len(sleeps) == 1
+
+    def test_retry_after_is_capped(self, client, sleeps):
+        client.session.post.side_effect = [
+            make_response(429, headers={"Retry-After": "5"}),
+            make_response(429, headers={"Retry-After": "86400"}),
+            make_response(200, json={}),
+        ]
+
+        client.post("http://embed", {}, {})
+
+        assert sleeps == [5.0, module.RETRY_BACKOFF_MAX]
+
+    def test_gives_up_after_max_retries(self, client, sleeps):
+        client.session.post.return_value = make_response(503)
+
+        with pytest.raises(module.requests.HTTPError):
+            client.post("http://embed", {}, {})
+
+        assert client.session.post.call_count == 3
+        assert len(sleeps) == 2
+
+    @pytest.mark.parametrize(
+        "status_code, text",
+        [(413, ""), (400, "Input is too long for the model's maximum context")],
+    )
+    def test_batch_too_large(self, client, sleeps, status_code, text):
+        client.session.post.return_value = make_response(status_code, text=text)
+
+        with pytest.raises(EmbeddingBatchTooLargeError):
+            client.post("http://embed", {}, {})
+
+        assert sleeps == []
+
+    def test_other_bad_request_is_not_split(self, client):
+        client.session.post.return_value = make_response(400, text="invalid model")
+
+        with pytest.raises(module.requests.HTTPError):
+            client.post("http://embed", {}, {})
+
+
+class TestEmbeddingClientBatches:
+    def test_embed_splits_too_large_batches(self, client):
+        batches = []
+
+        def embed_batch(texts):
+            batches.append(texts)
+            if len(texts) > 2:
+                raise EmbeddingBatchTooLargeError("too large")
+            return [[float(text)] for text in texts]
+
+        texts = [str(i) for i in range(5)]
+        assert client.embed(texts, embed_batch) == [[float(i)] for i in range(5)]
+        assert batches == [
+            ["0", "1", "2", "3", "4"],
+            ["0", "1"],
+            ["2", "3", "4"],
+            ["2"],
+            ["3", "4"],
+        ]
+
+    def test_embed_single_text_too_large(self, client):
+        def embed_batch(texts):
+            raise EmbeddingBatchTooLargeError("too large")
+
+        with pytest.raises(EmbeddingBatchTooLargeError):
+            client.embed(["a", "b"], embed_batch)
+
+    def test_map_batches_keeps_order(self, client):
+        texts = [str(i) for i in range(7)]
+
+        assert client.map_batches(texts, lambda batch: batch, 3) == [
+            ["0", "1", "2"],
+            ["3", "4", "5"],
+            ["6"],
+        ]
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from open_webui.retrieval.vector.dbs import pgvector
+
+
+def make_items(count):
+    return [
+        {
+            "id": f"chunk-{i}",
+            "text": f"text {i}",
+            "vector": [float(i), 1.0],
+            "metadata": {"n": i},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(pgvector, "PGVECTOR_INSERT_BATCH_SIZE", 2)
+    # Without __init__, which connects to the database
+    client = pgvector.PgvectorClient.__new__(pgvector.PgvectorClient)
+    client.session = MagicMock()
+    return client
+
+
+def compile_statement(call):
+    return str(call.args[0].compile(dialect=postgresql.dialect()))
+
+
+class TestPgvectorWrite:
+    def test_insert_commits_each_batch(self, client):
+        client.insert("kb", make_items(5))
+
+        executed = client.session.execute.call_args_list
+        assert len(executed) == 3
+        assert client.session.commit.call_count == 3
+        assert [len(call.args[0]._multi_values[0]) for call in executed] == [2, 2, 1]
+        assert "ON CONFLICT (id) DO NOTHING" in compile_statement(executed[0])
+
+    def test_upsert_updates_on_conflict_and_keeps_last_item(self, client):
+        items = make_items(3)
+        items.append({**items[0], "text": "changed"})
+
+        get_row = MagicMock(side_effect=client._get_row)
+        client._get_row = get_row
+        client.upsert("kb", items)
+
+        executed = client.session.execute.call_args_list
+        assert len(executed) == 2
+        assert "ON CONFLICT (id) DO UPDATE" in compile_statement(executed[0])
+        rows = [call.args[1] for call in get_row.call_args_list]
+        assert [row["id"] for row in rows] == ["chunk-0", "chunk-1", "chunk-2"]
+        assert rows[0]["text"] == "changed"
+
+    def test_failed_batch_keeps_committed_batches(self, client):
+        client.session.execute.side_effect = [None, RuntimeError("failed")]
+
+        with pytest.raises(RuntimeError):
+            client.insert("kb", make_items(4))
+
+        assert client.session.commit.call_count == 1
+        client.session.rollback.assert_called_once()
+
+
+class TestPgvectorSearchCollections:
+    def test_rows_sliced_per_collection(self, client):
+        # Query ids are numbered collection by collection, vector by vector
+        client.session.execute.return_value.all.return_value = [
+            SimpleNamespace(
+                qid=qid,
+                id=f"chunk-{qid}",
+                text=f"text {qid}",
+                vmetadata={"qid": qid},
+                distance=0.0,
+            )
+            for qid in (0, 1, 3)
+        ]
+
+        results = client.search_collections(["a", "b"], [[1.0], [2.0]], 5)
+
+        assert client.session.execute.call_count == 1
+        assert results["a"].ids == [["chunk-0"], ["chunk-1"]]
+        assert results["b"].ids == [[], ["chunk-3"]]
+        assert results["b"].metadatas == [[], [{"qid": 3}]]
+        assert results["a"].distances == [[1.0], [1.0]]
+
+    def test_error_fails_every_collection(self, client):
+        client.session.execute.side_effect = RuntimeError("failed")
+
+        results = client.search_collections(["a", "b"], [[1.0]], 5)
+
+        assert results == {"a": None, "b": None}
+        client.session.rollback.assert_called_once()
+
+    def test_nothing_to_search(self, client):
+        assert client.search_collections(["a"], [], 5) == {"a": None}
+        client.session.execute.assert_not_called()
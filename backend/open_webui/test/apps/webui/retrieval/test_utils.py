@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock
+import uuid
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from open_webui.retrieval.utils import RerankCompressor, get_chunk_embeddings
+
+
+def make_documents(count):
+    return [
+        Document(id=f"chunk-{i}", page_content=f"text {i}", metadata={"n": i})
+        for i in range(count)
+    ]
+
+
+class TestRerankCompressor:
+    def test_scores_stored_embeddings_without_embedding(self):
+        embedding_function = MagicMock()
+        stored = {
+            "chunk-0": np.array([0.0, 1.0], dtype=np.float32),
+            "chunk-1": np.array([1.0, 0.0], dtype=np.float32),
+            "chunk-2": np.array([1.0, 1.0], dtype=np.float32),
+        }
+        compressor = RerankCompressor(
+            embedding_function=embedding_function,
+            top_n=2,
+            reranking_function=None,
+            r_score=0.0,
+            query_embedding=[1.0, 0.0],
+            get_stored_embeddings=lambda ids: {
+                chunk_id: stored[chunk_id] for chunk_id in ids
+            },
+        )
+
+        result = compressor.compress_documents(make_documents(3), "query")
+
+        embedding_function.assert_not_called()
+        assert [doc.metadata["n"] for doc in result] == [1, 2]
+        assert np.allclose(
+            [doc.metadata["score"] for doc in result], [1.0, np.sqrt(0.5)]
+        )
+
+    def test_embeds_only_chunks_without_stored_embeddings(self):
+        embedding_function = MagicMock(return_value=[[0.0, 1.0]])
+        compressor = RerankCompressor(
+            embedding_function=embedding_function,
+            top_n=3,
+            reranking_function=None,
+            r_score=0.0,
+            query_embedding=[0.0, 1.0],
+            get_stored_embeddings=lambda ids: {
+                "chunk-0": np.array([1.0, 0.0], dtype=np.float32)
+            },
+        )
+
+        result = compressor.compress_documents(make_documents(2), "query")
+
+        embedding_function.assert_called_once()
+        assert embedding_function.call_args.args[0] == ["text 1"]
+        assert [doc.metadata["n"] for doc in result] == [1, 0]
+
+
+@pytest.fixture
+def migrated_db():
+    from open_webui.config import run_migrations
+
+    run_migrations()
+
+
+@pytest.mark.usefixtures("migrated_db")
+class TestGetChunkEmbeddings:
+    def embed(self, texts, prefix=None, user=None):
+        self.embedded.append(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def test_reused_only_for_same_endpoint(self):
+        self.embedded = []
+        model = f"model-{uuid.uuid4()}"
+        texts = ["first chunk", "second", "first chunk"]
+
+        def get(url):
+            return get_chunk_embeddings(texts, self.embed, "openai", model, url)
+
+        assert get("http://a/v1") == [[11.0, 1.0], [6.0, 1.0], [11.0, 1.0]]
+        assert get("http://a/v1") == [[11.0, 1.0], [6.0, 1.0], [11.0, 1.0]]
+        assert self.embedded == [["first chunk", "second"]]
+
+        # Same engine and model name, served from another endpoint
+        get("http://b/v1")
+        assert self.embedded == [["first chunk", "second"]] * 2
@@ -0,0 +1,94 @@
+import pytest
+
+from open_webui.retrieval.vector.main import SearchResult, VectorDBBase
+
+
+class FakeVectorDB(VectorDBBase):
+    """Searches return one hit per query vector, named after the collection"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.searches = []
+
+    def has_collection(self, collection_name):
+        return True
+
+    def delete_collection(self, collection_name):
+        pass
+
+    def insert(self, collection_name, items):
+        pass
+
+    def upsert(self, collection_name, items):
+        pass
+
+    def search(self, collection_name, vectors, limit):
+        self.searches.append((collection_name, vectors, limit))
+        if (collection_name, tuple(vectors[0])) in self.failing or (
+            collection_name in self.failing
+        ):
+            raise RuntimeError("search failed")
+        return SearchResult(
+            ids=[[f"{collection_name}-{vector[0]}"] for vector in vectors],
+            documents=[[f"doc {vector[0]}"] for vector in vectors],
+            metadatas=[[{"vector": vector[0]}] for vector in vectors],
+            distances=[[vector[0] / 10] for vector in vectors],
+        )
+
+    def query(self, collection_name, filter, limit=None):
+        return None
+
+    def get(self, collection_name):
+        return None
+
+    def delete(self, collection_name, ids=None, filter=None):
+        pass
+
+    def reset(self):
+        pass
+
+
+VECTORS = [[1.0, 0.0], [2.0, 0.0]]
+
+
+class TestSearchCollections:
+    def test_rows_merged_per_collection_in_vector_order(self):
+        db = FakeVectorDB()
+
+        results = db.search_collections(["a", "b"], VECTORS, 3)
+
+        assert sorted(db.searches) == [
+            ("a", [[1.0, 0.0]], 3),
+            ("a", [[2.0, 0.0]], 3),
+            ("b", [[1.0, 0.0]], 3),
+            ("b", [[2.0, 0.0]], 3),
+        ]
+        assert results["a"].ids == [["a-1.0"], ["a-2.0"]]
+        assert results["b"].documents == [["doc 1.0"], ["doc 2.0"]]
+        assert results["b"].distances == [[0.1], [0.2]]
+
+    def test_failed_vector_leaves_empty_row(self):
+        db = FakeVectorDB(failing=[("a", (1.0, 0.0))])
+
+        results = db.search_collections(["a"], VECTORS, 3)
+
+        assert results["a"].ids == [[], ["a-2.0"]]
+        assert results["a"].metadatas == [[], [{"vector": 2.0}]]
+
+    def test_failed_collection_is_none(self):
+        db = FakeVectorDB(failing=["a"])
+
+        results = db.search_collections(["a", "b"], VECTORS, 3)
+
+        assert results["a"] is None
+        assert results["b"].ids == [["b-1.0"], ["b-2.0"]]
+
+    def test_multi_vector_search(self):
+        db = FakeVectorDB(failing=["b"])
+        db.multi_vector_search = True
+
+        results = db.search_collections(["a", "b"], VECTORS, 3)
+
+        assert sorted(db.searches) == [("a", VECTORS, 3), ("b", VECTORS, 3)]
+        assert results["a"].ids == [["a-1.0"], ["a-2.0"]]
+        assert results["b"] is None
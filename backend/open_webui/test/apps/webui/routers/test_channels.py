@@ -0,0 +1,116 @@
+from test.util.abstract_integration_test import AbstractPostgresTest
+from test.util.mock_user import mock_webui_user
+
+
+class TestChannels(AbstractPostgresTest):
+    BASE_PATH = "/api/v1/channels"
+
+    def setup_class(cls):
+        super().setup_class()
+
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.channels import ChannelForm, Channels
+        from open_webui.models.messages import MessageForm, Messages
+
+        self.channel = Channels.insert_new_channel(
+            None, ChannelForm(name="general", access_control=None), "2"
+        )
+        # Oldest first
+        self.messages = [
+            Messages.insert_new_message(
+                MessageForm(content=f"message {i}"), self.channel.id, "2"
+            )
+            for i in range(5)
+        ]
+        self.replies = [
+            Messages.insert_new_message(
+                MessageForm(content=f"reply {i}", parent_id=self.messages[-1].id),
+                self.channel.id,
+                "2",
+            )
+            for i in range(2)
+        ]
+
+    def teardown_method(self):
+        from open_webui.internal.db import Session
+        from sqlalchemy import text
+
+        super().teardown_method()
+        for table in ["message_reaction", "message", "channel"]:
+            Session.execute(text(f"TRUNCATE TABLE {table}"))
+        Session.commit()
+
+    def test_get_channel_messages_cursor(self):
+        ids = []
+        cursor = None
+        with mock_webui_user(id="2", role="admin"):
+            while True:
+                response = self.fast_api_client.get(
+                    self.create_url(f"/{self.channel.id}/messages"),
+                    params={"limit": 2, **({"cursor": cursor} if cursor else {})},
+                )
+                assert response.status_code == 200
+                ids.extend(message["id"] for message in response.json())
+
+                cursor = response.headers.get("X-Next-Cursor")
+                if cursor is None:
+                    break
+
+        # Newest first, each message once, no thread replies
+        assert ids == [message.id for message in reversed(self.messages)]
+
+    def test_get_channel_messages_bad_cursor(self):
+        with mock_webui_user(id="2", role="admin"):
+            response = self.fast_api_client.get(
+                self.create_url(f"/{self.channel.id}/messages"),
+                params={"cursor": "not a cursor"},
+            )
+        assert response.status_code == 400
+
+    def test_get_channel_messages_replies(self):
+        with mock_webui_user(id="2", role="admin"):
+            response = self.fast_api_client.get(
+                self.create_url(f"/{self.channel.id}/messages")
+            )
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+
+        messages = {message["id"]: message for message in response.json()}
+        assert len(messages) == 5
+
+        parent = messages[self.messages[-1].id]
+        assert parent["reply_count"] == 2
+        assert parent["latest_reply_at"] == self.replies[-1].created_at
+
+        for message in self.messages[:-1]:
+            assert messages[message.id]["reply_count"] == 0
+            assert messages[message.id]["latest_reply_at"] is None
+
+    def get_thread_ids(self, limit):
+        pages = []
+        cursor = None
+        with mock_webui_user(id="2", role="admin"):
+            while True:
+                response = self.fast_api_client.get(
+                    self.create_url(
+                        f"/{self.channel.id}/messages/{self.messages[-1].id}/thread"
+                    ),
+                    params={"limit": limit, **({"cursor": cursor} if cursor else {})},
+                )
+                assert response.status_code == 200
+                pages.append([message["id"] for message in response.json()])
+
+                cursor = response.headers.get("X-Next-Cursor")
+                if cursor is None:
+                    return pages
+
+    def test_get_thread_messages_cursor(self):
+        # Replies newest first, then the parent once
+        expected = [reply.id for reply in reversed(self.replies)]
+        expected.append(self.messages[-1].id)
+
+        # The parent completes the page after limit - 1 replies
+        assert self.get_thread_ids(limit=3) == [expected]
+        assert self.get_thread_ids(limit=2) == [expected[:2], expected[2:]]
+        assert self.get_thread_ids(limit=1) == [[id] for id in expected]
@@ -178,6 +178,27 @@ class TestChats(AbstractPostgresTest):
         assert data["title"] == "Just another title"
         assert data["user_id"] == "2"
 
+    def test_update_chat_message_by_id(self):
+        chat_id = self.chats.get_chats()[0].id
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            chat_id, "2", {"role": "assistant", "content": "Hello"}
+        )
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{chat_id}/messages/2"),
+                json={"content": "Hello world"},
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["chat"]["history"] == {
+            "currentId": "2",
+            "messages": {"2": {"role": "assistant", "content": "Hello world"}},
+        }
+        assert self.chats.get_message_by_id_and_message_id(chat_id, "2") == {
+            "role": "assistant",
+            "content": "Hello world",
+        }
+
     def test_delete_chat_by_id(self):
         chat_id = self.chats.get_chats()[0].id
         with mock_webui_user(id="2"):
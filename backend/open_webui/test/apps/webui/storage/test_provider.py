@@ -1,5 +1,7 @@
+import hashlib
 import io
 import os
+import time
 import boto3
 import pytest
 from botocore.exceptions import ClientError
@@ -9,6 +11,7 @@ from gcp_storage_emulator.server import create_server
 from google.cloud import storage
 from azure.storage.blob import BlobServiceClient, ContainerClient, BlobClient
 from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
 
 
 def mock_upload_dir(monkeypatch, tmp_path):
@@ -69,7 +72,9 @@ class TestLocalStorageProvider:
         contents, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert contents.read() == self.file_content
+        assert contents.size == len(self.file_content)
+        assert contents.sha256 == hashlib.sha256(self.file_content).hexdigest()
         assert file_path == str(upload_dir / self.filename)
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -97,6 +102,125 @@ class TestLocalStorageProvider:
         assert not (upload_dir / self.filename_extra).exists()
 
 
+class TestLocalFileCache:
+    file_content = b"test content"
+
+    @staticmethod
+    def downloader(content, calls):
+        def download(path):
+            calls.append(path)
+            with open(path, "wb") as f:
+                f.write(content)
+
+        return download
+
+    def test_get_downloads_once(self, tmp_path):
+        cache = provider.LocalFileCache(0)
+        local_path = str(tmp_path / "test.txt")
+        calls = []
+        download = self.downloader(self.file_content, calls)
+
+        size = len(self.file_content)
+        assert cache.get(local_path, '"etag1"', size, download) == local_path
+        assert cache.get(local_path, '"etag1"', size, download) == local_path
+        assert len(calls) == 1
+        assert (tmp_path / "test.txt").read_bytes() == self.file_content
+        # The download went to a temporary file that was swapped in
+        assert calls[0] != local_path
+        assert not os.path.exists(calls[0])
+
+    def test_get_downloads_changed_object(self, tmp_path):
+        cache = provider.LocalFileCache(0)
+        local_path = str(tmp_path / "test.txt")
+        calls = []
+
+        cache.get(local_path, '"etag1"', 12, self.downloader(b"test content", calls))
+        cache.get(local_path, '"etag2"', 12, self.downloader(b"new  content", calls))
+        assert len(calls) == 2
+        assert (tmp_path / "test.txt").read_bytes() == b"new  content"
+
+        # A missing local copy is downloaded again
+        os.remove(local_path)
+        cache.get(local_path, '"etag2"', 12, self.downloader(b"new  content", calls))
+        assert len(calls) == 3
+
+    def test_get_adopts_uploaded_copy(self, tmp_path):
+        cache = provider.LocalFileCache(0)
+        (tmp_path / "test.txt").write_bytes(self.file_content)
+        local_path = str(tmp_path / "test.txt")
+        cache.add(local_path)
+
+        calls = []
+        download = self.downloader(self.file_content, calls)
+        cache.get(local_path, '"etag1"', len(self.file_content), download)
+        assert calls == []
+
+    def test_get_failed_download(self, tmp_path):
+        cache = provider.LocalFileCache(0)
+        local_path = str(tmp_path / "test.txt")
+
+        def download(path):
+            with open(path, "wb") as f:
+                f.write(b"partial")
+            raise RuntimeError("connection reset")
+
+        with pytest.raises(RuntimeError):
+            cache.get(local_path, '"etag1"', 12, download)
+        assert os.listdir(tmp_path) == []
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = provider.LocalFileCache(2 * len(self.file_content))
+        size = len(self.file_content)
+        calls = []
+        download = self.downloader(self.file_content, calls)
+        paths = [str(tmp_path / f"test{i}.txt") for i in range(3)]
+
+        cache.get(paths[0], '"etag"', size, download)
+        cache.get(paths[1], '"etag"', size, download)
+        # Use the first copy, so the second one is the least recently used
+        cache.get(paths[0], '"etag"', size, download)
+        cache.get(paths[2], '"etag"', size, download)
+
+        assert os.path.exists(paths[0])
+        assert not os.path.exists(paths[1])
+        assert os.path.exists(paths[2])
+        assert len(calls) == 3
+
+        cache.get(paths[1], '"etag"', size, download)
+        assert len(calls) == 4
+        assert not os.path.exists(paths[0])
+
+    def test_keeps_copy_larger_than_limit(self, tmp_path):
+        cache = provider.LocalFileCache(1)
+        local_path = str(tmp_path / "test.txt")
+        calls = []
+        download = self.downloader(self.file_content, calls)
+
+        cache.get(local_path, '"etag"', len(self.file_content), download)
+        assert os.path.exists(local_path)
+
+    def test_concurrent_gets_share_download(self, tmp_path):
+        cache = provider.LocalFileCache(0)
+        local_path = str(tmp_path / "test.txt")
+        calls = []
+
+        def download(path):
+            time.sleep(0.1)
+            self.downloader(self.file_content, calls)(path)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(
+                    cache.get, local_path, '"etag"', len(self.file_content), download
+                )
+                for _ in range(4)
+            ]
+            results = [future.result() for future in futures]
+
+        assert results == [local_path] * 4
+        assert len(calls) == 1
+
+
 @mock_aws
 class TestS3StorageProvider:
 
@@ -124,7 +248,7 @@ class TestS3StorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert contents.read() == self.file_content
         assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -237,7 +361,7 @@ class TestGCSStorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert contents.read() == self.file_content
         assert gcs_file_path == "gs://" + self.Storage.bucket_name + "/" + self.filename
         # test error if file is empty
         with pytest.raises(ValueError):
@@ -252,6 +376,28 @@ class TestGCSStorageProvider:
         assert file_path == str(upload_dir / self.filename)
         assert (upload_dir / self.filename).exists()
 
+    def test_get_file_cached(self, monkeypatch, tmp_path, setup):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        contents, gcs_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
+        )
+        # Only the object in GCS is left
+        (upload_dir / self.filename).unlink()
+
+        calls = []
+        download_to_filename = storage.Blob.download_to_filename
+
+        def counting_download(blob, filename, *args, **kwargs):
+            calls.append(filename)
+            return download_to_filename(blob, filename, *args, **kwargs)
+
+        monkeypatch.setattr(storage.Blob, "download_to_filename", counting_download)
+        self.Storage.get_file(gcs_file_path)
+        file_path = self.Storage.get_file(gcs_file_path)
+        assert file_path == str(upload_dir / self.filename)
+        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        assert len(calls) == 1
+
     def test_delete_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         contents, gcs_file_path = self.Storage.upload_file(
@@ -354,10 +500,13 @@ class TestAzureStorageProvider:
 
         # Assertions
         self.Storage.container_client.get_blob_client.assert_called_with(self.filename)
-        self.Storage.container_client.get_blob_client().upload_blob.assert_called_once_with(
-            self.file_content, overwrite=True
-        )
-        assert contents == self.file_content
+        upload_blob = self.Storage.container_client.get_blob_client().upload_blob
+        upload_blob.assert_called_once()
+        assert upload_blob.call_args.kwargs == {
+            "length": len(self.file_content),
+            "overwrite": True,
+        }
+        assert contents.read() == self.file_content
         assert (
             azure_file_path
             == f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
@@ -375,7 +524,7 @@ class TestAzureStorageProvider:
         # Mock upload behavior
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         # Mock blob download behavior
-        self.Storage.container_client.get_blob_client().download_blob().readall.return_value = (
+        self.Storage.container_client.get_blob_client().download_blob().readinto.side_effect = lambda stream: stream.write(
             self.file_content
         )
 
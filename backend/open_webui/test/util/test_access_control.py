@@ -0,0 +1,159 @@
+import asyncio
+import uuid
+
+import pytest
+
+from open_webui.internal.db import get_db
+from open_webui.models import groups as module
+from open_webui.models.groups import GroupForm, GroupMember, Groups, GroupUpdateForm
+from open_webui.utils.access_control import get_permissions, has_permission
+
+DEFAULT_PERMISSIONS = {"chat": {"delete": False, "edit": True}, "features": {}}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def migrated_db():
+    from open_webui.config import run_migrations
+
+    run_migrations()
+
+
+@pytest.fixture(autouse=True)
+def empty_tables(monkeypatch):
+    monkeypatch.setattr(module, "GROUP_MEMBERSHIP_CACHE_TTL", 60)
+    Groups.delete_all_groups()
+    yield
+    Groups.delete_all_groups()
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Counts the database sessions the groups table opens"""
+    calls = []
+
+    def counted_get_db():
+        calls.append(1)
+        return get_db()
+
+    monkeypatch.setattr(module, "get_db", counted_get_db)
+    return calls
+
+
+def new_group(user_id, permissions):
+    group = Groups.insert_new_group(
+        "admin", GroupForm(name="group", description="", permissions=permissions)
+    )
+    return Groups.add_users_to_group(group.id, [user_id])
+
+
+def add_member_elsewhere(group_id, user_id):
+    # Written by another instance, not through Groups
+    with get_db() as db:
+        db.add(GroupMember(group_id=group_id, user_id=user_id, created_at=0))
+        db.commit()
+
+
+def test_permissions_combine_groups():
+    user_id = f"user-{uuid.uuid4()}"
+    new_group(user_id, {"chat": {"delete": True}})
+    new_group(user_id, {"chat": {"delete": False}, "features": {"web_search": True}})
+
+    assert get_permissions(user_id, DEFAULT_PERMISSIONS) == {
+        "chat": {"delete": True, "edit": True},
+        "features": {"web_search": True},
+    }
+    assert has_permission(user_id, "features.web_search")
+    # Not granted by any group nor by default
+    assert not has_permission(user_id, "features.custom")
+
+
+def test_resolved_once_per_request(queries, monkeypatch):
+    monkeypatch.setattr(module, "GROUP_MEMBERSHIP_CACHE_TTL", 0)
+    user_id = f"user-{uuid.uuid4()}"
+    group = new_group(user_id, {"chat": {"delete": True}})
+    queries.clear()
+
+    with Groups.request_cache():
+        permissions = get_permissions(user_id, DEFAULT_PERMISSIONS)
+        # A copy: changing it does not change later results
+        permissions["chat"]["delete"] = False
+
+        assert get_permissions(user_id, DEFAULT_PERMISSIONS)["chat"]["delete"]
+        assert has_permission(user_id, "chat.delete")
+        assert Groups.get_group_ids_by_member_id(user_id) == {group.id}
+        assert len(queries) == 1
+
+    # Without a request, and without the TTL cache, every call looks it up
+    get_permissions(user_id, DEFAULT_PERMISSIONS)
+    has_permission(user_id, "chat.delete")
+    assert len(queries) == 3
+
+
+def test_request_cache_is_shared_with_threads(queries, monkeypatch):
+    monkeypatch.setattr(module, "GROUP_MEMBERSHIP_CACHE_TTL", 0)
+    user_id = f"user-{uuid.uuid4()}"
+
+    async def handle_request():
+        with Groups.request_cache():
+            for _ in range(3):
+                await asyncio.to_thread(Groups.get_group_ids_by_member_id, user_id)
+
+    asyncio.run(handle_request())
+
+    assert len(queries) == 1
+
+
+def test_requests_do_not_share_memos(monkeypatch):
+    monkeypatch.setattr(module, "GROUP_MEMBERSHIP_CACHE_TTL", 0)
+    user_id = f"user-{uuid.uuid4()}"
+    group = new_group(f"user-{uuid.uuid4()}", {"chat": {"delete": True}})
+
+    with Groups.request_cache():
+        assert not get_permissions(user_id, DEFAULT_PERMISSIONS)["chat"]["delete"]
+
+    add_member_elsewhere(group.id, user_id)
+
+    with Groups.request_cache():
+        assert get_permissions(user_id, DEFAULT_PERMISSIONS)["chat"]["delete"]
+
+
+def test_ttl_cache_spans_requests(queries, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    user_id = f"user-{uuid.uuid4()}"
+    group = new_group(f"user-{uuid.uuid4()}", {"custom": {"enabled": True}})
+    queries.clear()
+
+    for _ in range(2):
+        with Groups.request_cache():
+            assert not has_permission(user_id, "custom.enabled")
+    assert len(queries) == 1
+
+    add_member_elsewhere(group.id, user_id)
+    assert not has_permission(user_id, "custom.enabled")
+
+    now[0] += 60
+    assert has_permission(user_id, "custom.enabled")
+
+
+def test_permission_change_is_visible_in_the_same_request():
+    user_id = f"user-{uuid.uuid4()}"
+    group = new_group(
+        user_id, {"chat": {"delete": False}, "custom": {"enabled": False}}
+    )
+
+    with Groups.request_cache():
+        assert not has_permission(user_id, "custom.enabled")
+        assert not get_permissions(user_id, DEFAULT_PERMISSIONS)["chat"]["delete"]
+
+        Groups.update_group_by_id(
+            group.id,
+            GroupUpdateForm(
+                name="group",
+                description="",
+                permissions={"chat": {"delete": True}, "custom": {"enabled": True}},
+            ),
+        )
+
+        assert has_permission(user_id, "custom.enabled")
+        assert get_permissions(user_id, DEFAULT_PERMISSIONS)["chat"]["delete"]
@@ -0,0 +1,166 @@
+import json
+
+import pytest
+
+from open_webui import config
+from open_webui.config import AppConfig, PersistentConfig
+
+
+class FakeRedis:
+    """Redis server shared by the workers, delivering pub/sub messages on demand"""
+
+    def __init__(self):
+        self.values = {}
+        self.subscribers = {}
+        self.published = []
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def deliver(self):
+        # Delivers what was published, as the listener threads would
+        for channel, message in self.published:
+            for handler in self.subscribers.get(channel, []):
+                handler({"channel": channel, "data": message})
+        self.published = []
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.keys = []
+
+    def get(self, key):
+        self.keys.append(key)
+
+    def execute(self):
+        return [self.redis.values.get(key) for key in self.keys]
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+
+    def subscribe(self, **handlers):
+        for channel, handler in handlers.items():
+            self.redis.subscribers.setdefault(channel, []).append(handler)
+
+    def run_in_thread(self, sleep_time=0, daemon=False, exception_handler=None):
+        pass
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(config, "get_redis_connection", lambda *args, **kwargs: redis)
+    monkeypatch.setattr(config, "save_to_db", lambda data: None)
+    monkeypatch.setattr(config, "CONFIG_DATA", {})
+    monkeypatch.setattr(config, "PERSISTENT_CONFIG_REGISTRY", [])
+    return redis
+
+
+def make_worker(sync_interval=60):
+    app_config = AppConfig(
+        redis_url="redis://fake", redis_key_prefix="test", sync_interval=sync_interval
+    )
+    app_config.ENABLE_SIGNUP = PersistentConfig(
+        "ENABLE_SIGNUP", "test.app_config.enable_signup", True
+    )
+    app_config.DEFAULT_MODELS = PersistentConfig(
+        "DEFAULT_MODELS", "test.app_config.default_models", ""
+    )
+    return app_config
+
+
+class TestAppConfig:
+    def test_reads_come_from_snapshot(self, redis):
+        worker = make_worker()
+        worker.ENABLE_SIGNUP
+        gets = redis.gets
+
+        for _ in range(10):
+            assert worker.ENABLE_SIGNUP is True
+        assert redis.gets == gets
+
+    def test_write_is_published_and_reread_by_other_workers(self, redis):
+        writer, reader = make_worker(), make_worker()
+        assert reader.ENABLE_SIGNUP is True
+
+        writer.ENABLE_SIGNUP = False
+
+        assert redis.values["test:config:ENABLE_SIGNUP"] == json.dumps(False)
+        assert redis.published == [("test:config:updates", "ENABLE_SIGNUP")]
+        # Not notified yet
+        assert reader.ENABLE_SIGNUP is True
+
+        redis.deliver()
+        assert reader._stale_keys == {"ENABLE_SIGNUP"}
+        gets = redis.gets
+        assert reader.ENABLE_SIGNUP is False
+        # Only the changed key is read again, and only once
+        assert redis.gets == gets + 1
+        assert reader.DEFAULT_MODELS == ""
+        assert reader.ENABLE_SIGNUP is False
+        assert redis.gets == gets + 1
+
+    def test_missed_update_is_picked_up_by_periodic_sync(self, redis, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(config.time, "monotonic", lambda: now[0])
+        writer, reader = make_worker(sync_interval=5), make_worker(sync_interval=5)
+        assert reader.DEFAULT_MODELS == ""
+
+        writer.DEFAULT_MODELS = "llama3"
+        redis.published = []
+
+        assert reader.DEFAULT_MODELS == ""
+        now[0] += 5
+        assert reader.DEFAULT_MODELS == "llama3"
+
+    def test_listener_error_forces_sync(self, redis, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(config.time, "monotonic", lambda: now[0])
+        monkeypatch.setattr(config.time, "sleep", lambda seconds: None)
+        handlers = []
+        monkeypatch.setattr(
+            FakePubSub,
+            "run_in_thread",
+            lambda self, exception_handler=None, **kwargs: handlers.append(
+                exception_handler
+            ),
+        )
+        writer, reader = make_worker(), make_worker()
+        assert reader.DEFAULT_MODELS == ""
+
+        writer.DEFAULT_MODELS = "llama3"
+        redis.published = []
+        handlers[-1](ConnectionError("lost"), None, None)
+
+        assert reader.DEFAULT_MODELS == "llama3"
+
+    def test_without_sync_interval_every_read_goes_to_redis(self, redis):
+        writer, reader = make_worker(), make_worker(sync_interval=0)
+
+        writer.ENABLE_SIGNUP = False
+        gets = redis.gets
+
+        assert reader.ENABLE_SIGNUP is False
+        assert reader.ENABLE_SIGNUP is False
+        assert redis.gets == gets + 2
+
+    def test_unknown_key(self, redis):
+        with pytest.raises(AttributeError):
+            make_worker().MISSING
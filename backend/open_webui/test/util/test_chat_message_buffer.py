@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from open_webui.utils import chat_message_buffer as module
+from open_webui.utils.chat_message_buffer import ChatMessageBuffer
+
+
+class FakeChats:
+    """The Chats methods used by ChatMessageBuffer, in memory"""
+
+    def __init__(self):
+        self.messages = {("chat", "message"): {"content": "", "statusHistory": []}}
+        self.reads = 0
+        self.writes = []
+
+    def get_message_by_id_and_message_id(self, chat_id, message_id):
+        self.reads += 1
+        message = self.messages.get((chat_id, message_id))
+        return dict(message) if message is not None else None
+
+    def upsert_message_to_chat_by_id_and_message_id(self, chat_id, message_id, fields):
+        self.writes.append(("upsert", dict(fields)))
+        self.messages.setdefault((chat_id, message_id), {}).update(fields)
+
+    def add_message_status_to_chat_by_id_and_message_id(
+        self, chat_id, message_id, status
+    ):
+        self.writes.append(("status", status))
+        message = self.messages[(chat_id, message_id)]
+        message["statusHistory"] = [*message.get("statusHistory", []), status]
+
+
+@pytest.fixture
+def chats(monkeypatch):
+    chats = FakeChats()
+    monkeypatch.setattr(module, "Chats", chats)
+    return chats
+
+
+class TestChatMessageBuffer:
+    @pytest.mark.asyncio
+    async def test_updates_are_merged_into_one_write(self, chats):
+        buffer = ChatMessageBuffer(flush_interval=60)
+
+        buffer.update("chat", "message", {"content": "Hel"})
+        buffer.update("chat", "message", {"content": "Hello", "done": False})
+        buffer.add_status("chat", "message", {"action": "web_search"})
+        buffer.add_status("chat", "message", {"action": "done"})
+        assert chats.writes == []
+
+        await buffer.flush("chat", "message")
+
+        assert chats.writes == [
+            ("upsert", {"content": "Hello", "done": False}),
+            ("status", {"action": "web_search"}),
+            ("status", {"action": "done"}),
+        ]
+        assert buffer._pending == {}
+        assert buffer._timers == {}
+        assert buffer._locks == {}
+
+    @pytest.mark.asyncio
+    async def test_flushed_after_interval(self, chats):
+        buffer = ChatMessageBuffer(flush_interval=0.01)
+
+        buffer.update("chat", "message", {"content": "a"})
+        buffer.update("chat", "message", {"content": "ab"})
+        await asyncio.sleep(0.1)
+
+        assert chats.writes == [("upsert", {"content": "ab"})]
+        assert buffer._pending == {}
+
+    @pytest.mark.asyncio
+    async def test_reads_see_pending_updates(self, chats):
+        buffer = ChatMessageBuffer(flush_interval=60)
+        buffer.update("chat", "message", {"content": "Hello"})
+
+        message = await buffer.get_message("chat", "message")
+        assert message["content"] == "Hello"
+
+        # Later updates are applied to the message that was read
+        buffer.add_status("chat", "message", {"action": "done"})
+        message = await buffer.get_message("chat", "message")
+        assert message["statusHistory"] == [{"action": "done"}]
+        assert chats.reads == 1
+        assert chats.writes == []
+
+        await buffer.flush_all()
+        assert chats.messages[("chat", "message")]["content"] == "Hello"
+
+    @pytest.mark.asyncio
+    async def test_read_without_pending_updates(self, chats):
+        buffer = ChatMessageBuffer(flush_interval=60)
+
+        assert await buffer.get_message("chat", "message") == {
+            "content": "",
+            "statusHistory": [],
+        }
+        assert await buffer.get_message("missing", "message") is None
+
+    @pytest.mark.asyncio
+    async def test_flush_chat(self, chats):
+        buffer = ChatMessageBuffer(flush_interval=60)
+        buffer.update("chat", "message", {"content": "a"})
+        buffer.update("other", "message", {"content": "b"})
+
+        await buffer.flush_chat("chat")
+
+        assert chats.writes == [("upsert", {"content": "a"})]
+        assert list(buffer._pending) == [("other", "message")]
+        await buffer.flush_all()
+
+    @pytest.mark.asyncio
+    async def test_update_during_write_is_kept(self, chats, monkeypatch):
+        buffer = ChatMessageBuffer(flush_interval=60)
+        upsert = chats.upsert_message_to_chat_by_id_and_message_id
+
+        def slow_upsert(chat_id, message_id, fields):
+            upsert(chat_id, message_id, fields)
+            # Arrives while the first write is in flight
+            buffer._pending[(chat_id, message_id)].fields["content"] = "ab"
+
+        monkeypatch.setattr(
+            chats, "upsert_message_to_chat_by_id_and_message_id", slow_upsert
+        )
+        buffer.update("chat", "message", {"content": "a"})
+
+        await buffer.flush("chat", "message")
+        assert ("chat", "message") in buffer._pending
+
+        monkeypatch.setattr(
+            chats, "upsert_message_to_chat_by_id_and_message_id", upsert
+        )
+        await buffer.flush("chat", "message")
+
+        assert chats.messages[("chat", "message")]["content"] == "ab"
+        assert buffer._pending == {}
@@ -0,0 +1,180 @@
+import copy
+
+import pytest
+
+from open_webui.utils.content_blocks import ContentBlockSerializer, ContentTagScanner
+
+REASONING_TAGS = [("<think>", "</think>"), ("<reason>", "</reason>")]
+SOLUTION_TAGS = [("<|begin_of_solution|>", "<|end_of_solution|>")]
+
+
+def stream(deltas, get_scanner):
+    """Feed deltas the way the chat middleware does, returning the content blocks"""
+    content = ""
+    content_blocks = [{"type": "text", "content": ""}]
+    for value in deltas:
+        content = f"{content}{value}"
+        content_blocks[-1]["content"] = content_blocks[-1]["content"] + value
+
+        content, content_blocks, _ = get_scanner().handle(
+            "reasoning", REASONING_TAGS, content, content_blocks
+        )
+        content, content_blocks, _ = get_scanner().handle(
+            "solution", SOLUTION_TAGS, content, content_blocks
+        )
+    return content, [
+        {
+            key: value
+            for key, value in block.items()
+            if key not in ("started_at", "ended_at", "duration")
+        }
+        for block in content_blocks
+    ]
+
+
+def split(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+class TestContentTagScanner:
+    @pytest.mark.parametrize("size", [1, 3, 7, 64])
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Hello <think>Let me think.\nStill thinking.</think> The answer is 42.",
+            'Intro <reason effort="high">Why</reason> middle <think>more</think> end',
+            "<think></think>Nothing to think about",
+            "A <|begin_of_solution|>x = 1<|end_of_solution|> done",
+            "No tags at all, just < and > characters and </think> alone",
+        ],
+    )
+    def test_matches_full_scan(self, text, size):
+        scanner = ContentTagScanner()
+
+        incremental = stream(split(text, size), lambda: scanner)
+        # A new scanner has no state, so it searches each block from the start
+        full = stream(split(text, size), ContentTagScanner)
+
+        assert incremental == full
+
+    def test_tag_split_across_deltas(self):
+        scanner = ContentTagScanner(overlap=8)
+        text = "x" * 100 + "<think>thought</think>after"
+
+        _, blocks = stream(split(text, 5), lambda: scanner)
+
+        assert [block["type"] for block in blocks] == ["text", "reasoning", "text"]
+        assert blocks[1]["content"] == "thought"
+        assert blocks[2]["content"] == "after"
+
+    def test_only_new_text_is_searched(self):
+        scanner = ContentTagScanner(overlap=4)
+        block = {"type": "text", "content": "a" * 50}
+        scanner.handle("reasoning", REASONING_TAGS, "", [block])
+
+        assert scanner._get_scan_start(block, "reasoning", scanner.overlap) == 46
+
+        # A block that got shorter is searched from the start again
+        block["content"] = "a"
+        assert scanner._get_scan_start(block, "reasoning", scanner.overlap) == 0
+
+
+def make_stream_steps():
+    """Content blocks as they grow while a response streams"""
+    blocks = [{"type": "text", "content": "Hi"}]
+    yield blocks
+
+    blocks[-1]["content"] += " there"
+    yield blocks
+
+    blocks.append(
+        {
+            "type": "reasoning",
+            "start_tag": "<think>",
+            "end_tag": "</think>",
+            "content": "step one",
+        }
+    )
+    yield blocks
+
+    blocks[-1]["content"] += "\nstep two\n> quoted"
+    yield blocks
+
+    blocks[-1]["content"] += "\nstep three"
+    blocks[-1]["duration"] = 2
+    blocks.append({"type": "text", "content": "```python"})
+    yield blocks
+
+    blocks.append(
+        {
+            "type": "code_interpreter",
+            "attributes": {"lang": "python"},
+            "content": "print(1)",
+        }
+    )
+    yield blocks
+
+    blocks[-1]["output"] = {"stdout": "1"}
+    yield blocks
+
+    blocks.append(
+        {
+            "type": "tool_calls",
+            "content": [
+                {"id": "call", "function": {"name": "search", "arguments": "{}"}}
+            ],
+            "results": [],
+        }
+    )
+    yield blocks
+
+    # Blocks are replaced rather than mutated when a tool call completes
+    blocks[-1] = {
+        **blocks[-1],
+        "results": [{"tool_call_id": "call", "content": "found"}],
+    }
+    blocks.append({"type": "text", "content": "Done"})
+    yield blocks
+
+
+class TestContentBlockSerializer:
+    def test_streaming_matches_full_serialization(self):
+        serializer = ContentBlockSerializer()
+
+        for blocks in make_stream_steps():
+            expected = ContentBlockSerializer().serialize(copy.deepcopy(blocks))
+            assert serializer.serialize_streaming(blocks) == expected
+
+    def test_earlier_block_replaced(self):
+        serializer = ContentBlockSerializer()
+        blocks = [{"type": "text", "content": "old"}, {"type": "text", "content": "b"}]
+        serializer.serialize_streaming(blocks)
+
+        blocks[0] = {"type": "text", "content": "new"}
+
+        assert serializer.serialize_streaming(blocks) == "new\nb"
+
+    @pytest.mark.parametrize("raw", [False, True])
+    def test_reasoning_rendered_incrementally(self, raw):
+        serializer = ContentBlockSerializer()
+        block = {
+            "type": "reasoning",
+            "start_tag": "<think>",
+            "end_tag": "</think>",
+            "content": "",
+        }
+
+        for line in ["first", "\nsecond", " line\n", "> quoted\nlast"]:
+            block["content"] += line
+            expected = ContentBlockSerializer().serialize([dict(block)], raw)
+            assert serializer.serialize([block], raw) == expected
+
+        assert serializer.render_reasoning_content(block) == (
+            "> first\n> second line\n> quoted\n> last"
+        )
+
+    def test_empty(self):
+        serializer = ContentBlockSerializer()
+
+        assert serializer.serialize_streaming([]) == ""
+        assert serializer.serialize([]) == ""
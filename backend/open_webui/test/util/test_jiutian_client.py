@@ -0,0 +1,190 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from open_webui.utils import jiutian_client
+from open_webui.utils.jiutian_client import (
+    JiutianRequestError,
+    _open_hedged_stream,
+    open_jiutian_stream,
+)
+
+
+# Unaffected by the sleeps fixture
+real_sleep = asyncio.sleep
+
+
+class FakeStream:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+        self.released = False
+
+    def close(self):
+        self.closed = True
+
+    def release(self):
+        self.released = True
+
+
+def fake_open_stream(monkeypatch, *outcomes):
+    """Make each _open_stream call wait, then return or raise its outcome"""
+    calls = []
+    cancelled = []
+
+    async def _open_stream(session, url, payload, headers, timeout):
+        delay, outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        try:
+            await real_sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(outcome)
+            raise
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(jiutian_client, "_open_stream", _open_stream)
+    return calls, cancelled
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record retry sleeps instead of waiting"""
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(jiutian_client.asyncio, "sleep", sleep)
+    monkeypatch.setattr(jiutian_client, "_get_backoff_delay", lambda attempt: 0.5)
+    return delays
+
+
+async def open_stream(**kwargs):
+    async with open_jiutian_stream(
+        None, "http://jiutian/api", {}, {}, None, **kwargs
+    ) as stream:
+        return stream
+
+
+class TestRetry:
+    @pytest.mark.asyncio
+    async def test_retries_retryable_errors(self, monkeypatch, sleeps):
+        stream = FakeStream("ok")
+        calls, _ = fake_open_stream(
+            monkeypatch,
+            (0, JiutianRequestError("busy", status=503, retryable=True)),
+            (0, aiohttp.ClientConnectionError("reset")),
+            (0, stream),
+        )
+
+        assert await open_stream(max_retries=2) is stream
+        assert len(calls) == 3
+        assert sleeps == [0.5, 0.5]
+        assert stream.released
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, monkeypatch, sleeps):
+        calls, _ = fake_open_stream(
+            monkeypatch,
+            (0, JiutianRequestError("busy", status=503, retryable=True)),
+            (0, JiutianRequestError("busy", status=503, retryable=True)),
+        )
+
+        with pytest.raises(JiutianRequestError):
+            await open_stream(max_retries=1)
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_does_not_retry_client_errors(self, monkeypatch, sleeps):
+        calls, _ = fake_open_stream(
+            monkeypatch, (0, JiutianRequestError("bad request", status=400))
+        )
+
+        with pytest.raises(JiutianRequestError):
+            await open_stream(max_retries=3)
+        assert len(calls) == 1
+        assert sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_waits_for_retry_after_up_to_the_cap(self, monkeypatch, sleeps):
+        monkeypatch.setattr(jiutian_client, "JIUTIAN_RETRY_BACKOFF_MAX", 8.0)
+        fake_open_stream(
+            monkeypatch,
+            (0, JiutianRequestError("busy", 429, retryable=True, retry_after=2)),
+            (0, JiutianRequestError("busy", 429, retryable=True, retry_after=3600)),
+            (0, FakeStream("ok")),
+        )
+
+        await open_stream(max_retries=2)
+        assert sleeps == [2, 8.0]
+
+
+class TestHedging:
+    @pytest.mark.asyncio
+    async def test_hedge_wins_and_slow_request_is_cancelled(self, monkeypatch):
+        slow, fast = FakeStream("slow"), FakeStream("fast")
+        calls, cancelled = fake_open_stream(monkeypatch, (10, slow), (0, fast))
+
+        result = await _open_hedged_stream(None, "url", {}, {}, None, 0.01)
+        # Let the cancellation reach the slow request
+        await real_sleep(0)
+
+        assert result is fast
+        assert len(calls) == 2
+        assert cancelled == [slow]
+        assert not fast.closed
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_when_first_request_is_fast(self, monkeypatch):
+        stream = FakeStream("first")
+        calls, _ = fake_open_stream(monkeypatch, (0, stream))
+
+        assert await _open_hedged_stream(None, "url", {}, {}, None, 1) is stream
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_used_when_first_request_fails(self, monkeypatch):
+        stream = FakeStream("hedge")
+        fake_open_stream(
+            monkeypatch,
+            (0.05, JiutianRequestError("busy", status=503, retryable=True)),
+            (0.1, stream),
+        )
+
+        assert await _open_hedged_stream(None, "url", {}, {}, None, 0.01) is stream
+
+    @pytest.mark.asyncio
+    async def test_losing_stream_that_finished_is_closed(self, monkeypatch):
+        first, second = FakeStream("first"), FakeStream("second")
+        fake_open_stream(monkeypatch, (0.05, first), (0.05, second))
+
+        result = await _open_hedged_stream(None, "url", {}, {}, None, 0)
+
+        loser = second if result is first else first
+        assert loser.closed
+        assert not result.closed
+
+    @pytest.mark.asyncio
+    async def test_all_requests_failed(self, monkeypatch):
+        fake_open_stream(
+            monkeypatch,
+            (0.05, JiutianRequestError("first", status=503, retryable=True)),
+            (0.05, JiutianRequestError("second", status=502, retryable=True)),
+        )
+
+        with pytest.raises(JiutianRequestError):
+            await _open_hedged_stream(None, "url", {}, {}, None, 0.01)
+
+    @pytest.mark.asyncio
+    async def test_all_requests_cancelled(self, monkeypatch):
+        fake_open_stream(
+            monkeypatch,
+            (0.05, asyncio.CancelledError()),
+            (0.05, asyncio.CancelledError()),
+        )
+
+        with pytest.raises(JiutianRequestError):
+            await _open_hedged_stream(None, "url", {}, {}, None, 0.01)
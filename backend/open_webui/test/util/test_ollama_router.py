@@ -0,0 +1,184 @@
+import time
+
+import pytest
+
+from open_webui.utils import ollama_router as module
+from open_webui.utils.ollama_router import OllamaRouter
+
+URLS = ["http://a:11434", "http://b:11434", "http://c:11434"]
+ALL = [0, 1, 2]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def router():
+    return OllamaRouter(threshold=2, cooldown=30, cold_load_penalty=2)
+
+
+def fail(router, url, times=1):
+    for _ in range(times):
+        request = router.start(url)
+        request.record(False)
+        request.release()
+
+
+class TestOllamaRouterSelection:
+    def test_single_backend(self, router):
+        assert router.select(URLS, [1]) == 1
+
+    def test_fewest_outstanding_requests(self, router):
+        router.start(URLS[0])
+        router.start(URLS[0])
+        router.start(URLS[2])
+
+        assert router.select(URLS, ALL) == 1
+
+    def test_prefers_backend_with_model_loaded(self, router):
+        router.update_loaded_models(
+            URLS, [{"model": "llama3:latest", "urls": [2], "expires_at": None}]
+        )
+        router.start(URLS[2])
+
+        # One outstanding request beats loading the model elsewhere
+        assert router.select(URLS, ALL, "llama3:latest") == 2
+
+        router.start(URLS[2])
+        router.start(URLS[2])
+        assert router.select(URLS, ALL, "llama3:latest") in (0, 1)
+
+    def test_expired_models_are_not_loaded(self, router):
+        router.update_loaded_models(
+            URLS,
+            [
+                {
+                    "model": "llama3:latest",
+                    "urls": [0],
+                    "expires_at": "2000-01-01T00:00:00+00:00",
+                },
+                {"model": "llama3:latest", "urls": [1], "expires_at": time.time() + 60},
+            ],
+        )
+
+        assert router.select(URLS, ALL, "llama3:latest") == 1
+        assert router.get_status(URLS)[0]["loaded_models"] == []
+
+    def test_successful_request_marks_model_loaded(self, router):
+        with router.track(URLS[1], "llama3"):
+            assert router.get_status(URLS)[1]["in_flight"] == 1
+
+        status = router.get_status(URLS)[1]
+        assert status["in_flight"] == 0
+        assert status["loaded_models"] == ["llama3:latest"]
+        assert router.select(URLS, ALL, "llama3:latest") == 1
+
+    def test_ties_go_to_lowest_latency(self, router, clock):
+        for idx, latency in ((0, 3.0), (1, 1.0), (2, 2.0)):
+            request = router.start(URLS[idx])
+            clock[0] += latency
+            request.record(True)
+            request.release()
+
+        assert router.select(URLS, ALL) == 1
+        assert router.get_status(URLS)[1]["latency_ms"] == 1000.0
+
+    @pytest.mark.asyncio
+    async def test_streamed_response_released_at_end(self, router):
+        async def content():
+            yield b"a"
+            yield b"b"
+
+        request = router.start(URLS[0])
+        lines = [line async for line in request.iter_content(content())]
+
+        assert lines == [b"a", b"b"]
+        assert router.get_status(URLS)[0]["in_flight"] == 0
+
+        # Releasing twice does not undercount other requests
+        router.start(URLS[0])
+        request.release()
+        assert router.get_status(URLS)[0]["in_flight"] == 1
+
+
+class TestOllamaRouterCircuitBreaker:
+    def test_opens_after_consecutive_failures(self, router, clock):
+        fail(router, URLS[0])
+        assert router.get_status(URLS)[0]["circuit"] == "closed"
+
+        fail(router, URLS[0])
+        assert router.get_status(URLS)[0]["circuit"] == "open"
+
+        router.start(URLS[1])
+        router.start(URLS[2])
+        # Skipped despite having no outstanding requests
+        assert router.select(URLS, ALL) != 0
+
+    def test_success_resets_failures(self, router):
+        fail(router, URLS[0])
+        with router.track(URLS[0]):
+            pass
+        fail(router, URLS[0])
+
+        assert router.get_status(URLS)[0]["circuit"] == "closed"
+        assert router.get_status(URLS)[0]["failures"] == 2
+
+    def test_failed_block_is_recorded(self, router):
+        with pytest.raises(RuntimeError):
+            with router.track(URLS[0]):
+                raise RuntimeError("connection refused")
+
+        status = router.get_status(URLS)[0]
+        assert status["consecutive_failures"] == 1
+        assert status["in_flight"] == 0
+
+    def test_half_open_allows_one_trial(self, router, clock):
+        fail(router, URLS[0], times=2)
+        for url in URLS[1:]:
+            for _ in range(3):
+                router.start(url)
+
+        clock[0] += 30
+        assert router.get_status(URLS)[0]["circuit"] == "half_open"
+        assert router.select(URLS, ALL) == 0
+        trial = router.start(URLS[0])
+
+        # No second request while the trial is out
+        assert router.select(URLS, ALL) != 0
+
+        trial.record(True)
+        trial.release()
+        assert router.get_status(URLS)[0]["circuit"] == "closed"
+        assert router.select(URLS, ALL) == 0
+
+    def test_failed_trial_reopens(self, router, clock):
+        fail(router, URLS[0], times=2)
+        clock[0] += 30
+        assert router.select(URLS, [0, 1]) in (0, 1)
+
+        fail(router, URLS[0])
+
+        status = router.get_status(URLS)[0]
+        assert status["circuit"] == "open"
+        clock[0] += 29
+        assert router.get_status(URLS)[0]["circuit"] == "open"
+
+    def test_stuck_trial_is_retried_after_cooldown(self, router, clock):
+        fail(router, URLS[0], times=2)
+        for _ in range(3):
+            router.start(URLS[1])
+        clock[0] += 30
+        assert router.select(URLS, [0, 1]) == 0
+
+        clock[0] += 31
+        assert router.select(URLS, [0, 1]) == 0
+
+    def test_all_open_still_tries_one(self, router):
+        for url in URLS:
+            fail(router, url, times=2)
+
+        assert router.select(URLS, ALL) in ALL
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from open_webui.utils import webhook
+from open_webui.utils.webhook import WebhookDeliveryError, WebhookDispatcher
+
+
+class FakeRedis:
+    """The Redis commands used by WebhookDispatcher, in memory"""
+
+    def __init__(self):
+        self.lists = {}
+        self.zsets = {}
+        self.sets = {}
+        self.values = {}
+
+    async def rpush(self, key, *items):
+        self.lists.setdefault(key, []).extend(items)
+
+    async def lmove(self, source, destination, src="LEFT", dest="LEFT"):
+        items = self.lists.get(source)
+        if not items:
+            return None
+        item = items.pop(0)
+        self.lists.setdefault(destination, []).insert(0, item)
+        return item
+
+    async def blmove(self, source, destination, timeout, src="LEFT", dest="LEFT"):
+        item = await self.lmove(source, destination, src, dest)
+        if item is None:
+            # Block like Redis would, without waiting the whole timeout
+            await asyncio.sleep(0.01)
+        return item
+
+    async def lrem(self, key, count, item):
+        if item in self.lists.get(key, []):
+            self.lists[key].remove(item)
+            return 1
+        return 0
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrangebyscore(self, key, low, high):
+        return [
+            item for item, score in self.zsets.get(key, {}).items() if score <= high
+        ]
+
+    async def zrem(self, key, item):
+        return int(self.zsets.get(key, {}).pop(item, None) is not None)
+
+    async def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    async def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+def make_job(url="https://example.com/hook", **kwargs):
+    return {"id": "1", "name": "WebUI", "url": url, "message": "hi", **kwargs}
+
+
+@pytest.fixture
+def dispatcher():
+    return WebhookDispatcher(concurrency=1, max_retries=2, redis_key_prefix="test")
+
+
+def fail_send(monkeypatch, dispatcher, error):
+    calls = []
+
+    async def send(name, url, message, event_data):
+        calls.append(url)
+        if error is not None:
+            raise error
+
+    monkeypatch.setattr(dispatcher, "send", send)
+    return calls
+
+
+class TestWebhookDelivery:
+    @pytest.mark.asyncio
+    async def test_delivered(self, monkeypatch, dispatcher):
+        calls = fail_send(monkeypatch, dispatcher, None)
+
+        assert await dispatcher.deliver(make_job())
+        assert calls == ["https://example.com/hook"]
+        assert dispatcher._retries == []
+
+    @pytest.mark.asyncio
+    async def test_retryable_failure_is_retried_later(self, monkeypatch, dispatcher):
+        fail_send(monkeypatch, dispatcher, WebhookDeliveryError("503", True))
+
+        assert not await dispatcher.deliver(make_job())
+
+        retry_at, _, job = dispatcher._retries[0]
+        assert job["attempt"] == 1
+        assert retry_at >= time.time() - 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up(self, monkeypatch, dispatcher):
+        fail_send(monkeypatch, dispatcher, WebhookDeliveryError("503", True))
+        assert not await dispatcher.deliver(make_job(attempt=2))
+
+        fail_send(monkeypatch, dispatcher, WebhookDeliveryError("404"))
+        assert not await dispatcher.deliver(make_job())
+
+        assert dispatcher._retries == []
+
+    @pytest.mark.asyncio
+    async def test_retry_after_holds_back_destination(self, monkeypatch, dispatcher):
+        fail_send(
+            monkeypatch,
+            dispatcher,
+            WebhookDeliveryError("429", True, retry_after=60),
+        )
+        await dispatcher.deliver(make_job())
+
+        calls = fail_send(monkeypatch, dispatcher, None)
+        assert not await dispatcher.deliver(make_job(url="https://example.com/other"))
+        assert calls == []
+        assert len(dispatcher._retries) == 2
+
+    @pytest.mark.asyncio
+    async def test_poll_queues_due_retries_and_forgets_retry_after(
+        self, monkeypatch, dispatcher
+    ):
+        dispatcher._queue = asyncio.Queue()
+        now = time.time()
+        await dispatcher._retry_later(make_job(id="due"), now - 1)
+        await dispatcher._retry_later(make_job(id="later"), now + 60)
+        dispatcher._retry_at = {
+            "https://past.example.com": now - 1,
+            "https://future.example.com": now + 60,
+        }
+
+        await dispatcher._poll()
+
+        assert dispatcher._queue.get_nowait()["id"] == "due"
+        assert dispatcher._queue.empty()
+        assert list(dispatcher._retry_at) == ["https://future.example.com"]
+
+
+class TestWebhookRedisQueue:
+    def test_keys_share_a_hash_tag(self, dispatcher):
+        for key in (
+            dispatcher.redis_key,
+            dispatcher.redis_retry_key,
+            dispatcher.redis_processing_key,
+            dispatcher.redis_instances_key,
+            dispatcher.redis_heartbeat_key,
+        ):
+            assert key.startswith("test:{webhooks}:")
+
+    @pytest.mark.asyncio
+    async def test_retry_moves_to_shared_queue(self, monkeypatch, dispatcher):
+        redis = FakeRedis()
+        dispatcher.redis = redis
+        dispatcher._queue = asyncio.Queue()
+        fail_send(monkeypatch, dispatcher, WebhookDeliveryError("503", True))
+        monkeypatch.setattr(webhook, "_get_backoff_delay", lambda attempt: -1)
+
+        await dispatcher.deliver(make_job())
+        await dispatcher._poll()
+
+        [item] = redis.lists[dispatcher.redis_key]
+        assert json.loads(item)["attempt"] == 1
+        assert not redis.zsets[dispatcher.redis_retry_key]
+
+    @pytest.mark.asyncio
+    async def test_deliveries_of_dead_instance_are_requeued(self):
+        redis = FakeRedis()
+        crashed = WebhookDispatcher(redis_key_prefix="test")
+        alive = WebhookDispatcher(redis_key_prefix="test")
+        for dispatcher in (crashed, alive):
+            dispatcher.redis = redis
+            dispatcher._queue = asyncio.Queue()
+            await dispatcher._heartbeat()
+
+        await redis.rpush(crashed.redis_key, json.dumps(make_job()))
+        job, item = await crashed._next_job()
+        assert job["id"] == "1"
+        assert redis.lists[crashed.redis_processing_key] == [item]
+
+        # Still alive: its deliveries are left alone
+        await alive._poll()
+        assert redis.lists[crashed.redis_processing_key] == [item]
+
+        # Killed without stop(), its heartbeat expires
+        await redis.delete(crashed.redis_heartbeat_key)
+        await alive._poll()
+
+        assert redis.lists[alive.redis_key] == [item]
+        assert not redis.lists[crashed.redis_processing_key]
+        assert crashed.instance_id not in redis.sets[alive.redis_instances_key]
+
+    @pytest.mark.asyncio
+    async def test_stop_requeues_processing(self):
+        redis = FakeRedis()
+        dispatcher = WebhookDispatcher(concurrency=1, redis_key_prefix="test")
+        await dispatcher.start(redis)
+        await redis.rpush(dispatcher.redis_processing_key, "job")
+
+        await dispatcher.stop()
+
+        assert redis.lists[dispatcher.redis_key] == ["job"]
+        assert dispatcher.instance_id not in redis.sets[dispatcher.redis_instances_key]
+        assert not await redis.exists(dispatcher.redis_heartbeat_key)
@@ -1,4 +1,4 @@
-from typing import Optional, Set, Union, List, Dict, Any
+from typing import Optional, Set, Union, List, Dict, Any, Callable, TypeVar
 from open_webui.models.users import Users, UserModel
 from open_webui.models.groups import Groups
 
@@ -6,6 +6,8 @@ from open_webui.models.groups import Groups
 from open_webui.config import DEFAULT_USER_PERMISSIONS
 import json
 
+T = TypeVar("T")
+
 
 def fill_missing_permissions(
     permissions: Dict[str, Any], default_permissions: Dict[str, Any]
@@ -53,19 +55,23 @@ def get_permissions(
                     )  # Use the most permissive value (True > False)
         return permissions
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
-
-    # Deep copy default permissions to avoid modifying the original dict
-    permissions = json.loads(json.dumps(default_permissions))
+    def resolve_permissions() -> Dict[str, Any]:
+        # Deep copy default permissions to avoid modifying the original dict
+        permissions = json.loads(default_permissions_json)
 
-    # Combine permissions from all user groups
-    for group in user_groups:
-        permissions = combine_permissions(permissions, group.permissions or {})
+        # Combine permissions from all user groups
+        for group_permissions in Groups.get_group_permissions_by_member_id(user_id):
+            permissions = combine_permissions(permissions, group_permissions)
 
-    # Ensure all fields from default_permissions are present and filled in
-    permissions = fill_missing_permissions(permissions, default_permissions)
+        # Ensure all fields from default_permissions are present and filled in
+        return fill_missing_permissions(permissions, default_permissions)
 
-    return permissions
+    # Resolved once per request for the same default permissions
+    default_permissions_json = json.dumps(default_permissions, sort_keys=True)
+    permissions = Groups.get_request_cached(
+        user_id, f"permissions:{default_permissions_json}", resolve_permissions
+    )
+    return json.loads(json.dumps(permissions))
 
 
 def has_permission(
@@ -92,10 +98,8 @@ def has_permission(
     permission_hierarchy = permission_key.split(".")
 
     # Retrieve user group permissions
-    user_groups = Groups.get_groups_by_member_id(user_id)
-
-    for group in user_groups:
-        if get_permission(group.permissions or {}, permission_hierarchy):
+    for group_permissions in Groups.get_group_permissions_by_member_id(user_id):
+        if get_permission(group_permissions, permission_hierarchy):
             return True
 
     # Check default permissions afterward if the group permissions don't allow it
@@ -119,8 +123,7 @@ def has_access(
             return True
 
     if user_group_ids is None:
-        user_groups = Groups.get_groups_by_member_id(user_id)
-        user_group_ids = {group.id for group in user_groups}
+        user_group_ids = Groups.get_group_ids_by_member_id(user_id)
 
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
@@ -131,6 +134,44 @@ def has_access(
     )
 
 
+def filter_by_access(
+    user_id: str,
+    type: str,
+    items: List[T],
+    get_access_control: Callable[
+        [T], Optional[dict]
+    ] = lambda item: item.access_control,
+    strict: bool = True,
+) -> List[T]:
+    """
+    Keep the items a user owns or has access to, looking up the user's groups once
+
+    Args:
+        user_id: User ID
+        type: "read" or "write"
+        items: Items with a ``user_id`` owner (optional) and an access control
+        get_access_control: Returns the access control of an item
+        strict: See has_access
+
+    Returns:
+        The accessible items, in order
+    """
+    user_group_ids = None
+    accessible = []
+    for item in items:
+        if getattr(item, "user_id", None) == user_id:
+            accessible.append(item)
+            continue
+
+        access_control = get_access_control(item)
+        if access_control is not None and user_group_ids is None:
+            user_group_ids = Groups.get_group_ids_by_member_id(user_id)
+
+        if has_access(user_id, type, access_control, user_group_ids or set(), strict):
+            accessible.append(item)
+    return accessible
+
+
 # Get all users with access to a resource
 def get_users_with_access(
     type: str = "write", access_control: Optional[dict] = None
@@ -144,10 +185,6 @@ def get_users_with_access(
     permitted_user_ids = permission_access.get("user_ids", [])
 
     user_ids_with_access = set(permitted_user_ids)
-
-    for group_id in permitted_group_ids:
-        group_user_ids = Groups.get_group_user_ids_by_id(group_id)
-        if group_user_ids:
-            user_ids_with_access.update(group_user_ids)
+    user_ids_with_access.update(Groups.get_user_ids_by_group_ids(permitted_group_ids))
 
     return Users.get_users_by_user_ids(list(user_ids_with_access))
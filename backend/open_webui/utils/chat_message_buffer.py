@@ -0,0 +1,183 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from open_webui.models.chats import Chats
+from open_webui.env import REALTIME_CHAT_SAVE_INTERVAL_MS, SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+@dataclass
+class _PendingMessage:
+    """Updates to one chat message that have not been written yet"""
+
+    fields: dict = field(default_factory=dict)
+    statuses: list = field(default_factory=list)
+
+    # Stored message with the pending updates applied, once it has been read
+    view: Optional[dict] = None
+
+
+class ChatMessageBuffer:
+    """
+    Write-behind buffer for chat message updates made while a response streams.
+
+    Field updates and status appends are collected in memory per message and
+    written at most once every ``flush_interval`` seconds, so the database is
+    not touched for every streamed event. Reads go through the buffer so
+    callers always see their own unwritten updates. Pending updates must be
+    flushed with ``flush`` / ``flush_chat`` when a response ends.
+    """
+
+    def __init__(self, flush_interval: float = REALTIME_CHAT_SAVE_INTERVAL_MS / 1000):
+        self.flush_interval = flush_interval
+
+        # Key: (chat_id, message_id)
+        self._pending: Dict[Tuple[str, str], _PendingMessage] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        # Key: (chat_id, message_id), Value: [lock, number of holders/waiters]
+        self._locks: Dict[Tuple[str, str], list] = {}
+
+    async def get_message(self, chat_id: str, message_id: str) -> Optional[dict]:
+        """
+        Get a message including updates that have not been written yet
+
+        Args:
+            chat_id: Chat ID
+            message_id: Message ID
+
+        Returns:
+            The message, {} if the chat has no such message, None if the chat
+            does not exist
+        """
+        key = (chat_id, message_id)
+        entry = self._pending.get(key)
+        if entry is not None and entry.view is not None:
+            return entry.view
+
+        # Wait for an in-flight write so the stored message is current
+        async with self._locked(key):
+            message = await asyncio.to_thread(
+                Chats.get_message_by_id_and_message_id, chat_id, message_id
+            )
+
+            entry = self._pending.get(key)
+            if entry is None or message is None:
+                return message
+            if entry.view is None:
+                entry.view = self._apply(dict(message), entry.fields, entry.statuses)
+            return entry.view
+
+    def update(self, chat_id: str, message_id: str, fields: dict) -> None:
+        """Merge fields into a message (see Chats.upsert_message_to_chat_by_id_and_message_id)"""
+        entry = self._pending.setdefault((chat_id, message_id), _PendingMessage())
+        entry.fields.update(fields)
+        if entry.view is not None:
+            self._apply(entry.view, fields, [])
+
+        self._schedule_flush(chat_id, message_id)
+
+    def add_status(self, chat_id: str, message_id: str, status: dict) -> None:
+        """Append to a message's status history"""
+        entry = self._pending.setdefault((chat_id, message_id), _PendingMessage())
+        entry.statuses.append(status)
+        if entry.view is not None:
+            self._apply(entry.view, {}, [status])
+
+        self._schedule_flush(chat_id, message_id)
+
+    async def flush(self, chat_id: str, message_id: str) -> None:
+        """Write the pending updates of a message now"""
+        key = (chat_id, message_id)
+
+        # Timers still in the dict are sleeping; running ones detach first
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        async with self._locked(key):
+            entry = self._pending.get(key)
+            if entry is not None and (entry.fields or entry.statuses):
+                fields, statuses = entry.fields, entry.statuses
+                entry.fields, entry.statuses = {}, []
+
+                try:
+                    await asyncio.to_thread(
+                        self._write, chat_id, message_id, fields, statuses
+                    )
+                except Exception as e:
+                    log.exception(f"Error saving message {message_id}: {e}")
+
+            # Forget the message once nothing new arrived during the write
+            entry = self._pending.get(key)
+            if entry is not None and not (entry.fields or entry.statuses):
+                del self._pending[key]
+
+    async def flush_chat(self, chat_id: str) -> None:
+        """Write the pending updates of every message of a chat"""
+        for key in [key for key in self._pending if key[0] == chat_id]:
+            await self.flush(*key)
+
+    async def flush_all(self) -> None:
+        """Write all pending updates"""
+        for key in list(self._pending):
+            await self.flush(*key)
+
+    @staticmethod
+    def _apply(message: dict, fields: dict, statuses: list) -> dict:
+        message.update(fields)
+        if statuses:
+            message["statusHistory"] = [*message.get("statusHistory", []), *statuses]
+        return message
+
+    @staticmethod
+    def _write(chat_id: str, message_id: str, fields: dict, statuses: list) -> None:
+        # Fields first: a status can only be added to an existing message
+        if fields:
+            Chats.upsert_message_to_chat_by_id_and_message_id(
+                chat_id, message_id, fields
+            )
+        for status in statuses:
+            Chats.add_message_status_to_chat_by_id_and_message_id(
+                chat_id, message_id, status
+            )
+
+    @asynccontextmanager
+    async def _locked(self, key: Tuple[str, str]):
+        # Serializes reads-through and writes of one message
+        holder = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        holder[1] += 1
+        try:
+            async with holder[0]:
+                yield
+        finally:
+            holder[1] -= 1
+            if holder[1] == 0:
+                del self._locks[key]
+
+    def _schedule_flush(self, chat_id: str, message_id: str) -> None:
+        key = (chat_id, message_id)
+        timer = self._timers.get(key)
+        if timer is None or timer.done():
+            self._timers[key] = asyncio.create_task(
+                self._delayed_flush(chat_id, message_id)
+            )
+
+    async def _delayed_flush(self, chat_id: str, message_id: str) -> None:
+        key = (chat_id, message_id)
+        if self.flush_interval > 0:
+            await asyncio.sleep(self.flush_interval)
+
+        # Detach before writing so a concurrent flush cannot cancel the write
+        if self._timers.get(key) is asyncio.current_task():
+            del self._timers[key]
+        await self.flush(chat_id, message_id)
+
+
+# Global instance
+chat_message_buffer = ChatMessageBuffer()
@@ -0,0 +1,413 @@
+import html
+import json
+import re
+import time
+
+# Characters before the last scanned position searched again for a start tag,
+# so that a tag split across deltas is still found
+TAG_SCAN_OVERLAP = 1024
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+class ContentBlockSerializer:
+    """
+    Serializes the content blocks of a response to message content.
+
+    While a response streams only the last block changes, so
+    ``serialize_streaming`` reuses the serialized text of the earlier blocks,
+    and reasoning blocks reuse their quoted lines up to the last newline. The
+    caches are keyed by block identity, so use one serializer per response.
+    """
+
+    def __init__(self):
+        # Rendered reasoning per block: (block, rendered source, rendered text)
+        self._reasoning_render_cache = {}
+
+        # Serialized form of every block but the last, reused while streaming
+        self._prefix_blocks = []
+        self._prefix_content = ""
+
+    def render_reasoning_content(self, block):
+        """Quote reasoning lines, re-rendering only lines added since the last call"""
+        block_content = block["content"]
+
+        cached = self._reasoning_render_cache.get(id(block))
+        if cached and cached[0] is block and block_content.startswith(cached[1]):
+            source, rendered = cached[1], cached[2]
+        else:
+            source, rendered = "", ""
+
+        def render(text):
+            return "\n".join(
+                (f"> {line}" if not line.startswith(">") else line)
+                for line in text.splitlines()
+            )
+
+        # Complete lines never change once streamed, so cache up to the last newline
+        cut = block_content.rfind("\n", len(source)) + 1
+        if cut > len(source):
+            added = render(block_content[len(source) : cut])
+            rendered = f"{rendered}\n{added}" if source else added
+            source = block_content[:cut]
+            self._reasoning_render_cache[id(block)] = (block, source, rendered)
+
+        tail = block_content[len(source) :]
+        if not tail:
+            return rendered
+        return f"{rendered}\n{render(tail)}" if source else render(tail)
+
+    def serialize_block(self, content, block, raw=False):
+        """Append the serialized form of one content block to content"""
+        if block["type"] == "text":
+            block_content = block["content"].strip()
+            if block_content:
+                content = f"{content}{block_content}\n"
+        elif block["type"] == "tool_calls":
+            attributes = block.get("attributes", {})
+
+            tool_calls = block.get("content", [])
+            results = block.get("results", [])
+
+            if content and not content.endswith("\n"):
+                content += "\n"
+
+            if results:
+
+                tool_calls_display_content = ""
+                for tool_call in tool_calls:
+
+                    tool_call_id = tool_call.get("id", "")
+                    tool_name = tool_call.get("function", {}).get("name", "")
+                    tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                    tool_result = None
+                    tool_result_files = None
+                    for result in results:
+                        if tool_call_id == result.get("tool_call_id", ""):
+                            tool_result = result.get("content", None)
+                            tool_result_files = result.get("files", None)
+                            break
+
+                    if tool_result is not None:
+                        tool_result_embeds = result.get("embeds", "")
+                        tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}" embeds="{html.escape(json.dumps(tool_result_embeds))}">\n<summary>Tool Executed</summary>\n</details>\n'
+                    else:
+                        tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+
+                if not raw:
+                    content = f"{content}{tool_calls_display_content}"
+            else:
+                tool_calls_display_content = ""
+
+                for tool_call in tool_calls:
+                    tool_call_id = tool_call.get("id", "")
+                    tool_name = tool_call.get("function", {}).get("name", "")
+                    tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+
+                if not raw:
+                    content = f"{content}{tool_calls_display_content}"
+
+        elif block["type"] == "reasoning":
+            reasoning_display_content = self.render_reasoning_content(block)
+
+            reasoning_duration = block.get("duration", None)
+
+            start_tag = block.get("start_tag", "")
+            end_tag = block.get("end_tag", "")
+
+            if content and not content.endswith("\n"):
+                content += "\n"
+
+            if reasoning_duration is not None:
+                if raw:
+                    content = f'{content}{start_tag}{block["content"]}{end_tag}\n'
+                else:
+                    content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+            else:
+                if raw:
+                    content = f'{content}{start_tag}{block["content"]}{end_tag}\n'
+                else:
+                    content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+        elif block["type"] == "code_interpreter":
+            attributes = block.get("attributes", {})
+            output = block.get("output", None)
+            lang = attributes.get("lang", "")
+
+            content_stripped, original_whitespace = split_content_and_whitespace(
+                content
+            )
+            if is_opening_code_block(content_stripped):
+                # Remove trailing backticks that would open a new block
+                content = content_stripped.rstrip("`").rstrip() + original_whitespace
+            else:
+                # Keep content as is - either closing backticks or no backticks
+                content = content_stripped + original_whitespace
+
+            if content and not content.endswith("\n"):
+                content += "\n"
+
+            if output:
+                output = html.escape(json.dumps(output))
+
+                if raw:
+                    content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+                else:
+                    content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+            else:
+                if raw:
+                    content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+                else:
+                    content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+        else:
+            block_content = str(block["content"]).strip()
+            if block_content:
+                content = f"{content}{block['type']}: {block_content}\n"
+
+        return content
+
+    def serialize(self, content_blocks, raw=False):
+        content = ""
+
+        for block in content_blocks:
+            content = self.serialize_block(content, block, raw)
+
+        return content.strip()
+
+    def serialize_streaming(self, content_blocks):
+        """
+        Same output as serialize, but only the last block is serialized again;
+        earlier blocks do not change while streaming.
+        """
+        prefix_blocks = content_blocks[:-1]
+        if len(self._prefix_blocks) != len(prefix_blocks) or any(
+            cached is not block
+            for cached, block in zip(self._prefix_blocks, prefix_blocks)
+        ):
+            content = ""
+            for block in prefix_blocks:
+                content = self.serialize_block(content, block)
+            self._prefix_blocks = prefix_blocks
+            self._prefix_content = content
+
+        content = self._prefix_content
+        if content_blocks:
+            content = self.serialize_block(content, content_blocks[-1])
+        return content.strip()
+
+
+class ContentTagScanner:
+    """
+    Splits tagged sections (reasoning, solution, code interpreter) out of the
+    streamed text into their own blocks.
+
+    The length of each block already searched for tags is kept, so a delta
+    only rescans the new text plus an overlap for tags split across deltas.
+    Use one scanner per response.
+    """
+
+    def __init__(self, overlap: int = TAG_SCAN_OVERLAP):
+        self.overlap = overlap
+
+        # Key: (id(block), content type), Value: (block, length scanned)
+        self._scan_state = {}
+
+    def _get_scan_start(self, block, key, overlap):
+        state = self._scan_state.get((id(block), key))
+        if state and state[0] is block and len(block["content"]) >= state[1]:
+            return max(0, state[1] - overlap)
+        return 0
+
+    def _set_scan_end(self, block, key):
+        self._scan_state[(id(block), key)] = (block, len(block["content"]))
+
+    def handle(self, content_type, tags, content, content_blocks):
+        """
+        Split tagged sections (reasoning, solution, code interpreter) out of the
+        streamed text into their own blocks. Works incrementally: only text
+        added since the previous call is searched.
+        """
+        end_flag = False
+
+        def extract_attributes(tag_content):
+            """Extract attributes from a tag if they exist."""
+            attributes = {}
+            if not tag_content:  # Ensure tag_content is not None
+                return attributes
+            # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+            matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+            for key, value in matches:
+                attributes[key] = value
+            return attributes
+
+        if content_blocks[-1]["type"] == "text":
+            block = content_blocks[-1]
+            scan_start = self._get_scan_start(block, content_type, self.overlap)
+
+            for start_tag, end_tag in tags:
+
+                start_tag_pattern = rf"{re.escape(start_tag)}"
+                if start_tag.startswith("<") and start_tag.endswith(">"):
+                    # Match start tag e.g., <tag> or <tag attr="value">
+                    # remove both '<' and '>' from start_tag
+                    # Match start tag with attributes
+                    start_tag_pattern = rf"<{re.escape(start_tag[1:-1])}(\s.*?)?>"
+
+                match = re.compile(start_tag_pattern).search(
+                    block["content"], scan_start
+                )
+                if match:
+                    try:
+                        attr_content = (
+                            match.group(1) if match.group(1) else ""
+                        )  # Ensure it's not None
+                    except:
+                        attr_content = ""
+
+                    attributes = extract_attributes(
+                        attr_content
+                    )  # Extract attributes safely
+
+                    # Capture everything before and after the matched tag
+                    before_tag = block["content"][: match.start()]
+                    after_tag = block["content"][match.end() :]
+
+                    # Keep only the text before the tag in the text block
+                    block["content"] = before_tag
+                    if not block["content"]:
+                        content_blocks.pop()
+
+                    # Append the new block
+                    content_blocks.append(
+                        {
+                            "type": content_type,
+                            "start_tag": start_tag,
+                            "end_tag": end_tag,
+                            "attributes": attributes,
+                            "content": "",
+                            "started_at": time.time(),
+                        }
+                    )
+
+                    if after_tag:
+                        content_blocks[-1]["content"] = after_tag
+                        content, content_blocks, end_flag = self.handle(
+                            content_type, tags, content, content_blocks
+                        )
+
+                    break
+            else:
+                self._set_scan_end(block, content_type)
+        elif content_blocks[-1]["type"] == content_type:
+            block = content_blocks[-1]
+            start_tag = block["start_tag"]
+            end_tag = block["end_tag"]
+
+            if end_tag.startswith("<") and end_tag.endswith(">"):
+                # Match end tag e.g., </tag>
+                end_tag_pattern = rf"{re.escape(end_tag)}"
+            else:
+                # Handle cases where end_tag is just a tag name
+                end_tag_pattern = rf"{re.escape(end_tag)}"
+
+            scan_start = self._get_scan_start(block, content_type, len(end_tag) - 1)
+
+            # Check if the newly streamed content has the end tag
+            if block["content"].find(end_tag, scan_start) == -1:
+                self._set_scan_end(block, content_type)
+            else:
+                end_flag = True
+
+                block_content = content_blocks[-1]["content"]
+                # Strip start and end tags from the content
+                start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+                block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+                end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+                split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+                # Content inside the tag
+                block_content = split_content[0].strip() if split_content else ""
+
+                # Leftover content (everything after `</tag>`)
+                leftover_content = (
+                    split_content[1].strip() if len(split_content) > 1 else ""
+                )
+
+                if block_content:
+                    content_blocks[-1]["content"] = block_content
+                    content_blocks[-1]["ended_at"] = time.time()
+                    content_blocks[-1]["duration"] = int(
+                        content_blocks[-1]["ended_at"]
+                        - content_blocks[-1]["started_at"]
+                    )
+
+                    # Reset the content_blocks by appending a new text block
+                    if content_type != "code_interpreter":
+                        if leftover_content:
+
+                            content_blocks.append(
+                                {
+                                    "type": "text",
+                                    "content": leftover_content,
+                                }
+                            )
+                        else:
+                            content_blocks.append(
+                                {
+                                    "type": "text",
+                                    "content": "",
+                                }
+                            )
+
+                else:
+                    # Remove the block if content is empty
+                    content_blocks.pop()
+
+                    if leftover_content:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": leftover_content,
+                            }
+                        )
+                    else:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": "",
+                            }
+                        )
+
+                # Clean processed content
+                start_tag_pattern = rf"{re.escape(start_tag)}"
+                if start_tag.startswith("<") and start_tag.endswith(">"):
+                    # Match start tag e.g., <tag> or <tag attr="value">
+                    # remove both '<' and '>' from start_tag
+                    # Match start tag with attributes
+                    start_tag_pattern = rf"<{re.escape(start_tag[1:-1])}(\s.*?)?>"
+
+                content = re.sub(
+                    rf"{start_tag_pattern}(.|\n)*?{re.escape(end_tag)}",
+                    "",
+                    content,
+                    flags=re.DOTALL,
+                )
+
+        return content, content_blocks, end_flag
@@ -0,0 +1,349 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import (
+    JIUTIAN_HEDGE_DEFAULT_DELAY,
+    JIUTIAN_HTTP_DNS_CACHE_TTL,
+    JIUTIAN_HTTP_KEEPALIVE_TIMEOUT,
+    JIUTIAN_HTTP_POOL_LIMIT_PER_HOST,
+    JIUTIAN_RETRY_BACKOFF_BASE,
+    JIUTIAN_RETRY_BACKOFF_MAX,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class JiutianSessionRegistry:
+    """
+    Keeps one keep-alive aiohttp session per Jiutian API host so that
+    fan-out calls to the same host reuse pooled TCP/TLS connections.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = JIUTIAN_HTTP_POOL_LIMIT_PER_HOST,
+        dns_cache_ttl: int = JIUTIAN_HTTP_DNS_CACHE_TTL,
+        keepalive_timeout: float = JIUTIAN_HTTP_KEEPALIVE_TIMEOUT,
+    ):
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+
+        # Key: scheme://netloc, Value: ClientSession
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    @staticmethod
+    def _host_key(api_host: str) -> str:
+        parsed = urlparse(api_host)
+        if parsed.scheme and parsed.netloc:
+            return f"{parsed.scheme}://{parsed.netloc}".lower()
+        return api_host.rstrip("/").lower()
+
+    def get_session(self, api_host: str) -> aiohttp.ClientSession:
+        """
+        Get the pooled session for an API host, creating it on first use
+
+        Args:
+            api_host: Base URL of the Jiutian API host
+
+        Returns:
+            Shared ClientSession for that host
+        """
+        key = self._host_key(api_host)
+        session = self._sessions.get(key)
+
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self._sessions[key] = session
+            log.debug(f"Created pooled session for Jiutian host {key}")
+
+        return session
+
+    async def close(self) -> None:
+        """
+        Close all pooled sessions
+        """
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+
+        for session in sessions:
+            try:
+                if not session.closed:
+                    await session.close()
+            except Exception as e:
+                log.error(f"Error closing Jiutian session: {e}")
+
+
+# Global instance
+jiutian_sessions = JiutianSessionRegistry()
+
+
+####################
+# Streaming requests with retry and hedging
+####################
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class JiutianRequestError(Exception):
+    """Raised when a Jiutian API request fails before streaming starts"""
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class JiutianStream:
+    """An upstream response whose first body line has already arrived"""
+
+    def __init__(self, response: aiohttp.ClientResponse, first_line: bytes):
+        self.response = response
+        self._first_line = first_line
+
+    async def iter_lines(self):
+        yield self._first_line
+        async for line in self.response.content:
+            yield line
+
+    def release(self) -> None:
+        self.response.release()
+
+    def close(self) -> None:
+        self.response.close()
+
+
+class LatencyTracker:
+    """
+    Rolling window of time-to-first-token samples per key, used to derive
+    the p95 hedge delay
+    """
+
+    def __init__(self, window: int = 100, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+
+        # Key: agent_uid, Value: recent latencies in seconds
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, latency: float) -> None:
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, key: str, percentile: float = 0.95) -> Optional[float]:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(percentile * (len(ordered) - 1))]
+
+    def get_hedge_delay(self, key: str, configured: Optional[float] = None) -> float:
+        """
+        Get the delay after which a hedged request is sent
+
+        Args:
+            key: Latency key (agent UID)
+            configured: Explicit delay from the agent config, if any
+
+        Returns:
+            Configured delay, else the observed p95, else the default
+        """
+        if configured:
+            return configured
+        p95 = self.percentile(key)
+        return p95 if p95 is not None else JIUTIAN_HEDGE_DEFAULT_DELAY
+
+
+# Global instance
+jiutian_latency = LatencyTracker()
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _get_backoff_delay(attempt: int) -> float:
+    # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+    return random.uniform(
+        0, min(JIUTIAN_RETRY_BACKOFF_MAX, JIUTIAN_RETRY_BACKOFF_BASE * (2**attempt))
+    )
+
+
+async def _open_stream(
+    session: aiohttp.ClientSession,
+    url: str,
+    payload: dict,
+    headers: dict,
+    timeout: aiohttp.ClientTimeout,
+) -> JiutianStream:
+    response = await session.post(url, json=payload, headers=headers, timeout=timeout)
+    try:
+        if response.status != 200:
+            raise JiutianRequestError(
+                f"API request failed with status {response.status}",
+                status=response.status,
+                retryable=response.status in RETRYABLE_STATUS_CODES,
+                retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+            )
+
+        async for line in response.content:
+            if line.strip():
+                return JiutianStream(response, line)
+
+        raise JiutianRequestError(
+            "API response ended before any data was received", retryable=True
+        )
+    except BaseException:
+        response.close()
+        raise
+
+
+async def _open_hedged_stream(
+    session: aiohttp.ClientSession,
+    url: str,
+    payload: dict,
+    headers: dict,
+    timeout: aiohttp.ClientTimeout,
+    hedge_delay: Optional[float],
+) -> JiutianStream:
+    if hedge_delay is None:
+        return await _open_stream(session, url, payload, headers, timeout)
+
+    tasks = {asyncio.create_task(_open_stream(session, url, payload, headers, timeout))}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+        if not done:
+            log.debug(f"Sending hedged request to {url} after {hedge_delay:.2f}s")
+            tasks.add(
+                asyncio.create_task(
+                    _open_stream(session, url, payload, headers, timeout)
+                )
+            )
+
+        error: BaseException = JiutianRequestError(
+            "API request was cancelled", retryable=True
+        )
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+            winner = None
+            for task in done:
+                if task.cancelled():
+                    continue
+                if task.exception() is not None:
+                    error = task.exception()
+                elif winner is None:
+                    winner = task.result()
+                else:
+                    task.result().close()
+
+            if winner is not None:
+                return winner
+
+        raise error
+    finally:
+        # Drop the losing request, including one that finished just now
+        for task in tasks:
+            if task.done() and not task.cancelled() and task.exception() is None:
+                task.result().close()
+            else:
+                task.cancel()
+
+
+@asynccontextmanager
+async def open_jiutian_stream(
+    session: aiohttp.ClientSession,
+    url: str,
+    payload: dict,
+    headers: dict,
+    timeout: aiohttp.ClientTimeout,
+    max_retries: int = 0,
+    hedge_delay: Optional[float] = None,
+    latency_key: Optional[str] = None,
+):
+    """
+    Open a streaming Jiutian request, retrying until the first body line arrives
+
+    Connection errors, 429 and 5xx responses are retried up to ``max_retries``
+    times with jittered exponential backoff (or ``Retry-After`` when sent),
+    waiting at most JIUTIAN_RETRY_BACKOFF_MAX seconds between attempts.
+    With ``hedge_delay`` set, a second identical request is sent if the first
+    has not produced data after that many seconds, and whichever responds
+    first is kept.
+
+    Args:
+        session: Pooled session for the API host
+        url: Completions endpoint URL
+        payload: JSON request body
+        headers: Request headers
+        timeout: Per-attempt timeout
+        max_retries: Number of retries after the first attempt
+        hedge_delay: Seconds before sending a hedged request, None to disable
+        latency_key: Key under which time-to-first-token is recorded
+
+    Yields:
+        JiutianStream for the winning response
+    """
+    attempt = 0
+    while True:
+        start = time.monotonic()
+        try:
+            stream = await _open_hedged_stream(
+                session, url, payload, headers, timeout, hedge_delay
+            )
+            break
+        except (
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+            JiutianRequestError,
+        ) as e:
+            retryable = not isinstance(e, JiutianRequestError) or e.retryable
+            if not retryable or attempt >= max_retries:
+                raise
+
+            delay = _get_backoff_delay(attempt)
+            if isinstance(e, JiutianRequestError) and e.retry_after is not None:
+                delay = max(delay, e.retry_after)
+            # The caller holds a scheduler slot while waiting
+            delay = min(delay, JIUTIAN_RETRY_BACKOFF_MAX)
+
+            attempt += 1
+            log.warning(
+                f"Request to {url} failed ({e}), retry {attempt}/{max_retries} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+    if latency_key:
+        jiutian_latency.record(latency_key, time.monotonic() - start)
+
+    try:
+        yield stream
+    finally:
+        stream.release()
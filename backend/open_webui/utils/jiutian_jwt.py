@@ -1,6 +1,8 @@
 import time
 import jwt
-from typing import Optional
+from typing import Callable, Dict, Optional
+
+from open_webui.env import JIUTIAN_JWT_EXPIRY, JIUTIAN_JWT_REFRESH_MARGIN
 
 
 def generate_jwt_from_apikey(apikey: str, exp_seconds: int = 3600) -> str:
@@ -104,4 +106,97 @@ def is_token_expired(token: str) -> bool:
         current_time = int(time.time())
         return current_time >= exp_time
     except:
-        return True
\ No newline at end of file
+        return True
+
+class JiutianCredentialCache:
+    """
+    Per-agent in-memory cache of the decrypted API key and a signed JWT.
+
+    The token is reused until it is within ``refresh_margin`` seconds of its
+    ``exp`` claim. The decrypted key is dropped together with the token, so
+    changes made on other workers are picked up at the next refresh at the
+    latest. Call ``invalidate`` whenever an agent is updated, toggled or
+    deleted.
+    """
+
+    def __init__(self, exp_seconds: int = 3600, refresh_margin: int = 300):
+        self.exp_seconds = exp_seconds
+        self.refresh_margin = min(refresh_margin, exp_seconds // 2)
+
+        # Key: agent_uid, Value: {"api_key": str, "token": str, "exp": int}
+        self._entries: Dict[str, dict] = {}
+
+    def get_api_key(
+        self, agent_uid: str, loader: Callable[[str], Optional[str]]
+    ) -> Optional[str]:
+        """
+        Get the decrypted API key for an agent, loading it on a cache miss.
+
+        Args:
+            agent_uid: The agent UID
+            loader: Function returning the decrypted key (or None) for a UID
+
+        Returns:
+            Decrypted API key or None if not found
+        """
+        entry = self._entries.get(agent_uid)
+        if entry is not None and not self._needs_refresh(entry):
+            return entry["api_key"]
+
+        api_key = loader(agent_uid)
+        if not api_key:
+            self._entries.pop(agent_uid, None)
+            return None
+
+        self._entries[agent_uid] = {"api_key": api_key, "token": None, "exp": 0}
+        return api_key
+
+    def get_token(self, agent_uid: str, api_key: str) -> str:
+        """
+        Get a cached JWT for an agent, signing a new one when needed.
+
+        Args:
+            agent_uid: The agent UID
+            api_key: Decrypted API key in format "id.secret"
+
+        Returns:
+            JWT token string
+        """
+        entry = self._entries.get(agent_uid)
+        if entry is None or entry["api_key"] != api_key:
+            entry = {"api_key": api_key, "token": None, "exp": 0}
+            self._entries[agent_uid] = entry
+
+        if entry["token"] is None or self._needs_refresh(entry):
+            token = generate_jwt_from_apikey(api_key, self.exp_seconds)
+            entry["token"] = token
+            entry["exp"] = get_token_expiry_time(token) or 0
+
+        return entry["token"]
+
+    def invalidate(self, agent_uid: Optional[str] = None) -> None:
+        """
+        Drop cached credentials for one agent, or for all agents.
+
+        Args:
+            agent_uid: The agent UID, or None to clear everything
+        """
+        if agent_uid is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(agent_uid, None)
+
+    def _needs_refresh(self, entry: dict) -> bool:
+        token = entry["token"]
+        if token is None:
+            return False
+        return (
+            is_token_expired(token)
+            or int(time.time()) >= entry["exp"] - self.refresh_margin
+        )
+
+
+# Global instance
+jiutian_credentials = JiutianCredentialCache(
+    exp_seconds=JIUTIAN_JWT_EXPIRY, refresh_margin=JIUTIAN_JWT_REFRESH_MARGIN
+)
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional
+
+from open_webui.env import (
+    JIUTIAN_AGENT_MAX_CONCURRENT_REQUESTS,
+    JIUTIAN_HOST_MAX_CONCURRENT_REQUESTS,
+    MAX_CONCURRENT_REQUESTS,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+@dataclass(eq=False)
+class _Waiter:
+    """A queued agent call waiting for a concurrency slot"""
+
+    user_id: str
+    agent_uid: str
+    api_host: str
+    agent_limit: int
+    host_limit: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class AgentCallScheduler:
+    """
+    Admission control for outgoing agent calls.
+
+    A call is admitted when the global limit, the limit of its ``api_host`` and
+    the limit of its agent all have room. Queued calls are grouped by user and
+    served round-robin: the user with the fewest in-flight calls goes first,
+    ties going to whoever was served least recently, so one user with many
+    queued calls cannot starve the others. A limit of 0 (or None) means
+    "no limit at this level".
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        default_host_limit: int = JIUTIAN_HOST_MAX_CONCURRENT_REQUESTS,
+        default_agent_limit: int = JIUTIAN_AGENT_MAX_CONCURRENT_REQUESTS,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.default_host_limit = default_host_limit
+        self.default_agent_limit = default_agent_limit
+
+        # Key: user_id, Value: queued calls in arrival order
+        self._queues: Dict[str, Deque[_Waiter]] = {}
+
+        self._running = 0
+        self._running_by_host: Dict[str, int] = {}
+        self._running_by_agent: Dict[str, int] = {}
+        self._running_by_user: Dict[str, int] = {}
+
+        # Key: user_id, Value: sequence number of the user's last admission
+        self._last_served: Dict[str, int] = {}
+        self._sequence = 0
+
+        # Wait-time metrics
+        self._admitted = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user_id: str,
+        agent_uid: str,
+        api_host: str,
+        agent_limit: Optional[int] = None,
+        host_limit: Optional[int] = None,
+    ):
+        """
+        Wait for a concurrency slot and hold it for the duration of the block
+
+        Args:
+            user_id: User the call is made for (fairness key)
+            agent_uid: Agent being called
+            api_host: API host of the agent
+            agent_limit: Per-agent limit, defaults to the configured default
+            host_limit: Per-host limit, defaults to the configured default
+        """
+        waiter = _Waiter(
+            user_id=user_id,
+            agent_uid=agent_uid,
+            api_host=api_host,
+            agent_limit=(
+                agent_limit if agent_limit is not None else self.default_agent_limit
+            ),
+            host_limit=(
+                host_limit if host_limit is not None else self.default_host_limit
+            ),
+            future=asyncio.get_running_loop().create_future(),
+        )
+
+        self._queues.setdefault(user_id, deque()).append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted right before cancellation
+                self._release(waiter)
+            else:
+                self._remove(waiter)
+                self._dispatch()
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    def get_metrics(self) -> dict:
+        """
+        Get queue depth, in-flight counts and wait-time statistics
+        """
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": self._running,
+            "running_by_host": dict(self._running_by_host),
+            "running_by_agent": dict(self._running_by_agent),
+            "queue_depth": sum(len(queue) for queue in self._queues.values()),
+            "queue_depth_by_user": {
+                user_id: len(queue) for user_id, queue in self._queues.items()
+            },
+            "admitted": self._admitted,
+            "avg_wait_seconds": (
+                self._total_wait / self._admitted if self._admitted else 0.0
+            ),
+            "max_wait_seconds": self._max_wait,
+        }
+
+    def _can_run(self, waiter: _Waiter) -> bool:
+        if waiter.host_limit and (
+            self._running_by_host.get(waiter.api_host, 0) >= waiter.host_limit
+        ):
+            return False
+        if waiter.agent_limit and (
+            self._running_by_agent.get(waiter.agent_uid, 0) >= waiter.agent_limit
+        ):
+            return False
+        return True
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrent:
+            best = None
+
+            for user_id, queue in self._queues.items():
+                # Take the user's oldest call that is not blocked by a
+                # host/agent limit, so one saturated agent does not block
+                # the user's calls to other agents
+                waiter = next(
+                    (w for w in queue if not w.future.done() and self._can_run(w)),
+                    None,
+                )
+                if waiter is None:
+                    continue
+
+                rank = (
+                    self._running_by_user.get(user_id, 0),
+                    self._last_served.get(user_id, 0),
+                )
+                if best is None or rank < best[0]:
+                    best = (rank, waiter)
+
+            if best is None:
+                break
+
+            waiter = best[1]
+            self._remove(waiter)
+            self._grant(waiter)
+
+    def _grant(self, waiter: _Waiter) -> None:
+        self._running += 1
+        self._running_by_host[waiter.api_host] = (
+            self._running_by_host.get(waiter.api_host, 0) + 1
+        )
+        self._running_by_agent[waiter.agent_uid] = (
+            self._running_by_agent.get(waiter.agent_uid, 0) + 1
+        )
+        self._running_by_user[waiter.user_id] = (
+            self._running_by_user.get(waiter.user_id, 0) + 1
+        )
+
+        self._sequence += 1
+        self._last_served[waiter.user_id] = self._sequence
+
+        wait = time.monotonic() - waiter.enqueued_at
+        self._admitted += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        if wait > 1:
+            log.debug(
+                f"Agent call for {waiter.agent_uid} waited {wait:.2f}s for a slot"
+            )
+
+        waiter.future.set_result(None)
+
+    def _release(self, waiter: _Waiter) -> None:
+        self._running -= 1
+        for counts, key in (
+            (self._running_by_host, waiter.api_host),
+            (self._running_by_agent, waiter.agent_uid),
+            (self._running_by_user, waiter.user_id),
+        ):
+            counts[key] -= 1
+            if counts[key] <= 0:
+                del counts[key]
+
+        self._forget_idle_user(waiter.user_id)
+        self._dispatch()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.user_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[waiter.user_id]
+            self._forget_idle_user(waiter.user_id)
+
+    def _forget_idle_user(self, user_id: str) -> None:
+        if user_id not in self._queues and user_id not in self._running_by_user:
+            self._last_served.pop(user_id, None)
+
+
+# Global instance
+agent_call_scheduler = AgentCallScheduler()
@@ -0,0 +1,311 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+
+from open_webui.env import (
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN,
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD,
+    OLLAMA_COLD_LOAD_PENALTY,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
+
+# Weight of the newest sample in the latency and error rate averages
+EWMA_ALPHA = 0.2
+
+# Ollama unloads an idle model after 5 minutes unless keep_alive says otherwise
+DEFAULT_KEEP_ALIVE = 300
+
+
+@dataclass
+class _Backend:
+    """Load and health of one Ollama URL"""
+
+    in_flight: int = 0
+    latency: Optional[float] = None  # EWMA of seconds to response headers
+    error_rate: float = 0.0  # EWMA of failed requests
+    consecutive_failures: int = 0
+
+    requests: int = 0
+    failures: int = 0
+
+    # Circuit breaker: closed while open_until is 0
+    open_until: float = 0.0
+    trial_started_at: Optional[float] = None
+
+    # Key: model, Value: unix time the model is unloaded at
+    resident: Dict[str, float] = field(default_factory=dict)
+
+
+class OllamaRequest:
+    """A request routed to a backend, see OllamaRouter.start"""
+
+    def __init__(self, router: "OllamaRouter", url: str, model: Optional[str]):
+        self.router = router
+        self.url = url
+        self.model = model
+        self.started_at = time.monotonic()
+
+        self._recorded = False
+        self._released = False
+
+    def record(self, success: bool, loaded: Optional[bool] = None) -> None:
+        """
+        Record the outcome once the response headers (or an error) arrived
+
+        Args:
+            success: The backend answered, even if it rejected the request
+            loaded: The backend has the model loaded now, defaults to success
+        """
+        if self._recorded:
+            return
+        self._recorded = True
+        self.router._record(
+            self.url,
+            self.model if (success if loaded is None else loaded) else None,
+            time.monotonic() - self.started_at,
+            success,
+        )
+
+    def release(self) -> None:
+        """Stop counting the request as outstanding"""
+        if self._released:
+            return
+        self._released = True
+        self.router._release(self.url)
+
+    async def iter_content(self, content):
+        """Pass a streamed response through, releasing the request when it ends"""
+        try:
+            async for line in content:
+                yield line
+        finally:
+            self.release()
+
+
+class OllamaRouter:
+    """
+    Picks the Ollama backend for each request.
+
+    Backends whose circuit is open (``threshold`` consecutive failures) are
+    skipped for ``cooldown`` seconds, then receive one trial request. Among
+    the rest, the backend with the fewest outstanding requests wins, where a
+    backend that does not have the model loaded counts ``cold_load_penalty``
+    extra requests; ties go to a backend with the model loaded, then to the
+    lowest average latency.
+    """
+
+    def __init__(
+        self,
+        threshold: int = OLLAMA_CIRCUIT_BREAKER_THRESHOLD,
+        cooldown: float = OLLAMA_CIRCUIT_BREAKER_COOLDOWN,
+        cold_load_penalty: float = OLLAMA_COLD_LOAD_PENALTY,
+    ):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.cold_load_penalty = cold_load_penalty
+
+        # Key: Ollama base URL
+        self._backends: Dict[str, _Backend] = {}
+
+    def _get_backend(self, url: str) -> _Backend:
+        backend = self._backends.get(url)
+        if backend is None:
+            backend = self._backends[url] = _Backend()
+        return backend
+
+    def _is_available(self, backend: _Backend, now: float) -> bool:
+        if not backend.open_until:
+            return True
+        if now < backend.open_until:
+            return False
+        # Half open: one trial request at a time
+        return (
+            backend.trial_started_at is None
+            or now - backend.trial_started_at > self.cooldown
+        )
+
+    def select(
+        self, base_urls: list[str], url_idxs: list[int], model: Optional[str] = None
+    ) -> int:
+        """
+        Choose the backend for a request
+
+        Args:
+            base_urls: OLLAMA_BASE_URLS
+            url_idxs: Indexes of the backends serving the model
+            model: Model ID, to prefer backends that have it loaded
+
+        Returns:
+            Index of the chosen backend
+        """
+        if len(url_idxs) == 1:
+            return url_idxs[0]
+
+        now = time.monotonic()
+        wall_time = time.time()
+
+        candidates = [
+            idx
+            for idx in url_idxs
+            if self._is_available(self._get_backend(base_urls[idx]), now)
+        ]
+        if not candidates:
+            # Every backend is failing: try them all rather than none
+            candidates = list(url_idxs)
+
+        def score(idx: int):
+            backend = self._get_backend(base_urls[idx])
+            resident = model is not None and backend.resident.get(model, 0) > wall_time
+            return (
+                backend.in_flight + (0 if resident else self.cold_load_penalty),
+                not resident,
+                backend.latency or 0.0,
+                random.random(),
+            )
+
+        url_idx = min(candidates, key=score)
+
+        backend = self._get_backend(base_urls[url_idx])
+        if backend.open_until and now >= backend.open_until:
+            backend.trial_started_at = now
+            log.info(f"Sending trial request to Ollama backend {base_urls[url_idx]}")
+
+        return url_idx
+
+    def start(self, url: str, model: Optional[str] = None) -> OllamaRequest:
+        """Count a request to a backend as outstanding until it is released"""
+        if model and ":" not in model:
+            model = f"{model}:latest"
+
+        self._get_backend(url).in_flight += 1
+        return OllamaRequest(self, url, model)
+
+    @contextmanager
+    def track(self, url: str, model: Optional[str] = None):
+        """Track a request made inside the block, failed if the block raises first"""
+        request = self.start(url, model)
+        try:
+            yield request
+        except Exception:
+            request.record(False)
+            raise
+        finally:
+            request.record(True)
+            request.release()
+
+    def _record(
+        self, url: str, model: Optional[str], latency: float, success: bool
+    ) -> None:
+        backend = self._get_backend(url)
+        backend.requests += 1
+        backend.trial_started_at = None
+
+        backend.error_rate += EWMA_ALPHA * (
+            (0.0 if success else 1.0) - backend.error_rate
+        )
+
+        if success:
+            backend.latency = (
+                latency
+                if backend.latency is None
+                else backend.latency + EWMA_ALPHA * (latency - backend.latency)
+            )
+            backend.consecutive_failures = 0
+            if backend.open_until:
+                log.info(f"Ollama backend {url} recovered")
+            backend.open_until = 0.0
+
+            if model is not None:
+                # The backend loaded the model to answer, it stays for a while
+                backend.resident[model] = max(
+                    backend.resident.get(model, 0), time.time() + DEFAULT_KEEP_ALIVE
+                )
+        else:
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            if backend.open_until or backend.consecutive_failures >= self.threshold:
+                backend.open_until = time.monotonic() + self.cooldown
+                log.warning(
+                    f"Ollama backend {url} failed {backend.consecutive_failures} times in a row, "
+                    f"pausing it for {self.cooldown}s"
+                )
+
+    def _release(self, url: str) -> None:
+        backend = self._get_backend(url)
+        backend.in_flight = max(0, backend.in_flight - 1)
+
+    def update_loaded_models(self, base_urls: list[str], loaded_models: list) -> None:
+        """
+        Replace the loaded models of every backend
+
+        Args:
+            base_urls: OLLAMA_BASE_URLS
+            loaded_models: Merged /api/ps models, with "urls" and "expires_at"
+        """
+        resident = {url: {} for url in base_urls}
+        for model in loaded_models:
+            expires_at = model.get("expires_at")
+            if isinstance(expires_at, str):
+                try:
+                    expires_at = datetime.fromisoformat(expires_at).timestamp()
+                except ValueError:
+                    expires_at = None
+            if not isinstance(expires_at, (int, float)):
+                expires_at = time.time() + DEFAULT_KEEP_ALIVE
+
+            for idx in model.get("urls", []):
+                if idx < len(base_urls):
+                    resident[base_urls[idx]][model["model"]] = expires_at
+
+        for url, models in resident.items():
+            self._get_backend(url).resident = models
+
+    def get_status(self, base_urls: list[str]) -> list[dict]:
+        """Routing state of each backend, for monitoring"""
+        now = time.monotonic()
+        wall_time = time.time()
+
+        status = []
+        for idx, url in enumerate(base_urls):
+            backend = self._get_backend(url)
+            if not backend.open_until:
+                circuit = "closed"
+            elif now < backend.open_until:
+                circuit = "open"
+            else:
+                circuit = "half_open"
+
+            status.append(
+                {
+                    "idx": idx,
+                    "url": url,
+                    "in_flight": backend.in_flight,
+                    "latency_ms": (
+                        round(backend.latency * 1000, 1)
+                        if backend.latency is not None
+                        else None
+                    ),
+                    "error_rate": round(backend.error_rate, 4),
+                    "requests": backend.requests,
+                    "failures": backend.failures,
+                    "consecutive_failures": backend.consecutive_failures,
+                    "circuit": circuit,
+                    "loaded_models": sorted(
+                        model
+                        for model, expires_at in backend.resident.items()
+                        if expires_at > wall_time
+                    ),
+                }
+            )
+        return status
+
+
+# Global instance
+ollama_router = OllamaRouter()
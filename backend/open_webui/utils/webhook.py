@@ -1,62 +1,465 @@
+import asyncio
+import heapq
+import itertools
 import json
 import logging
+import random
+import time
+import uuid
+from typing import Optional
+from urllib.parse import urlparse
+
 import aiohttp
 
 from open_webui.config import WEBUI_FAVICON_URL
-from open_webui.env import SRC_LOG_LEVELS, VERSION
+from open_webui.env import (
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+    VERSION,
+    WEBHOOK_CONCURRENCY,
+    WEBHOOK_MAX_RETRIES,
+    WEBHOOK_TIMEOUT,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["WEBHOOK"])
 
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
 
-async def post_webhook(name: str, url: str, message: str, event_data: dict) -> bool:
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 60.0
+
+# How often due retries are moved back to the queue
+RETRY_POLL_INTERVAL = 1.0
+
+# Seconds without a heartbeat after which an instance is considered dead and
+# the deliveries it was processing are queued again
+INSTANCE_TIMEOUT = 30
+
+
+def get_webhook_payload(name: str, url: str, message: str, event_data: dict) -> dict:
+    payload = {}
+
+    # Slack and Google Chat Webhooks
+    if "https://hooks.slack.com" in url or "https://chat.googleapis.com" in url:
+        payload["text"] = message
+    # Discord Webhooks
+    elif "https://discord.com/api/webhooks" in url:
+        payload["content"] = (
+            message if len(message) < 2000 else f"{message[: 2000 - 20]}... (truncated)"
+        )
+    # Microsoft Teams Webhooks
+    elif "webhook.office.com" in url:
+        action = event_data.get("action", "undefined")
+        facts = [
+            {"name": name, "value": value}
+            for name, value in json.loads(event_data.get("user", {})).items()
+        ]
+        payload = {
+            "@type": "MessageCard",
+            "@context": "http://schema.org/extensions",
+            "themeColor": "0076D7",
+            "summary": message,
+            "sections": [
+                {
+                    "activityTitle": message,
+                    "activitySubtitle": f"{name} ({VERSION}) - {action}",
+                    "activityImage": WEBUI_FAVICON_URL,
+                    "facts": facts,
+                    "markdown": True,
+                }
+            ],
+        }
+    # Default Payload
+    else:
+        payload = {**event_data}
+
+    return payload
+
+
+class WebhookDeliveryError(Exception):
+    """Raised when a webhook endpoint rejects or fails a delivery"""
+
+    def __init__(
+        self,
+        message: str,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
     try:
-        log.debug(f"post_webhook: {url}, {message}, {event_data}")
-        payload = {}
-
-        # Slack and Google Chat Webhooks
-        if "https://hooks.slack.com" in url or "https://chat.googleapis.com" in url:
-            payload["text"] = message
-        # Discord Webhooks
-        elif "https://discord.com/api/webhooks" in url:
-            payload["content"] = (
-                message
-                if len(message) < 2000
-                else f"{message[: 2000 - 20]}... (truncated)"
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _get_backoff_delay(attempt: int) -> float:
+    # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2**attempt)))
+
+
+class WebhookDispatcher:
+    """
+    Delivers webhooks from a queue with a fixed pool of workers.
+
+    All deliveries share one pooled aiohttp session. A failed delivery is
+    not waited on: it is set aside with a jittered backoff and queued again
+    once that has passed, and a destination that asks to back off
+    (``Retry-After``) is not contacted again before then by any worker.
+
+    With a Redis client the queue is a Redis list, so queued deliveries
+    survive restarts and are shared by the workers of every instance. Retries
+    wait in a sorted set, and deliveries in progress are kept in a processing
+    list of the instance until done. Each instance refreshes a heartbeat key;
+    the processing list of an instance that stopped without moving it back
+    to the queue (stop() does) is moved back by the others once its
+    heartbeat expires. All keys share the {webhooks} hash tag, so they live
+    in one slot under Redis Cluster.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = WEBHOOK_CONCURRENCY,
+        max_retries: int = WEBHOOK_MAX_RETRIES,
+        timeout: float = WEBHOOK_TIMEOUT,
+        redis_key_prefix: str = REDIS_KEY_PREFIX,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.timeout = timeout
+        self.redis = None
+        self.instance_id = str(uuid.uuid4())
+        self.redis_key_prefix = f"{redis_key_prefix}:{{webhooks}}"
+        self.redis_key = f"{self.redis_key_prefix}:queue"
+        self.redis_retry_key = f"{self.redis_key_prefix}:retry"
+        self.redis_instances_key = f"{self.redis_key_prefix}:instances"
+        self.redis_processing_key = self._get_processing_key(self.instance_id)
+        self.redis_heartbeat_key = self._get_heartbeat_key(self.instance_id)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+
+        # In-process retries, heap of (time.time() to retry at, sequence, job)
+        self._retries: list[tuple[float, int, dict]] = []
+        self._retry_sequence = itertools.count()
+
+        # Key: scheme://netloc, Value: time.time() before which to wait
+        self._retry_at: dict[str, float] = {}
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
             )
-        # Microsoft Teams Webhooks
-        elif "webhook.office.com" in url:
-            action = event_data.get("action", "undefined")
-            facts = [
-                {"name": name, "value": value}
-                for name, value in json.loads(event_data.get("user", {})).items()
-            ]
-            payload = {
-                "@type": "MessageCard",
-                "@context": "http://schema.org/extensions",
-                "themeColor": "0076D7",
-                "summary": message,
-                "sections": [
-                    {
-                        "activityTitle": message,
-                        "activitySubtitle": f"{name} ({VERSION}) - {action}",
-                        "activityImage": WEBUI_FAVICON_URL,
-                        "facts": facts,
-                        "markdown": True,
-                    }
-                ],
+        return self._session
+
+    async def start(self, redis=None) -> None:
+        """
+        Start the workers
+
+        Args:
+            redis: Async Redis client to queue deliveries in, in-process queue if None
+        """
+        if self._workers:
+            return
+
+        self.redis = redis
+        self._queue = asyncio.Queue()
+        if self.redis is not None:
+            try:
+                await self._heartbeat()
+            except Exception as e:
+                log.warning(f"Error registering webhook workers in Redis: {e}")
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ] + [asyncio.create_task(self._schedule_retries())]
+
+    async def stop(self) -> None:
+        """Stop the workers, letting queued in-process deliveries finish first"""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), self.timeout)
+            except asyncio.TimeoutError:
+                log.warning(f"Dropping {self._queue.qsize()} queued webhook deliveries")
+        if self._retries:
+            log.warning(f"Dropping {len(self._retries)} webhook delivery retries")
+            self._retries = []
+
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        if self.redis is not None:
+            # Deliveries the workers were cancelled in are delivered elsewhere
+            try:
+                await self._requeue_processing(self.instance_id)
+                await self.redis.srem(self.redis_instances_key, self.instance_id)
+                await self.redis.delete(self.redis_heartbeat_key)
+            except Exception as e:
+                log.warning(f"Error requeueing webhook deliveries in Redis: {e}")
+
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def enqueue(
+        self, name: str, urls: list[str], message: str, event_data: dict
+    ) -> None:
+        """
+        Queue the delivery of a message to webhooks, once per distinct URL
+
+        Args:
+            name: WebUI name
+            urls: Webhook URLs
+            message: Message text
+            event_data: Event payload for generic webhooks
+        """
+        jobs = [
+            {
+                "id": str(uuid.uuid4()),
+                "name": name,
+                "url": url,
+                "message": message,
+                "event_data": event_data,
             }
-        # Default Payload
-        else:
-            payload = {**event_data}
+            for url in dict.fromkeys(url for url in urls if url)
+        ]
+        if not jobs:
+            return
+
+        if not self._workers:
+            await self.start(self.redis)
+
+        if self.redis is not None:
+            try:
+                await self.redis.rpush(self.redis_key, *map(json.dumps, jobs))
+                return
+            except Exception as e:
+                log.warning(f"Error queueing webhooks in Redis, delivering here: {e}")
+
+        for job in jobs:
+            self._queue.put_nowait(job)
 
+    async def send(self, name: str, url: str, message: str, event_data: dict) -> None:
+        """
+        Post a webhook once
+
+        Raises:
+            WebhookDeliveryError: The endpoint failed or rejected the delivery
+        """
+        payload = get_webhook_payload(name, url, message, event_data)
         log.debug(f"payload: {payload}")
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as r:
+
+        try:
+            async with self.get_session().post(url, json=payload) as r:
                 r_text = await r.text()
-                r.raise_for_status()
                 log.debug(f"r.text: {r_text}")
 
+                if r.status >= 400:
+                    raise WebhookDeliveryError(
+                        f"Webhook {url} returned {r.status}: {r_text[:200]}",
+                        retryable=r.status in RETRYABLE_STATUS_CODES,
+                        retry_after=_parse_retry_after(r.headers.get("Retry-After")),
+                    )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise WebhookDeliveryError(
+                f"Webhook {url} failed: {e!r}", retryable=True
+            ) from e
+
+    async def deliver(self, job: dict) -> bool:
+        """
+        Post a queued webhook once, scheduling a retry if the failure is transient
+
+        Returns:
+            True if the webhook was delivered
+        """
+        url = job["url"]
+        destination = self._get_destination(url)
+
+        retry_at = self._retry_at.get(destination, 0)
+        if retry_at > time.time():
+            # The destination asked to back off, this is not an attempt
+            await self._retry_later(job, retry_at)
+            return False
+
+        attempt = job.get("attempt", 0)
+        try:
+            await self.send(job["name"], url, job["message"], job.get("event_data", {}))
+            return True
+        except WebhookDeliveryError as e:
+            if not e.retryable or attempt >= self.max_retries:
+                log.warning(f"Giving up on webhook delivery: {e}")
+                return False
+
+            if e.retry_after is not None:
+                retry_at = time.time() + e.retry_after
+                # Every delivery to this destination waits, not just this one
+                self._retry_at[destination] = max(
+                    self._retry_at.get(destination, 0), retry_at
+                )
+            else:
+                retry_at = time.time() + _get_backoff_delay(attempt)
+
+            log.debug(f"Retrying webhook delivery ({attempt + 1}): {e}")
+            await self._retry_later({**job, "attempt": attempt + 1}, retry_at)
+            return False
+
+    async def _retry_later(self, job: dict, retry_at: float) -> None:
+        if self.redis is not None:
+            try:
+                await self.redis.zadd(self.redis_retry_key, {json.dumps(job): retry_at})
+                return
+            except Exception as e:
+                log.warning(
+                    f"Error scheduling webhook retry in Redis, retrying here: {e}"
+                )
+
+        heapq.heappush(self._retries, (retry_at, next(self._retry_sequence), job))
+
+    async def _schedule_retries(self) -> None:
+        # Moves the retries that are due to the queue, and requeues the
+        # deliveries of instances that died
+        while True:
+            await asyncio.sleep(RETRY_POLL_INTERVAL)
+            await self._poll()
+
+    async def _poll(self) -> None:
+        now = time.time()
+
+        while self._retries and self._retries[0][0] <= now:
+            self._queue.put_nowait(heapq.heappop(self._retries)[2])
+
+        # Forget destinations whose Retry-After has passed
+        self._retry_at = {
+            destination: retry_at
+            for destination, retry_at in self._retry_at.items()
+            if retry_at > now
+        }
+
+        if self.redis is not None:
+            try:
+                for item in await self.redis.zrangebyscore(
+                    self.redis_retry_key, "-inf", now
+                ):
+                    # Only the instance that removes the retry queues it
+                    if await self.redis.zrem(self.redis_retry_key, item):
+                        await self.redis.rpush(self.redis_key, item)
+            except Exception as e:
+                log.warning(f"Error queueing webhook retries from Redis: {e}")
+
+            try:
+                await self._heartbeat()
+                await self._requeue_dead_instances()
+            except Exception as e:
+                log.warning(f"Error checking webhook workers in Redis: {e}")
+
+    def _get_processing_key(self, instance_id: str) -> str:
+        return f"{self.redis_key_prefix}:processing:{instance_id}"
+
+    def _get_heartbeat_key(self, instance_id: str) -> str:
+        return f"{self.redis_key_prefix}:heartbeat:{instance_id}"
+
+    async def _heartbeat(self) -> None:
+        await self.redis.set(self.redis_heartbeat_key, 1, ex=INSTANCE_TIMEOUT)
+        await self.redis.sadd(self.redis_instances_key, self.instance_id)
+
+    async def _requeue_processing(self, instance_id: str) -> int:
+        # LMOVE is atomic, so instances doing this at once requeue each item once
+        requeued = 0
+        while await self.redis.lmove(
+            self._get_processing_key(instance_id), self.redis_key, "LEFT", "LEFT"
+        ):
+            requeued += 1
+        return requeued
+
+    async def _requeue_dead_instances(self) -> None:
+        for instance_id in await self.redis.smembers(self.redis_instances_key):
+            if isinstance(instance_id, bytes):
+                instance_id = instance_id.decode()
+            if instance_id == self.instance_id or await self.redis.exists(
+                self._get_heartbeat_key(instance_id)
+            ):
+                continue
+
+            requeued = await self._requeue_processing(instance_id)
+            if requeued:
+                log.warning(
+                    f"Requeued {requeued} webhook deliveries of stopped instance {instance_id}"
+                )
+            await self.redis.srem(self.redis_instances_key, instance_id)
+
+    @staticmethod
+    def _get_destination(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+    async def _next_job(self) -> tuple[Optional[dict], Optional[str]]:
+        # Returns the job and its Redis processing list item, None if it came
+        # from the in-process queue
+        if self.redis is not None:
+            try:
+                item = await self.redis.blmove(
+                    self.redis_key, self.redis_processing_key, 5, "LEFT", "LEFT"
+                )
+                if item is not None:
+                    try:
+                        return json.loads(item), item
+                    except ValueError:
+                        log.warning(f"Dropping malformed webhook job: {item!r}")
+                        await self.redis.lrem(self.redis_processing_key, 1, item)
+                        return None, None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"Error reading webhook queue from Redis: {e}")
+                await asyncio.sleep(1)
+
+            # Deliveries queued here while Redis was unavailable
+            try:
+                return self._queue.get_nowait(), None
+            except asyncio.QueueEmpty:
+                return None, None
+
+        return await self._queue.get(), None
+
+    async def _worker(self) -> None:
+        while True:
+            job, item = await self._next_job()
+            if job is None:
+                continue
+
+            # If cancelled here, the job stays in the processing list
+            try:
+                await self.deliver(job)
+            except Exception as e:
+                log.exception(f"Error delivering webhook: {e}")
+
+            if item is None:
+                self._queue.task_done()
+            else:
+                try:
+                    await self.redis.lrem(self.redis_processing_key, 1, item)
+                except Exception as e:
+                    log.warning(f"Error removing delivered webhook from Redis: {e}")
+
+
+# Global instance
+webhook_dispatcher = WebhookDispatcher()
+
+
+async def post_webhook(name: str, url: str, message: str, event_data: dict) -> bool:
+    try:
+        log.debug(f"post_webhook: {url}, {message}, {event_data}")
+        await webhook_dispatcher.send(name, url, message, event_data)
         return True
     except Exception as e:
         log.exception(e)
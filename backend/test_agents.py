@@ -61,6 +61,37 @@ class TestJiutianJWT:
         assert is_token_expired(token)
 
 
+class TestJiutianCredentialCache:
+    """Test per-agent credential caching"""
+    
+    def test_token_reused_until_refresh(self):
+        """Test cached token is reused and the key is loaded once"""
+        from open_webui.utils.jiutian_jwt import JiutianCredentialCache
+        
+        cache = JiutianCredentialCache(exp_seconds=3600, refresh_margin=300)
+        loader = Mock(return_value="test_id.test_secret")
+        
+        api_key = cache.get_api_key("agent-1", loader)
+        token = cache.get_token("agent-1", api_key)
+        
+        assert cache.get_api_key("agent-1", loader) == api_key
+        assert cache.get_token("agent-1", api_key) == token
+        loader.assert_called_once_with("agent-1")
+    
+    def test_invalidate_reloads_key(self):
+        """Test invalidation forces a reload of the API key"""
+        from open_webui.utils.jiutian_jwt import JiutianCredentialCache
+        
+        cache = JiutianCredentialCache()
+        loader = Mock(return_value="test_id.test_secret")
+        
+        cache.get_api_key("agent-1", loader)
+        cache.invalidate("agent-1")
+        cache.get_api_key("agent-1", loader)
+        
+        assert loader.call_count == 2
+
+
 class TestAgentModel:
     """Test Agent database model and operations"""
     
@@ -222,6 +253,26 @@ class TestMultiAgentWebSocket:
             assert call_args[0][0] == "multi-agent-message"
             assert call_args[1]["room"] == f"conv_{conv_id}"
     
+    @pytest.mark.asyncio
+    async def test_delta_emitter_coalesces(self, manager):
+        """Test deltas are batched and flushed on close"""
+        manager.send_agent_message = AsyncMock(return_value=True)
+        emitter = manager.create_delta_emitter("test-conv-1", "agent-1", "Agent")
+        emitter.flush_interval = 60
+        emitter.max_buffer_size = 1000
+        
+        for token in ["Hel", "lo", " world"]:
+            await emitter.add(token)
+        
+        manager.send_agent_message.assert_not_called()
+        
+        await emitter.close()
+        
+        manager.send_agent_message.assert_called_once()
+        frame = manager.send_agent_message.call_args[0][2]
+        assert frame["type"] == "delta"
+        assert frame["content"] == "Hello world"
+    
     @pytest.mark.asyncio
     async def test_cleanup_inactive_conversations(self, manager):
         """Test cleanup of inactive conversations"""
@@ -248,6 +299,55 @@ class TestMultiAgentWebSocket:
             assert session_id not in manager.session_to_conv
 
 
+class TestAgentCallScheduler:
+    """Test agent call admission and fairness"""
+    
+    @pytest.mark.asyncio
+    async def test_round_robin_between_users(self):
+        """Test queued calls are admitted round-robin between users"""
+        from open_webui.utils.jiutian_scheduler import AgentCallScheduler
+        
+        scheduler = AgentCallScheduler(max_concurrent=1)
+        order = []
+        release = asyncio.Event()
+        
+        async def call(user_id, agent_uid):
+            async with scheduler.slot(user_id, agent_uid, "https://host"):
+                order.append(user_id)
+                await release.wait()
+        
+        tasks = [
+            asyncio.create_task(call("user-a", "agent-1")),
+            asyncio.create_task(call("user-a", "agent-2")),
+            asyncio.create_task(call("user-a", "agent-3")),
+            asyncio.create_task(call("user-b", "agent-1")),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.get_metrics()["queue_depth"] == 3
+        
+        release.set()
+        await asyncio.gather(*tasks)
+        
+        assert order == ["user-a", "user-b", "user-a", "user-a"]
+    
+    @pytest.mark.asyncio
+    async def test_agent_limit(self):
+        """Test per-agent limits do not block calls to other agents"""
+        from open_webui.utils.jiutian_scheduler import AgentCallScheduler
+        
+        scheduler = AgentCallScheduler(max_concurrent=10)
+        
+        async with scheduler.slot("user-a", "agent-1", "https://host", agent_limit=1):
+            blocked = asyncio.create_task(
+                scheduler.slot("user-a", "agent-1", "https://host", agent_limit=1).__aenter__()
+            )
+            async with scheduler.slot("user-a", "agent-2", "https://host", agent_limit=1):
+                assert scheduler.get_metrics()["running"] == 2
+                assert not blocked.done()
+            blocked.cancel()
+            await asyncio.gather(blocked, return_exceptions=True)
+
+
 class TestMultiChatAPI:
     """Test multi-chat API endpoints"""
     
@@ -294,6 +394,18 @@ class TestMultiChatAPI:
             
             assert response.status_code == 400
             assert "Message cannot be empty" in response.json()["detail"]
+    
+    def test_trim_history_keeps_recent_turns(self):
+        """Test history is trimmed from the oldest turn to fit the token budget"""
+        from open_webui.routers.multi_chat import estimate_tokens, trim_history
+        
+        assert estimate_tokens("你好") == 2
+        assert estimate_tokens("abcdefgh") == 2
+        
+        history = [["a" * 40, "b" * 40], ["c" * 8, "d" * 8], ["e" * 8, "f" * 8]]
+        assert trim_history(history, 8) == history[1:]
+        assert trim_history(history, 3) == []
+        assert trim_history(history, 0) == history
 
 
 class TestAgentAPI: